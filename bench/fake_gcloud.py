@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Stand-in `gcloud` executable for the commands get-tpu's gcloud backend runs.
+
+Put a `gcloud` symlink to this file first on PATH and get-tpu runs unchanged,
+with no GCP project and no credentials:
+
+    mkdir -p /tmp/fake-bin && ln -sf "$PWD/bench/fake_gcloud.py" /tmp/fake-bin/gcloud
+    PATH=/tmp/fake-bin:$PATH FAKE_GCLOUD_STATE=/tmp/fake-state ./get-tpu.sh ls
+
+State lives in FAKE_GCLOUD_STATE, one JSON file per zone, each behind its own
+flock, so hundreds of concurrent invocations only contend within a zone. Every
+call sleeps FAKE_GCLOUD_LATENCY seconds first (process start-up not included).
+Zones are FAKE_GCLOUD_ZONES: either a comma-separated list, or a count N for
+N synthetic zones. Queued resources turn ACTIVE FAKE_GCLOUD_PROVISION_AFTER
+seconds after creation; unset, they wait forever. A start, stop or delete of
+a node, or a delete of a queued resource, sent with --async takes effect at
+once, but its operation only reports done FAKE_GCLOUD_OP_DURATION seconds
+later (default 0).
+
+FAKE_GCLOUD_SCENARIO names a JSON file that scripts a harsher world (see
+bench/scenarios/ and bench/gcloud_bench.py); every key is optional:
+
+    zones            count or list, overriding FAKE_GCLOUD_ZONES
+    latency          {"default": L, "tpu-vm list": L, ...} keyed by the two
+                     words after `compute tpus` (or `auth list`, ...), where L
+                     is seconds or {"median": s, "sigma": s} for a lognormal
+    capacity         {"default": s, "<zone>": s}: seconds after FAKE_GCLOUD_T0
+                     that a zone starts having capacity; null (the default)
+                     means never. Creates fail RESOURCE_EXHAUSTED until then,
+                     and queued resources turn ACTIVE once it arrives.
+    quota_zones      zones where every create fails QUOTA_EXCEEDED
+    missing_zones    zones where every call fails NOT_FOUND
+    offered_every    {"v6e-8": 3}: only every 3rd zone offers v6e-8; a create
+                     or flex submit elsewhere fails "not offered"
+    transient_rate   share of calls failing UNAVAILABLE at random
+
+Every call is appended to FAKE_GCLOUD_STATE/calls.log as "<command>\t<latency>",
+so a bench can count gcloud spawns per command.
+"""
+
+import fcntl
+import functools
+import json
+import math
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+DEFAULT_ZONES = ["europe-west4-a", "us-east5-b", "us-central1-a", "asia-east1-c"]
+ACCELERATOR_TYPES = ["v6e-1", "v6e-4", "v6e-8", "v5litepod-4"]
+PROJECT = "fake-project"
+
+
+@functools.lru_cache(maxsize=None)
+def scenario() -> dict:
+    path = os.getenv("FAKE_GCLOUD_SCENARIO")
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def zones() -> list[str]:
+    spec = scenario().get("zones", os.getenv("FAKE_GCLOUD_ZONES", ""))
+    if isinstance(spec, list):
+        return spec
+    spec = str(spec)
+    if spec.isdigit():
+        return [f"fake-zone{i:03d}-a" for i in range(int(spec))]
+    return spec.split(",") if spec else DEFAULT_ZONES
+
+
+def _command_key(words: list[str]) -> str:
+    """The words naming the command: "tpu-vm list", "auth list", "locations list", ..."""
+    if words[:2] == ["compute", "tpus"]:
+        words = words[2:]
+    return " ".join(words[:2])
+
+
+def _latency(key: str) -> float:
+    table = scenario().get("latency", {})
+    spec = table.get(key, table.get("default", float(os.getenv("FAKE_GCLOUD_LATENCY", "0"))))
+    if isinstance(spec, dict):
+        return spec["median"] * math.exp(random.gauss(0, spec.get("sigma", 0.5)))
+    return float(spec)
+
+
+def _has_capacity(zone: str) -> bool:
+    capacity = scenario().get("capacity")
+    if capacity is None:
+        return True
+    after = capacity.get(zone, capacity.get("default"))
+    t0 = float(os.getenv("FAKE_GCLOUD_T0", "0"))
+    return after is not None and time.time() >= t0 + after
+
+
+def _offered(zone: str) -> list[str]:
+    every = scenario().get("offered_every", {})
+    index = zones().index(zone) if zone in zones() else 0
+    return [t for t in ACCELERATOR_TYPES if index % every.get(t, 1) == 0]
+
+
+def _log_call(key: str, latency: float):
+    root = os.getenv("FAKE_GCLOUD_STATE", "/tmp/fake-gcloud")
+    os.makedirs(root, exist_ok=True)
+    # One short O_APPEND write per call: concurrent callers never interleave.
+    with open(os.path.join(root, "calls.log"), "a") as f:
+        f.write(f"{key}\t{latency:.3f}\n")
+
+
+@contextmanager
+def zone_state(zone: str):
+    """Yield the zone's {"nodes": ..., "queued": ...} and write it back on exit."""
+    root = os.getenv("FAKE_GCLOUD_STATE", "/tmp/fake-gcloud")
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{zone}.json")
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {"nodes": {}, "queued": {}}
+        _provision(state, zone)
+        yield state
+        with open(path + ".tmp", "w") as f:
+            json.dump(state, f)
+        os.replace(path + ".tmp", path)
+
+
+def _provision(state: dict, zone: str):
+    if "capacity" in scenario():
+        if _has_capacity(zone):
+            for qr_id, qr in state["queued"].items():
+                if qr["state"]["state"] == "WAITING_FOR_RESOURCES":
+                    qr["state"] = {"state": "ACTIVE"}
+                    state["nodes"][qr_id] = _node(zone, qr_id, qr["_type"], len(state["nodes"]))
+        return
+    after = os.getenv("FAKE_GCLOUD_PROVISION_AFTER")
+    if after is None:
+        return
+    for qr_id, qr in state["queued"].items():
+        if qr["state"]["state"] == "WAITING_FOR_RESOURCES" and time.time() >= qr["_created"] + float(after):
+            qr["state"] = {"state": "ACTIVE"}
+            state["nodes"][qr_id] = _node(zone, qr_id, qr["_type"], len(state["nodes"]))
+
+
+def _node(zone: str, name: str, accelerator_type: str, index: int) -> dict:
+    return {
+        "name": f"projects/{PROJECT}/locations/{zone}/nodes/{name}",
+        "acceleratorType": accelerator_type,
+        "state": "READY",
+        "networkEndpoints": [
+            {"ipAddress": f"10.0.0.{index + 2}", "accessConfig": {"externalIp": "127.0.0.1"}}
+        ],
+    }
+
+
+def _public(qr: dict) -> dict:
+    return {k: v for k, v in qr.items() if not k.startswith("_")}
+
+
+def option(args: list[str], name: str) -> str | None:
+    for i, arg in enumerate(args):
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+        if arg == f"--{name}" and i + 1 < len(args):
+            return args[i + 1]
+    return None
+
+
+def fail(message: str):
+    print(f"ERROR: (gcloud) {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def main(argv: list[str]):
+    args = [a for a in argv if a not in ("alpha", "--quiet", "--force")]
+    words = [a for a in args if not a.startswith("--")]
+    zone = option(args, "zone")
+    key = _command_key(words)
+    latency = _latency(key)
+    _log_call(key, latency)
+    time.sleep(latency)
+    if random.random() < scenario().get("transient_rate", 0):
+        fail("UNAVAILABLE: The service is currently unavailable.")
+    if zone in scenario().get("missing_zones", []):
+        fail(f"NOT_FOUND: Location projects/{PROJECT}/locations/{zone} not found.")
+
+    if words[:2] == ["auth", "list"]:
+        print("fake@example.com")
+    elif words[:2] == ["auth", "print-access-token"]:
+        print(json.dumps({"token": "fake-token"}))
+    elif words[:3] == ["config", "get-value", "project"]:
+        print(json.dumps(PROJECT))
+    elif words[:4] == ["compute", "tpus", "locations", "list"]:
+        print(json.dumps([{"locationId": z} for z in zones()]))
+    elif words[:4] == ["compute", "tpus", "accelerator-types", "list"]:
+        print(json.dumps([{"type": t} for t in _offered(zone)]))
+    elif words[:3] == ["compute", "tpus", "tpu-vm"]:
+        tpu_vm(words[3], words[4:], args, zone)
+    elif words[:3] == ["compute", "tpus", "queued-resources"]:
+        queued_resources(words[3], words[4:], args, zone)
+    else:
+        fail(f"fake gcloud does not implement: {' '.join(argv)}")
+
+
+def _check_offered(zone: str, accelerator_type: str | None):
+    if accelerator_type and accelerator_type not in _offered(zone):
+        fail(f"INVALID_ARGUMENT: Accelerator type {accelerator_type} is not offered in zone {zone}.")
+
+
+def _check_capacity(zone: str):
+    if zone in scenario().get("quota_zones", []):
+        fail(f"QUOTA_EXCEEDED: Quota 'TPUV6E' exceeded in {zone}.")
+    if not _has_capacity(zone):
+        fail(f"RESOURCE_EXHAUSTED: There is no more capacity in the zone \"{zone}\".")
+
+
+def tpu_vm(verb: str, rest: list[str], args: list[str], zone: str):
+    if verb in ("ssh", "scp"):
+        return
+    with zone_state(zone) as state:
+        nodes = state["nodes"]
+        if verb == "list":
+            print(json.dumps(list(nodes.values())))
+            return
+        if verb == "operations":
+            ops = state.setdefault("operations", {})
+            print(json.dumps([dict(_public(op), done=time.time() >= op["_done_at"]) for op in ops.values()]))
+            return
+        name = rest[0]
+        if verb == "create":
+            if name in nodes:
+                fail(f"ALREADY_EXISTS: node {name} already exists")
+            _check_offered(zone, option(args, "accelerator-type"))
+            _check_capacity(zone)
+            nodes[name] = _node(zone, name, option(args, "accelerator-type"), len(nodes))
+            return
+        if name not in nodes:
+            fail(f"NOT_FOUND: node {name} was not found")
+        if verb == "describe":
+            print(json.dumps(nodes[name]))
+        elif verb == "delete":
+            del nodes[name]
+        elif verb in ("start", "stop"):
+            nodes[name]["state"] = "READY" if verb == "start" else "STOPPED"
+        if "--async" in args and verb in ("delete", "start", "stop"):
+            _start_operation(state, zone)
+
+
+def _start_operation(state: dict, zone: str):
+    """Record an --async call's operation, done FAKE_GCLOUD_OP_DURATION from now, and print it."""
+    op_name = f"projects/{PROJECT}/locations/{zone}/operations/operation-{time.time_ns()}"
+    duration = float(os.getenv("FAKE_GCLOUD_OP_DURATION", "0"))
+    state.setdefault("operations", {})[op_name] = {
+        "name": op_name,
+        "_done_at": time.time() + duration,
+    }
+    print(json.dumps({"name": op_name, "done": False}))
+
+
+def queued_resources(verb: str, rest: list[str], args: list[str], zone: str):
+    with zone_state(zone) as state:
+        queued = state["queued"]
+        if verb == "list":
+            print(json.dumps([_public(q) for q in queued.values()]))
+            return
+        qr_id = rest[0]
+        if verb == "create":
+            if qr_id in queued:
+                fail(f"ALREADY_EXISTS: queued resource {qr_id} already exists")
+            _check_offered(zone, option(args, "accelerator-type"))
+            if zone in scenario().get("quota_zones", []):
+                fail(f"QUOTA_EXCEEDED: Quota 'TPUV6E' exceeded in {zone}.")
+            queued[qr_id] = {
+                "name": f"projects/{PROJECT}/locations/{zone}/queuedResources/{qr_id}",
+                "state": {"state": "WAITING_FOR_RESOURCES"},
+                "createTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "_created": time.time(),
+                "_type": option(args, "accelerator-type"),
+            }
+            return
+        if qr_id not in queued:
+            fail(f"NOT_FOUND: queued resource {qr_id} was not found")
+        if verb == "describe":
+            print(json.dumps(_public(queued[qr_id])))
+        elif verb == "delete":
+            del queued[qr_id]
+            state["nodes"].pop(qr_id, None)
+            if "--async" in args:
+                _start_operation(state, zone)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Stand-in `ssh` and `scp` executables that treat every host as a local directory.
+
+Symlink this file as both `ssh` and `scp` first on PATH, and get-tpu's plain
+ssh/scp steps run against FAKE_SSH_ROOT/<alias> instead of a TPU worker:
+`ssh ALIAS CMD` runs CMD with sh in that directory, with HOME pointing at it,
+and `scp SRC ALIAS:DEST` copies SRC there. -o options are accepted and
+ignored.
+
+scp models the client's uplink: copies are serialised (concurrent uploads
+share one link) and each sleeps size / FAKE_SSH_UPLINK seconds (MB/s;
+unset means unthrottled). Every byte copied is counted in
+FAKE_SSH_ROOT/client-bytes, one line per copy, so a bench can tell how much
+left the client. Traffic between "workers" (curl from one directory's
+server to another) never goes through here and is not counted.
+"""
+
+import fcntl
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+
+def _root() -> str:
+    return os.environ.get("FAKE_SSH_ROOT", "/tmp/fake-ssh")
+
+
+def _positional(argv: list[str]) -> list[str]:
+    """Drop the leading options (and -o/-i/-p values) and return what follows."""
+    skip = False
+    for i, arg in enumerate(argv):
+        if skip:
+            skip = False
+        elif arg in ("-o", "-i", "-p", "-P", "-F"):
+            skip = True
+        elif not arg.startswith("-"):
+            return argv[i:]
+    return []
+
+
+def ssh(argv: list[str]):
+    host, *command = _positional(argv)
+    home = os.path.join(_root(), host)
+    os.makedirs(home, exist_ok=True)
+    env = dict(os.environ, HOME=home)
+    sys.exit(subprocess.call(["sh", "-c", " ".join(command)], cwd=home, env=env))
+
+
+def scp(argv: list[str]):
+    src, target = _positional(argv)
+    host, _, dest = target.partition(":")
+    home = os.path.join(_root(), host)
+    os.makedirs(home, exist_ok=True)
+    size = os.path.getsize(src)
+    with open(os.path.join(_root(), "uplink.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        uplink = os.getenv("FAKE_SSH_UPLINK")
+        if uplink:
+            time.sleep(size / (float(uplink) * 1e6))
+        shutil.copyfile(src, os.path.join(home, dest))
+        with open(os.path.join(_root(), "client-bytes"), "a") as counter:
+            counter.write(f"{size}\n")
+
+
+if __name__ == "__main__":
+    if os.path.basename(sys.argv[0]) == "scp":
+        scp(sys.argv[1:])
+    else:
+        ssh(sys.argv[1:])
@@ -0,0 +1,193 @@
+"""Local stand-in for the parts of the TPU REST API that get-tpu's rest backend uses.
+
+Keeps nodes and queued resources in memory and answers the v2 / v2alpha1
+endpoints RestBackend calls, so the backend can be exercised with no GCP
+project and no gcloud:
+
+    python bench/fake_tpu_api.py --port 8765 &
+    GET_TPU_BACKEND=rest GET_TPU_API_ENDPOINT=http://127.0.0.1:8765 \
+        GET_TPU_ACCESS_TOKEN=fake CLOUDSDK_CORE_PROJECT=fake \
+        uv run get-tpu.py ls --details
+
+Long-running operations complete immediately. A queued resource waits in
+WAITING_FOR_RESOURCES for --provision-after seconds, then turns ACTIVE and
+materialises its node.
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_ZONES = ["europe-west4-a", "us-east5-b", "us-central1-a", "asia-east1-c"]
+ACCELERATOR_TYPES = ["v6e-1", "v6e-4", "v6e-8", "v5litepod-4"]
+
+
+class FakeTpuApi:
+    def __init__(self, zones: list[str], provision_after: float):
+        self.zones = zones
+        self.provision_after = provision_after
+        self.nodes: dict[str, dict] = {}
+        self.queued: dict[str, dict] = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def _node(self, parent: str, node_id: str, accelerator_type: str, version: str) -> dict:
+        index = len(self.nodes) + 2
+        return {
+            "name": f"{parent}/nodes/{node_id}",
+            "acceleratorType": accelerator_type,
+            "runtimeVersion": version,
+            "state": "READY",
+            "networkEndpoints": [
+                {
+                    "ipAddress": f"10.0.{index // 256}.{index % 256}",
+                    "accessConfig": {"externalIp": "127.0.0.1"},
+                }
+            ],
+        }
+
+    def _refresh_queued(self):
+        now = time.time()
+        for name, qr in self.queued.items():
+            if qr["state"]["state"] == "WAITING_FOR_RESOURCES" and now >= qr["_ready_at"]:
+                qr["state"] = {"state": "ACTIVE"}
+                spec = qr["tpu"]["nodeSpec"][0]
+                node = spec["node"]
+                self.nodes[f"{spec['parent']}/nodes/{spec['nodeId']}"] = self._node(
+                    spec["parent"], spec["nodeId"], node["acceleratorType"], node["runtimeVersion"]
+                )
+
+    @staticmethod
+    def _operation(name: str, response: dict | None = None) -> dict:
+        parent = name.split("/nodes/")[0].split("/queuedResources/")[0]
+        return {
+            "name": f"{parent}/operations/operation-{uuid.uuid4().hex[:12]}",
+            "done": True,
+            "response": response or {},
+        }
+
+    def handle(self, method: str, path: str, query: dict, body: dict) -> tuple[int, dict]:
+        path = path.strip("/")
+        version, _, resource = path.partition("/")
+        with self.lock:
+            self.requests += 1
+            self._refresh_queued()
+            if re.fullmatch(r"projects/[^/]+/locations", resource):
+                return 200, {"locations": [{"locationId": z} for z in self.zones]}
+            if re.fullmatch(r"projects/[^/]+/locations/[^/]+/acceleratorTypes", resource):
+                return 200, {"acceleratorTypes": [{"type": t} for t in ACCELERATOR_TYPES]}
+            if re.fullmatch(r"projects/[^/]+/locations/[^/]+/operations/[^/]+", resource):
+                return 200, {"name": resource, "done": True}
+
+            if m := re.fullmatch(r"(projects/[^/]+/locations/[^/]+)/nodes", resource):
+                parent = m.group(1)
+                if method == "GET":
+                    nodes = [n for k, n in self.nodes.items() if k.startswith(parent + "/")]
+                    return 200, {"nodes": nodes}
+                node_id = query["nodeId"][0]
+                key = f"{parent}/nodes/{node_id}"
+                if key in self.nodes:
+                    return 409, _error(409, "ALREADY_EXISTS", f"{key} already exists")
+                self.nodes[key] = self._node(
+                    parent, node_id, body["acceleratorType"], body["runtimeVersion"]
+                )
+                return 200, self._operation(key, self.nodes[key])
+
+            if m := re.fullmatch(r"(projects/[^/]+/locations/[^/]+/nodes/[^/:]+)(:\w+)?", resource):
+                key, verb = m.group(1), m.group(2)
+                if key not in self.nodes:
+                    return 404, _error(404, "NOT_FOUND", f"{key} was not found")
+                if method == "DELETE":
+                    del self.nodes[key]
+                    return 200, self._operation(key)
+                if verb in (":start", ":stop"):
+                    self.nodes[key]["state"] = "READY" if verb == ":start" else "STOPPED"
+                    return 200, self._operation(key, self.nodes[key])
+                return 200, self.nodes[key]
+
+            if m := re.fullmatch(r"(projects/[^/]+/locations/[^/]+)/queuedResources", resource):
+                parent = m.group(1)
+                if method == "GET":
+                    qrs = [
+                        _public(q) for k, q in self.queued.items() if k.startswith(parent + "/")
+                    ]
+                    return 200, {"queuedResources": qrs}
+                key = f"{parent}/queuedResources/{query['queuedResourceId'][0]}"
+                if key in self.queued:
+                    return 409, _error(409, "ALREADY_EXISTS", f"{key} already exists")
+                self.queued[key] = dict(
+                    body,
+                    name=key,
+                    state={"state": "WAITING_FOR_RESOURCES"},
+                    createTime=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    _ready_at=time.time() + self.provision_after,
+                )
+                return 200, self._operation(key)
+
+            if m := re.fullmatch(r"projects/[^/]+/locations/[^/]+/queuedResources/[^/]+", resource):
+                key = m.group(0)
+                if key not in self.queued:
+                    return 404, _error(404, "NOT_FOUND", f"{key} was not found")
+                if method == "DELETE":
+                    spec = self.queued.pop(key)["tpu"]["nodeSpec"][0]
+                    self.nodes.pop(f"{spec['parent']}/nodes/{spec['nodeId']}", None)
+                    return 200, self._operation(key)
+                return 200, _public(self.queued[key])
+
+        return 404, _error(404, "NOT_FOUND", f"no such endpoint: {version}/{resource}")
+
+
+def _public(qr: dict) -> dict:
+    return {k: v for k, v in qr.items() if not k.startswith("_")}
+
+
+def _error(code: int, status: str, message: str) -> dict:
+    return {"error": {"code": code, "status": status, "message": message}}
+
+
+def serve(api: FakeTpuApi, port: int, latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+        def _dispatch(self):
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                status, payload = 401, _error(401, "UNAUTHENTICATED", "missing token")
+            else:
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                time.sleep(latency)
+                status, payload = api.handle(self.command, url.path, parse_qs(url.query), body)
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_DELETE = _dispatch
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument("--provision-after", type=float, default=30.0)
+    parser.add_argument("--zones", default=",".join(DEFAULT_ZONES))
+    args = parser.parse_args()
+    api = FakeTpuApi(args.zones.split(","), args.provision_after)
+    server = serve(api, args.port, args.latency)
+    print(f"fake TPU API on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,119 @@
+"""Compare uploading the payload to every worker with get-tpu's in-slice fan-out.
+
+Simulates an N-worker slice with bench/fake_ssh.py: each worker is a local
+directory, and the fan-out's worker-to-worker copies are real HTTP transfers
+between local servers on 127.0.0.1. Both strategies run on the same random
+payload, through get-tpu's own functions, unchanged:
+
+    python bench/fanout_bench.py --workers 8 --size-mb 50 --uplink 20
+
+--uplink (MB/s) throttles the simulated client uplink; the LAN is not
+throttled. The result, bytes sent from the client and wall time for each
+strategy, is printed as JSON.
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def _fake_environment(root: str, uplink: float | None):
+    """Point HOME, PATH and the fake ssh/scp at a scratch directory."""
+    bin_dir = os.path.join(root, "bin")
+    os.makedirs(bin_dir)
+    for tool in ("ssh", "scp"):
+        os.symlink(os.path.join(BENCH_DIR, "fake_ssh.py"), os.path.join(bin_dir, tool))
+    home = os.path.join(root, "home")
+    os.makedirs(os.path.join(home, ".get-tpu"))
+    with open(os.path.join(home, ".get-tpu", "config.json"), "w") as f:
+        json.dump({"tpu_name_prefix": "bench-"}, f)
+    os.environ["HOME"] = home
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["FAKE_SSH_ROOT"] = os.path.join(root, "workers")
+    if uplink:
+        os.environ["FAKE_SSH_UPLINK"] = str(uplink)
+
+
+def _load_get_tpu():
+    # HOME must already point at the scratch directory: paths are fixed at import.
+    spec = importlib.util.spec_from_file_location("get_tpu", os.path.join(REPO_DIR, "get-tpu.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _reset_workers() -> str:
+    workers = os.environ["FAKE_SSH_ROOT"]
+    shutil.rmtree(workers, ignore_errors=True)
+    os.makedirs(workers)
+    return workers
+
+
+def _client_bytes(workers: str) -> int:
+    try:
+        with open(os.path.join(workers, "client-bytes")) as f:
+            return sum(int(line) for line in f)
+    except FileNotFoundError:
+        return 0
+
+
+def _verified(get_tpu, workers: str, aliases: list[str], sha: str) -> bool:
+    return all(
+        get_tpu._file_sha256(os.path.join(workers, alias, get_tpu.PAYLOAD_TAR)) == sha
+        for alias in aliases
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=50.0)
+    parser.add_argument("--uplink", type=float, default=20.0, help="client uplink, MB/s (0: unthrottled)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        _fake_environment(root, args.uplink)
+        get_tpu = _load_get_tpu()
+        tar_path = os.path.join(root, "payload.tar.gz")
+        with open(tar_path, "wb") as f:
+            f.write(os.urandom(int(args.size_mb * 1e6)))
+        sha = get_tpu._file_sha256(tar_path)
+        digest = hashlib.sha256(sha.encode()).hexdigest()
+        aliases = [f"bench-w{i}" for i in range(args.workers)]
+        result = {"workers": args.workers, "payload_bytes": os.path.getsize(tar_path), "uplink_mb_s": args.uplink}
+
+        workers = _reset_workers()
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(lambda alias: get_tpu.upload_payload(alias, tar_path, digest), aliases))
+        result["direct"] = {
+            "client_bytes": _client_bytes(workers),
+            "wall_s": round(time.time() - started, 2),
+            "verified": _verified(get_tpu, workers, aliases, sha),
+        }
+
+        workers = _reset_workers()
+        started = time.time()
+        get_tpu.distribute_payload(aliases, ["127.0.0.1"] * args.workers, tar_path, digest)
+        result["fanout"] = {
+            "client_bytes": _client_bytes(workers),
+            "wall_s": round(time.time() - started, 2),
+            "verified": _verified(get_tpu, workers, aliases, sha),
+        }
+
+    json.dump(result, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
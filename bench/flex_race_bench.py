@@ -0,0 +1,117 @@
+"""Time the flex-race engine's polling against hundreds of simulated zones.
+
+Runs get-tpu's FlexRace, unchanged, against bench/fake_gcloud.py in a throwaway
+HOME: submits one flex-start request per zone, lets every participant poll for
+--duration seconds with nothing ever provisioned, then reports how long each
+poll call took and how far apart consecutive polls of the same participant
+landed (the engine's equivalent of a poll round: ideally --interval plus one
+call):
+
+    python bench/flex_race_bench.py --zones 300 --latency 0.5 --duration 60
+
+The result is printed as JSON.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def _fake_environment(root: str, zones: int, latency: float):
+    """Point HOME, PATH and the fake gcloud's settings at a scratch directory."""
+    bin_dir = os.path.join(root, "bin")
+    os.makedirs(bin_dir)
+    os.symlink(os.path.join(BENCH_DIR, "fake_gcloud.py"), os.path.join(bin_dir, "gcloud"))
+    os.environ["HOME"] = os.path.join(root, "home")
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["FAKE_GCLOUD_STATE"] = os.path.join(root, "state")
+    os.environ["FAKE_GCLOUD_ZONES"] = str(zones)
+    os.environ["FAKE_GCLOUD_LATENCY"] = str(latency)
+    os.environ.pop("FAKE_GCLOUD_PROVISION_AFTER", None)
+    os.environ["GET_TPU_BACKEND"] = "gcloud"
+
+
+def _load_get_tpu():
+    # HOME must already point at the scratch directory: paths are fixed at import.
+    spec = importlib.util.spec_from_file_location("get_tpu", os.path.join(REPO_DIR, "get-tpu.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _summary(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": round(statistics.median(ordered), 3),
+        "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+async def _race_for(race, zones: list[str], duration: float):
+    try:
+        await asyncio.wait_for(race.run(iter(zones)), duration)
+    except asyncio.TimeoutError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--zones", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.5, help="fake gcloud seconds per call")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds to keep polling")
+    parser.add_argument("--interval", type=float, default=10.0, help="per-participant poll interval")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--accelerator-type", default="v6e-4")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        _fake_environment(root, args.zones, args.latency)
+        get_tpu = _load_get_tpu()
+        zones = get_tpu.get_zones(args.accelerator_type)
+
+        race = get_tpu.FlexRace(
+            get_tpu.Config(tpu_name_prefix="bench-"),
+            get_tpu.get_cache(),
+            args.accelerator_type,
+            "v2-alpha-tpuv6e",
+            "1h",
+            poll_interval=args.interval,
+            concurrency=args.concurrency,
+        )
+        started = time.time()
+        asyncio.run(_race_for(race, zones, args.duration))
+        wall = time.time() - started
+
+    json.dump(
+        {
+            "zones": len(zones),
+            "accepted": len(race.states),
+            "refused": len(race.failures),
+            "latency": args.latency,
+            "interval": args.interval,
+            "concurrency": args.concurrency,
+            "wall_seconds": round(wall, 1),
+            "poll_call_seconds": _summary(race.poll_latencies),
+            "poll_gap_seconds": _summary(race.poll_gaps),
+        },
+        sys.stdout,
+        indent=2,
+    )
+    print()
+
+
+if __name__ == "__main__":
+    main()
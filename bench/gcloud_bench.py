@@ -0,0 +1,225 @@
+"""Run get-tpu commands against a scripted fake gcloud and report what they cost.
+
+Each benchmark runs one get-tpu command, unchanged, in a fresh process with a
+throwaway HOME and bench/fake_gcloud.py first on PATH as `gcloud`. The fake
+follows a scenario file (see bench/scenarios/ and fake_gcloud's docstring):
+zone count, per-command latency distributions, capacity appearing over time,
+quota and NOT_FOUND zones. Its "setup" key seeds the cache and the fake GCP
+with `cache_nodes` nodes, plus `cache_flex` flex-start requests of which
+`suspended_flex` are SUSPENDED.
+
+    python bench/gcloud_bench.py bench/scenarios/zones-300.json
+    python bench/gcloud_bench.py bench/scenarios/*.json --bench ls,flex-cleanup --out bench.jsonl
+
+For every scenario and benchmark this reports the wall time, the exit code,
+the number of gcloud spawns (overall and per command) and the peak thread
+count, as one JSON object per line. --out appends the same lines to a file,
+tagged with the git revision, to track regressions over time.
+
+The install a create or flex-race would run at the end is skipped (it needs a
+real node to ssh into); everything up to it runs as is.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+ACCELERATOR_TYPE = "v6e-4"
+
+BENCHES = {
+    "create": ["create", "--accelerator-type", ACCELERATOR_TYPE, "--parallel", "8", "--deadline", "10m"],
+    "ls": ["ls", "--details"],
+    "flex-race": ["flex-race", "8h", "--accelerator-type", ACCELERATOR_TYPE, "--deadline", "5m"],
+    "flex-cleanup": ["flex-cleanup"],
+    "discover-zones": ["discover-zones", "--accelerator-type", ACCELERATOR_TYPE, "--force"],
+}
+# How often the child samples its thread count.
+THREAD_SAMPLE_INTERVAL = 0.005
+
+
+def _load(path: str, name: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _fake_environment(root: str, scenario_path: str) -> dict:
+    """The environment a benchmark's child runs in, rooted at a scratch directory."""
+    bin_dir = os.path.join(root, "bin")
+    os.makedirs(bin_dir)
+    os.symlink(os.path.join(BENCH_DIR, "fake_gcloud.py"), os.path.join(bin_dir, "gcloud"))
+    home = os.path.join(root, "home")
+    os.makedirs(os.path.join(home, ".get-tpu"))
+    with open(os.path.join(home, ".get-tpu", "config.json"), "w") as f:
+        json.dump({"tpu_name_prefix": "bench-"}, f)
+    env = dict(
+        os.environ,
+        HOME=home,
+        PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}",
+        FAKE_GCLOUD_STATE=os.path.join(root, "state"),
+        FAKE_GCLOUD_SCENARIO=os.path.abspath(scenario_path),
+        GET_TPU_BACKEND="gcloud",
+        COLUMNS="120",
+    )
+    env.pop("FAKE_GCLOUD_LATENCY", None)
+    env.pop("FAKE_GCLOUD_PROVISION_AFTER", None)
+    return env
+
+
+def _seed(env: dict, setup: dict):
+    """Create the setup's nodes and flex requests in the fake GCP and in get-tpu's cache."""
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        _seed_state(_load(os.path.join(BENCH_DIR, "fake_gcloud.py"), "fake_gcloud"), env, setup)
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def _seed_state(fake, env: dict, setup: dict):
+    zones = fake.zones()
+    rng = random.Random(0)
+    cache = {}
+    by_zone: dict[str, dict] = {}
+    for i in range(setup.get("cache_nodes", 0)):
+        zone, name = zones[i % len(zones)], f"bench-node-{i}"
+        nodes = by_zone.setdefault(zone, {"nodes": {}, "queued": {}})["nodes"]
+        node = fake._node(zone, name, ACCELERATOR_TYPE, len(nodes))
+        node["state"] = rng.choice(["READY", "STOPPED"])
+        nodes[name] = node
+        cache[name] = {"type": ACCELERATOR_TYPE, "zone": zone}
+    suspended = setup.get("suspended_flex", 0)
+    for i in range(setup.get("cache_flex", 0)):
+        zone, qr_id = zones[i % len(zones)], f"bench-flex-{i}"
+        queued = by_zone.setdefault(zone, {"nodes": {}, "queued": {}})["queued"]
+        queued[qr_id] = {
+            "name": f"projects/{fake.PROJECT}/locations/{zone}/queuedResources/{qr_id}",
+            "state": {"state": "SUSPENDED" if i < suspended else "WAITING_FOR_RESOURCES"},
+            "createTime": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "_created": time.time(),
+            "_type": ACCELERATOR_TYPE,
+        }
+        cache[qr_id] = {
+            "type": ACCELERATOR_TYPE,
+            "zone": zone,
+            "queued_resource_id": qr_id,
+            "kind": "flex-start",
+        }
+    for zone, seeded in by_zone.items():
+        with fake.zone_state(zone) as state:
+            state.update(seeded)
+    with open(os.path.join(env["HOME"], ".get-tpu", "cache.json"), "w") as f:
+        json.dump(cache, f, indent=2)
+
+
+def _calls(env: dict) -> Counter:
+    try:
+        with open(os.path.join(env["FAKE_GCLOUD_STATE"], "calls.log")) as f:
+            return Counter(line.split("\t")[0] for line in f)
+    except FileNotFoundError:
+        return Counter()
+
+
+def _child(bench: str):
+    """Run one benchmark in this process and print its wall time and peak threads."""
+    get_tpu = _load(os.path.join(REPO_DIR, "get-tpu.py"), "get_tpu")
+    get_tpu.install_tpu_script = lambda *args, **kwargs: None
+    get_tpu._reinstall_one = lambda *args, **kwargs: None
+    from typer.testing import CliRunner
+
+    peak = threading.active_count()
+    done = threading.Event()
+
+    def _sample():
+        nonlocal peak
+        while not done.wait(THREAD_SAMPLE_INTERVAL):
+            peak = max(peak, threading.active_count())
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    started = time.time()
+    result = CliRunner().invoke(get_tpu.app, BENCHES[bench])
+    wall = time.time() - started
+    done.set()
+    sampler.join()
+    if os.getenv("GCLOUD_BENCH_VERBOSE"):
+        sys.stderr.write(result.output)
+    # The sampler itself is not the command's.
+    print(json.dumps({"wall_s": round(wall, 2), "exit_code": result.exit_code, "peak_threads": peak - 1}))
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def run(scenario_path: str, bench: str) -> dict:
+    with open(scenario_path) as f:
+        scenario = json.load(f)
+    with tempfile.TemporaryDirectory() as root:
+        env = _fake_environment(root, scenario_path)
+        _seed(env, scenario.get("setup", {}))
+        env["FAKE_GCLOUD_T0"] = str(time.time())
+        child = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", bench],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if child.returncode != 0:
+            raise RuntimeError(f"{bench} on {scenario_path} crashed:\n{child.stderr}")
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        calls = _calls(env)
+    return {
+        "scenario": os.path.splitext(os.path.basename(scenario_path))[0],
+        "bench": bench,
+        **result,
+        "gcloud_spawns": sum(calls.values()),
+        "spawns_by_command": dict(calls.most_common()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help="scenario JSON files")
+    parser.add_argument("--bench", default=",".join(BENCHES), help="comma-separated benchmarks")
+    parser.add_argument("--out", help="also append the results to this JSON-lines file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child)
+        return
+
+    benches = args.bench.split(",")
+    unknown = [b for b in benches if b not in BENCHES]
+    if unknown or not args.scenarios:
+        parser.error(f"name scenarios and benchmarks from {', '.join(BENCHES)}")
+    tags = {"git": _git_revision(), "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+    for scenario_path in args.scenarios:
+        for bench in benches:
+            line = json.dumps({**tags, **run(scenario_path, bench)})
+            print(line, flush=True)
+            if args.out:
+                with open(args.out, "a") as f:
+                    f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+"""rsync-style block delta sync of a directory tree, over any byte pipe.
+
+get-tpu uses this to update ~/extra on a TPU without re-sending the whole
+staged tree: the node describes what it already has (block signatures), the
+local side answers with only the blocks and files that differ, and the node
+patches its copy in place. Everything runs over one ssh command each way, so
+there is no daemon to install; the same file is imported locally and copied
+to the node to run there:
+
+    python3 delta_sync.py signatures DIR > sigs     # on the node
+    python3 delta_sync.py patch DIR < delta         # on the node
+
+Stdlib only and Python 3.8-compatible, since it runs on whatever python3 the
+TPU image ships.
+
+Like the tar payload it replaces, a sync only adds and updates: files that
+exist on the node but not locally are left alone.
+
+To compare against shipping a full tar.gz, between two local directories:
+
+    python3 delta_sync.py bench OLD_DIR NEW_DIR --bandwidth 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import itertools
+import json
+import os
+import shutil
+import struct
+import sys
+import tarfile
+import tempfile
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+
+SIG_MAGIC = b"DSIG1\n"
+DELTA_MAGIC = b"DDELTA1\n"
+# Block size per file grows with its size (about sqrt(size), as rsync does),
+# so a large file doesn't produce an oversized signature list.
+MIN_BLOCK = 4 * 1024
+MAX_BLOCK = 1024 * 1024
+# The rolling search matches blocks at any byte offset, so it also catches
+# insertions and deletions, but it runs per byte in Python. Above this size
+# only block-aligned matches are looked for, which still covers files that
+# are appended to or rewritten in place, and the file is read one block at a
+# time rather than held in memory.
+ROLLING_MAX = 8 * 1024 * 1024
+# Literal data is sent in pieces of at most this size.
+LITERAL_CHUNK = 1024 * 1024
+# A run of copied blocks is read from the old file this much at a time, so
+# patching a multi-GB file never holds more than this of it in memory.
+COPY_CHUNK = 4 * 1024 * 1024
+ADLER_MOD = 65521
+
+
+@dataclass
+class FileSignature:
+    mode: int
+    size: int
+    block_size: int
+    # One (weak, strong) pair per block, in file order; the last block may be short.
+    blocks: list[tuple[int, bytes]] = field(default_factory=list)
+
+
+@dataclass
+class Stats:
+    files: int = 0
+    changed: int = 0
+    literal_bytes: int = 0
+    copied_bytes: int = 0
+    wire_bytes: int = 0
+
+
+def block_size_for(size: int) -> int:
+    target = int(size**0.5)
+    return max(MIN_BLOCK, min(MAX_BLOCK, (target + 1023) // 1024 * 1024))
+
+
+def _strong(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _walk(root: str) -> list[str]:
+    """Every path under root, relative to it, sorted."""
+    entries = []
+    for parent, dirs, files in os.walk(root):
+        for entry in dirs + files:
+            entries.append(os.path.relpath(os.path.join(parent, entry), root))
+    return sorted(entries)
+
+
+# -- wire helpers ---------------------------------------------------------------
+
+
+class _ZlibWriter:
+    """Compress everything written through it onto out, counting the bytes sent."""
+
+    def __init__(self, out):
+        self.out = out
+        self.compressor = zlib.compressobj(1)
+        self.wire_bytes = 0
+
+    def write(self, data: bytes):
+        self._emit(self.compressor.compress(data))
+
+    def close(self):
+        self._emit(self.compressor.flush())
+        self.out.flush()
+
+    def _emit(self, data: bytes):
+        if data:
+            self.out.write(data)
+            self.wire_bytes += len(data)
+
+
+class _ZlibReader:
+    """Read exact byte counts out of a zlib stream arriving on inp."""
+
+    def __init__(self, inp):
+        self.inp = inp
+        self.decompressor = zlib.decompressobj()
+        self.buffer = bytearray()
+
+    def read(self, n: int) -> bytes:
+        while len(self.buffer) < n:
+            chunk = self.inp.read(1 << 16)
+            if not chunk:
+                self.buffer += self.decompressor.flush()
+                if len(self.buffer) < n:
+                    raise EOFError("delta_sync: stream ended early")
+                break
+            self.buffer += self.decompressor.decompress(chunk)
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    def unpack(self, fmt: str):
+        return struct.unpack(fmt, self.read(struct.calcsize(fmt)))
+
+    def string(self) -> str:
+        (length,) = self.unpack("!H")
+        return self.read(length).decode()
+
+
+def _string(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack("!H", len(data)) + data
+
+
+# -- signatures (runs on the node) ------------------------------------------------
+
+
+def write_signatures(root: str, out):
+    """Describe every regular file under root as per-block (weak, strong) checksums."""
+    out.write(SIG_MAGIC)
+    writer = _ZlibWriter(out)
+    if os.path.isdir(root):
+        for rel in _walk(root):
+            path = os.path.join(root, rel)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            block = block_size_for(st.st_size)
+            count = (st.st_size + block - 1) // block
+            writer.write(b"F" + _string(rel) + struct.pack("!IQII", st.st_mode & 0o7777, st.st_size, block, count))
+            with open(path, "rb") as f:
+                while True:
+                    data = f.read(block)
+                    if not data:
+                        break
+                    writer.write(struct.pack("!I", zlib.adler32(data)) + _strong(data))
+    writer.write(b"Z")
+    writer.close()
+
+
+def read_signatures(inp) -> dict[str, FileSignature]:
+    if inp.read(len(SIG_MAGIC)) != SIG_MAGIC:
+        raise ValueError("delta_sync: not a signature stream")
+    reader = _ZlibReader(inp)
+    signatures = {}
+    while True:
+        (tag,) = reader.unpack("!c")
+        if tag == b"Z":
+            return signatures
+        rel = reader.string()
+        mode, size, block, count = reader.unpack("!IQII")
+        sig = FileSignature(mode, size, block)
+        for _ in range(count):
+            (weak,) = reader.unpack("!I")
+            sig.blocks.append((weak, reader.read(16)))
+        signatures[rel] = sig
+
+
+# -- delta (runs locally) ------------------------------------------------------
+
+
+def _aligned_ops(f, sig: FileSignature):
+    """Match the new file block by block against any old block with the same content.
+
+    Reads f one block at a time and yields ops as it goes, so a file of any
+    size costs one block of memory.
+    """
+    by_strong = {}
+    for i, (_, strong) in enumerate(sig.blocks):
+        by_strong.setdefault(strong, i)
+    block = sig.block_size
+    i = 0
+    while True:
+        piece = f.read(block)
+        if not piece:
+            return
+        strong = _strong(piece)
+        # Prefer the block at the same position, so an unchanged file reads as 0..n-1.
+        index = i if i < len(sig.blocks) and sig.blocks[i][1] == strong else by_strong.get(strong)
+        if index is not None and _old_block_len(sig, index) == len(piece):
+            yield ("C", index)
+        else:
+            yield ("L", piece)
+        i += 1
+
+
+def _literal_ops(f):
+    """A new file, sent whole in LITERAL_CHUNK pieces."""
+    while True:
+        piece = f.read(LITERAL_CHUNK)
+        if not piece:
+            return
+        yield ("L", piece)
+
+
+def _unchanged(f, sig: FileSignature, size: int) -> bool:
+    """True if f holds exactly the old file's blocks, in order. Leaves f rewound."""
+    if size != sig.size:
+        return False
+    try:
+        return all(_strong(f.read(sig.block_size)) == strong for _, strong in sig.blocks)
+    finally:
+        f.seek(0)
+
+
+def _old_block_len(sig: FileSignature, index: int) -> int:
+    return min(sig.block_size, sig.size - index * sig.block_size)
+
+
+def _rolling_ops(data: bytes, sig: FileSignature) -> list[tuple]:
+    """The rsync search: slide a window byte by byte, matching old blocks anywhere."""
+    block = sig.block_size
+    full = {}
+    for i, (weak, strong) in enumerate(sig.blocks):
+        if _old_block_len(sig, i) == block:
+            full.setdefault(weak, {})[strong] = i
+    ops = []
+    n = len(data)
+    pos = literal_start = 0
+    a = b = 0
+
+    def _reset(at: int):
+        value = zlib.adler32(data[at : at + block])
+        return value & 0xFFFF, value >> 16
+
+    if n >= block:
+        a, b = _reset(0)
+    while pos + block <= n:
+        candidates = full.get((b << 16) | a)
+        if candidates:
+            index = candidates.get(_strong(data[pos : pos + block]))
+            if index is not None:
+                if literal_start < pos:
+                    ops.append(("L", data[literal_start:pos]))
+                ops.append(("C", index))
+                pos += block
+                literal_start = pos
+                if pos + block <= n:
+                    a, b = _reset(pos)
+                continue
+        if pos + block < n:
+            out, inn = data[pos], data[pos + block]
+            a = (a - out + inn) % ADLER_MOD
+            b = (b - block * out + a - 1) % ADLER_MOD
+        pos += 1
+    # The old file's short last block can only match the new file's tail.
+    if sig.blocks:
+        last = len(sig.blocks) - 1
+        tail_start = n - _old_block_len(sig, last)
+        if tail_start >= literal_start and tail_start < n and _strong(data[tail_start:]) == sig.blocks[last][1]:
+            if literal_start < tail_start:
+                ops.append(("L", data[literal_start:tail_start]))
+            ops.append(("C", last))
+            return ops
+    if literal_start < n:
+        ops.append(("L", data[literal_start:]))
+    return ops
+
+
+def _write_ops(writer: _ZlibWriter, ops, sig: FileSignature | None, stats: Stats):
+    """Send ops as they come, merging consecutive copies into one run."""
+    run_start, run_len = None, 0
+    for op in itertools.chain(ops, [("END", None)]):
+        if op[0] == "C" and run_start is not None and op[1] == run_start + run_len:
+            run_len += 1
+            continue
+        if run_start is not None:
+            writer.write(b"C" + struct.pack("!II", run_start, run_len))
+            stats.copied_bytes += sum(_old_block_len(sig, i) for i in range(run_start, run_start + run_len))
+            run_start = None
+        if op[0] == "C":
+            run_start, run_len = op[1], 1
+        elif op[0] == "L":
+            for offset in range(0, len(op[1]), LITERAL_CHUNK):
+                piece = op[1][offset : offset + LITERAL_CHUNK]
+                writer.write(b"L" + struct.pack("!I", len(piece)) + piece)
+                stats.literal_bytes += len(piece)
+
+
+def write_delta(root: str, signatures: dict[str, FileSignature], out) -> Stats:
+    """Send what it takes to turn the node's tree into root: changed blocks and new files."""
+    stats = Stats()
+    out.write(DELTA_MAGIC)
+    writer = _ZlibWriter(out)
+    for rel in _walk(root):
+        path = os.path.join(root, rel)
+        if os.path.islink(path):
+            writer.write(b"S" + _string(rel) + _string(os.readlink(path)))
+            continue
+        if os.path.isdir(path):
+            writer.write(b"D" + _string(rel))
+            continue
+        stats.files += 1
+        sig = signatures.get(rel)
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            mode, size = st.st_mode & 0o7777, st.st_size
+            if sig is None:
+                block = block_size_for(size)
+                ops = _literal_ops(f)
+            else:
+                block = sig.block_size
+                if _unchanged(f, sig, size) and mode == sig.mode:
+                    continue
+                if size <= ROLLING_MAX:
+                    # Small enough to search in memory at every byte offset.
+                    ops = _rolling_ops(f.read(), sig)
+                else:
+                    ops = _aligned_ops(f, sig)
+            stats.changed += 1
+            writer.write(b"F" + _string(rel) + struct.pack("!IQI", mode, size, block))
+            _write_ops(writer, ops, sig, stats)
+        writer.write(b"E")
+    writer.write(b"Z")
+    writer.close()
+    stats.wire_bytes = writer.wire_bytes + len(DELTA_MAGIC)
+    return stats
+
+
+# -- patch (runs on the node) --------------------------------------------------
+
+
+def apply_delta(root: str, inp) -> Stats:
+    """Apply a delta stream to root. Each file is rebuilt in a temp file and renamed over."""
+    if inp.read(len(DELTA_MAGIC)) != DELTA_MAGIC:
+        raise ValueError("delta_sync: not a delta stream")
+    reader = _ZlibReader(inp)
+    stats = Stats()
+    os.makedirs(root, exist_ok=True)
+    while True:
+        (tag,) = reader.unpack("!c")
+        if tag == b"Z":
+            return stats
+        rel = reader.string()
+        path = os.path.join(root, rel)
+        if tag == b"D":
+            os.makedirs(path, exist_ok=True)
+            continue
+        if tag == b"S":
+            target = reader.string()
+            if os.path.lexists(path):
+                os.remove(path)
+            os.symlink(target, path)
+            continue
+        mode, size, block = reader.unpack("!IQI")
+        os.makedirs(os.path.dirname(path) or root, exist_ok=True)
+        stats.files += 1
+        old = open(path, "rb") if os.path.isfile(path) else None
+        tmp = f"{path}.dsync-tmp"
+        try:
+            with open(tmp, "wb") as new:
+                while True:
+                    (op,) = reader.unpack("!c")
+                    if op == b"E":
+                        break
+                    if op == b"C":
+                        start, count = reader.unpack("!II")
+                        old.seek(start * block)
+                        remaining = count * block
+                        while remaining:
+                            data = old.read(min(remaining, COPY_CHUNK))
+                            if not data:
+                                break
+                            new.write(data)
+                            remaining -= len(data)
+                            stats.copied_bytes += len(data)
+                    else:
+                        (length,) = reader.unpack("!I")
+                        new.write(reader.read(length))
+                        stats.literal_bytes += length
+        finally:
+            if old is not None:
+                old.close()
+        if os.path.getsize(tmp) != size:
+            os.remove(tmp)
+            raise ValueError(f"delta_sync: {rel} rebuilt to the wrong size")
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+        stats.changed += 1
+
+
+# -- bench -----------------------------------------------------------------------
+
+
+def _trees_equal(a: str, b: str) -> bool:
+    """True if every file under a exists under b with the same content and mode."""
+    for rel in _walk(a):
+        pa, pb = os.path.join(a, rel), os.path.join(b, rel)
+        if os.path.isfile(pa) and not os.path.islink(pa):
+            if not os.path.isfile(pb) or os.stat(pa).st_mode != os.stat(pb).st_mode:
+                return False
+            with open(pa, "rb") as fa, open(pb, "rb") as fb:
+                if fa.read() != fb.read():
+                    return False
+    return True
+
+
+def bench(old: str, new: str, bandwidth: float) -> dict:
+    """Update a copy of old to new by delta, and compare with sending new as a tar.gz.
+
+    Wall time is local compute plus the bytes sent over a link of `bandwidth`
+    MB/s, which is what dominates on a real upload.
+    """
+    result = {"bandwidth_mb_s": bandwidth}
+    with tempfile.TemporaryDirectory() as scratch:
+        started = time.time()
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w:gz", compresslevel=6) as tar:
+            tar.add(new, arcname=".")
+        took = time.time() - started
+        sent = buf.tell()
+        result["tar_gz"] = {
+            "bytes_sent": sent,
+            "compute_s": round(took, 2),
+            "wall_s": round(took + sent / (bandwidth * 1e6), 2),
+        }
+
+        dest = os.path.join(scratch, "node")
+        shutil.copytree(old, dest, symlinks=True)
+        started = time.time()
+        sigs = io.BytesIO()
+        write_signatures(dest, sigs)
+        sig_bytes = sigs.tell()
+        sigs.seek(0)
+        delta = io.BytesIO()
+        stats = write_delta(new, read_signatures(sigs), delta)
+        delta.seek(0)
+        apply_delta(dest, delta)
+        took = time.time() - started
+        sent = sig_bytes + stats.wire_bytes
+        result["delta"] = {
+            "bytes_sent": sent,
+            "signature_bytes": sig_bytes,
+            "compute_s": round(took, 2),
+            "wall_s": round(took + sent / (bandwidth * 1e6), 2),
+            **asdict(stats),
+        }
+        result["delta"]["verified"] = _trees_equal(new, dest)
+    return result
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("signatures", help="write signatures of DIR to stdout").add_argument("dir")
+    sub.add_parser("patch", help="apply a delta from stdin to DIR").add_argument("dir")
+    bench_parser = sub.add_parser("bench", help="compare delta and tar.gz between two directories")
+    bench_parser.add_argument("old")
+    bench_parser.add_argument("new")
+    bench_parser.add_argument("--bandwidth", type=float, default=20.0, help="upload MB/s")
+    args = parser.parse_args(argv)
+
+    if args.command == "signatures":
+        write_signatures(args.dir, sys.stdout.buffer)
+    elif args.command == "patch":
+        stats = apply_delta(args.dir, sys.stdin.buffer)
+        print(json.dumps(asdict(stats)))
+    else:
+        print(json.dumps(bench(args.old, args.new, args.bandwidth), indent=2))
+
+
+if __name__ == "__main__":
+    main()
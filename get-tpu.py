@@ -1,17 +1,36 @@
+import asyncio
+import atexit
+import codecs
+import contextlib
+import dataclasses
+import fnmatch
+import fcntl
 import getpass
+import gzip
+import hashlib
+import http.client
+import io
 import json
 import os
+import queue
 import re
 import shlex
 import shutil
+import secrets
+import signal
 import socket
 import subprocess
+import sys
+import tarfile
 import tempfile
+import threading
 import time
+import urllib.parse
 from collections import OrderedDict
-from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import typer
 from rich import print
@@ -21,16 +40,76 @@ from rich.table import Table
 CUR_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = os.path.expanduser("~/.get-tpu")
 CACHE_FILE = os.path.join(CONFIG_DIR, "cache.json")
+CACHE_LOCK = os.path.join(CONFIG_DIR, "cache.lock")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
 ZONES_CACHE_FILE = os.path.join(CONFIG_DIR, "zones-cache.json")
+CONTEXT_FILE = os.path.join(CONFIG_DIR, "context.json")
+ZONE_INDEX_VERSION = 2
+# A zone's offered accelerator types change on the order of months; re-check
+# an index entry once it is a week old.
+ZONE_INDEX_TTL = 7 * 86400
 VERBOSE = os.getenv("VERBOSE", "0") == "1"
 
+# Which client node and queued-resource calls go through: "gcloud" spawns one
+# gcloud process per call, "rest" talks to the TPU API over pooled keep-alive
+# HTTPS. GET_TPU_API_ENDPOINT points the REST backend somewhere else, e.g. at
+# bench/fake_tpu_api.py, and GET_TPU_ACCESS_TOKEN skips fetching a real token.
+BACKEND = os.getenv("GET_TPU_BACKEND", "gcloud")
+TPU_API_ENDPOINT = os.getenv("GET_TPU_API_ENDPOINT", "https://tpu.googleapis.com")
+API_TIMEOUT = 60
+API_OPERATION_POLL = 5
+# Requests that are safe to send again when their response is lost.
+API_IDEMPOTENT = ("GET", "DELETE")
+# How long the active account and project read from gcloud are trusted before
+# being checked again. A login, logout or config switch invalidates them sooner:
+# the cache is keyed on the mtimes of gcloud's own config files.
+CONTEXT_TTL = 6 * 3600
+
+# Refresh the access token this long before it expires, so a request never
+# goes out with a token that lapses in flight.
+API_TOKEN_MARGIN = 300
+
+# Every child process goes through one runner (_spawn). Reads we parse get a
+# default timeout, so a hung gcloud can never pin a worker thread; mutations
+# are bounded only by the command's --deadline, since a create can
+# legitimately take several minutes.
+GCLOUD_READ_TIMEOUT = 120
+# Per-call latencies, kept across runs for hedging and the `latency` command.
+# Only the newest LATENCY_SAMPLES of each call are kept.
+LATENCY_FILE = os.path.join(CONFIG_DIR, "latency.json")
+LATENCY_SAMPLES = 200
+# A read still running past its call's p95 gets a second, identical request;
+# the first answer wins and the other is killed. Only once that p95 rests on
+# at least this many samples.
+HEDGE_MIN_SAMPLES = 20
+# Every timed phase (a create or start, the install's ssh waits, payload and
+# remote run, a flex race and its wait for ACTIVE) is appended to METRICS_FILE
+# as one JSON line: when, phase, zone, accelerator type, seconds, outcome (ok,
+# failed, timeout, or aborted if Ctrl-C cut it short) and attempts. `stats` summarises it, and `restart` ranks
+# zones by their recent starts from it. Only the newest METRICS_KEEP lines are
+# read; once the file passes METRICS_MAX_BYTES it is cut back to them.
+METRICS_FILE = os.path.join(CONFIG_DIR, "metrics.jsonl")
+METRICS_KEEP = 5000
+METRICS_MAX_BYTES = 4 * 1024 * 1024
+# `create` and `flex-race` try zones best first, scored from the recorded
+# create, start and flex_race outcomes for the accelerator type. A sample's
+# weight halves every ZONE_SCORE_HALF_LIFE, so last week's stock-outs fade.
+# Only ok and failed samples count: a timeout or an abort is our own cutoff,
+# not the zone's answer.
+# Each zone starts from one pseudo-success and two pseudo-failures taking the
+# PRIOR times, so an untried zone ranks between proven good and proven bad.
+ZONE_SCORE_HALF_LIFE = 2 * 86400
+ZONE_SCORE_PHASES = ("create", "start", "flex_race")
+ZONE_PRIOR_OK_SECS = 300
+ZONE_PRIOR_FAIL_SECS = 60
+
 DEFAULT_ACCELERATOR = "v6e-4"
 DEFAULT_SOFTWARE_VERSION = "v2-alpha-tpuv6e"
 
 # Timeouts for the ssh/scp steps of an install. The install script waits up to
-# APT_LOCK_TIMEOUT (see setup.sh) for unattended-upgrades to release the dpkg
-# lock, so the remote-run budget has to be comfortably larger than that.
+# DPkg::Lock::Timeout (see steps/apt-packages.sh) for unattended-upgrades to
+# release the dpkg lock, so the remote-run budget has to be comfortably larger
+# than that.
 SCP_TIMEOUT = 300
 REMOTE_INSTALL_TIMEOUT = 2700
 
@@ -41,16 +120,74 @@ REMOTE_INSTALL_TIMEOUT = 2700
 # there for half an hour.
 UNREACHABLE_BUDGET = 300
 
-# Where the detached install writes its output on the TPU, and the markers used
-# to tell that output apart from gcloud's own chatter on the same stream.
+# Where the detached install writes its output on the TPU, and the markers the
+# log follower frames it with: LOG_TAG<n> heads a chunk of exactly n log bytes,
+# RC_TAG<rc> reports the script's exit status.
 REMOTE_LOG = "tpu-setup.log"
 PAYLOAD_TAR = "get-tpu-payload.tar.gz"
 LOG_TAG = "__TPULOG__"
 RC_TAG = "__TPURC__"
-ROT_TAG = "__TPUROT__"
-# 2s per tick, so a follower session lasts at most ~5 min before handing control
-# back to the local loop to re-check the overall deadline.
-FOLLOW_SESSION_TICKS = 150
+# How long the follower waits for the log to grow before checking again:
+# inotifywait's timeout (whole seconds) where it is installed, otherwise a
+# plain polling sleep.
+FOLLOW_INOTIFY_WAIT = 1
+FOLLOW_POLL_WAIT = 0.25
+
+# Install steps after the first talk to the node over plain ssh/scp through
+# the ~/.ssh/config alias, sharing one OpenSSH master connection per node: the
+# first step pays the handshake, every later one (and every retry) reuses it.
+# %C hashes the connection's host, port and user, so a node that comes back
+# on a new IP gets a new master rather than a stale one. The key is the one
+# gcloud generates and pushes to the node, unless the config names another.
+SSH_CONTROL_DIR = os.path.join(CONFIG_DIR, "ssh")
+SSH_CONTROL_PERSIST = "15m"
+GCLOUD_SSH_KEY = os.path.expanduser("~/.ssh/google_compute_engine")
+SSH_CONFIG_LOCK = os.path.join(CONFIG_DIR, "ssh-config.lock")
+
+# Built payloads are kept by the digest of what went into them, so a reinstall
+# with unchanged inputs neither re-tars nor, if the node already holds that
+# digest (PAYLOAD_TAR.sha256 next to the tarball), re-uploads. Bump
+# PAYLOAD_FORMAT whenever the packing changes, so old digests stop matching.
+PAYLOAD_CACHE_DIR = os.path.join(CONFIG_DIR, "payloads")
+PAYLOAD_CACHE_KEEP = 5
+PAYLOAD_FORMAT = 1
+
+# `reinstall --delta` leaves extra/ out of the tarball and brings the node's
+# ~/extra up to date with delta_sync.py instead, copied next to it as
+# DELTA_SYNC_REMOTE: only changed blocks and new files cross the wire.
+DELTA_SYNC_REMOTE = "get-tpu-delta_sync.py"
+
+# On a multi-host slice the payload is uploaded to worker 0 only and then
+# copied worker to worker over the slice's internal network: every worker
+# that holds it serves ~/PAYLOAD_TAR over HTTP on its internal IP, port
+# FANOUT_PORT + its worker index, under a random per-install token path,
+# for at most FANOUT_SERVE_TIMEOUT seconds. The holders double each round,
+# so N workers take log2(N) rounds and the client's uplink carries one copy.
+FANOUT_PORT = 18700
+FANOUT_SERVE_TIMEOUT = 900
+FANOUT_DIR = ".get-tpu-fanout"
+
+# `--stream` unpacks the payload on the node as it arrives. This runs there
+# behind the decompressor: it extracts the tar stream from stdin into the
+# current directory and prints the sha256 of every byte it read, trailer
+# included, for stream_payload to compare with what it sent.
+STREAM_UNPACK = """
+import hashlib, sys, tarfile
+class Reader:
+    sha256 = hashlib.sha256()
+    def read(self, n=-1):
+        data = sys.stdin.buffer.read(n)
+        self.sha256.update(data)
+        return data
+reader = Reader()
+with tarfile.open(fileobj=reader, mode="r|") as tar:
+    if hasattr(tarfile, "fully_trusted_filter"):
+        tar.extraction_filter = tarfile.fully_trusted_filter
+    tar.extractall(".")
+while reader.read(1 << 16):
+    pass
+print(reader.sha256.hexdigest())
+"""
 
 # retrieved with gcloud compute tpus locations list --format=json
 # manually resorted to to have europe first, then us, then asia
@@ -89,8 +226,34 @@ LOCATIONS = [
     "southamerica-west1-a",
 ]
 
+# How long one `tpu-vm list` snapshot of a zone answers node lookups. Long
+# enough that a single command pays for each zone once, short enough that a
+# state shown to the user is never older than a glance.
+ZONE_SNAPSHOT_TTL = 15
+
 app = typer.Typer()
 _gcloud_auth_checked = False
+# Serialises the gcloud context checks, so the worker threads of one command
+# share a single `gcloud auth list` instead of each running its own.
+_context_lock = threading.RLock()
+_config_memo: tuple[float, "Config"] | None = None
+_zone_snapshots: dict[str, tuple[float, list[dict]]] = {}
+_node_details: dict[tuple[str, str], tuple[float, dict]] = {}
+_snapshot_lock = threading.Lock()
+_zone_index_lock = threading.Lock()
+_deadline: float | None = None
+_metrics_lock = threading.Lock()
+_open_phases: dict[str, list[dict]] = {}
+_aborted = threading.Event()
+# Set by Ctrl-C (see _interrupt): a child that fails from then on was killed
+# by us, not refused by GCP.
+_interrupted = threading.Event()
+_output_lock = threading.Lock()
+_children: set[int] = set()
+_children_lock = threading.Lock()
+_latency_history: dict[str, list[float]] | None = None
+_latency_new: dict[str, list[float]] = {}
+_latency_lock = threading.Lock()
 
 
 @dataclass
@@ -109,11 +272,96 @@ class GcloudAuthError(Exception):
     """
 
 
+def _gcloud_config_stamp() -> dict:
+    """mtimes of the gcloud files that decide the active account and project.
+
+    access_tokens.db is left out on purpose: gcloud rewrites it on every token
+    refresh, which would invalidate the context on nearly every call.
+    """
+    root = os.getenv("CLOUDSDK_CONFIG") or os.path.expanduser("~/.config/gcloud")
+    paths = [os.path.join(root, "active_config"), os.path.join(root, "credentials.db")]
+    configurations = os.path.join(root, "configurations")
+    if os.path.isdir(configurations):
+        paths += sorted(os.path.join(configurations, n) for n in os.listdir(configurations))
+    stamp: dict = {p: os.path.getmtime(p) if os.path.exists(p) else None for p in paths}
+    stamp["CLOUDSDK_ACTIVE_CONFIG_NAME"] = os.getenv("CLOUDSDK_ACTIVE_CONFIG_NAME")
+    return stamp
+
+
+def _load_context() -> dict:
+    """Return the cached gcloud context, or {} if it is stale or gcloud's config moved."""
+    try:
+        with open(CONTEXT_FILE, "r") as f:
+            context = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if time.time() - context.get("checked_at", 0) > CONTEXT_TTL:
+        return {}
+    if context.get("stamp") != _gcloud_config_stamp():
+        return {}
+    return context
+
+
+def _save_context(**fields):
+    """Merge fields into the context cache, starting afresh if it had gone stale."""
+    with _context_lock:
+        context = _load_context()
+        if not context:
+            context = {"checked_at": time.time(), "stamp": _gcloud_config_stamp()}
+        context.update(fields)
+        if not os.access(CONFIG_DIR, os.F_OK):
+            os.makedirs(CONFIG_DIR, exist_ok=True)
+        # Replaced whole, so a concurrent reader never sees a torn file.
+        partial = f"{CONTEXT_FILE}.{os.getpid()}.tmp"
+        with open(partial, "w") as f:
+            json.dump(context, f, indent=2)
+        os.replace(partial, CONTEXT_FILE)
+
+
+def _invalidate_context():
+    """Drop the cached context so the next call checks gcloud live again."""
+    global _gcloud_auth_checked
+    with _context_lock:
+        _gcloud_auth_checked = False
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(CONTEXT_FILE)
+
+
+def _is_auth_error(stderr: str) -> bool:
+    """True if a failed gcloud call looks like lapsed credentials, not an API error."""
+    stderr = stderr.lower()
+    return any(
+        marker in stderr
+        for marker in (
+            "gcloud auth login",
+            "reauthentication",
+            "invalid_grant",
+            "unauthenticated",
+            "no credentialed accounts",
+        )
+    )
+
+
 def ensure_gcloud_authenticated():
-    """Raise a clear error unless gcloud has an active account configured."""
+    """Raise a clear error unless gcloud has an active account configured.
+
+    The answer is cached in context.json across invocations: `gcloud auth list`
+    costs a second or more, and paying it on every command made even `ls` slow.
+    A call that later fails with an auth error drops the cache (see
+    _gcloud_output), so a lapsed login still surfaces as this clear error.
+    """
     global _gcloud_auth_checked
     if _gcloud_auth_checked:
         return
+    with _context_lock:
+        if not _gcloud_auth_checked:
+            _check_gcloud_account()
+            _gcloud_auth_checked = True
+
+
+def _check_gcloud_account():
+    if _load_context().get("account"):
+        return
 
     try:
         result = subprocess.run(
@@ -137,10 +385,235 @@ def ensure_gcloud_authenticated():
             message = f"{message}\n   gcloud reported: {detail}"
         raise GcloudAuthError(message)
 
-    _gcloud_auth_checked = True
+    _save_context(account=result.stdout.strip().splitlines()[0])
+
+
+class DeadlineExceeded(Exception):
+    """The command's --deadline ran out.
+
+    Deliberately not a RuntimeError: the retry loops treat RuntimeError as
+    "try again", and a spent deadline has to end the command instead.
+    """
+
+
+class Aborted(DeadlineExceeded):
+    """A fail-fast fan-out (see _on_every_worker) gave up; every call still running stops."""
+
+
+def set_deadline(spec: str):
+    """Bound the rest of this command by a duration like "2h"; the earliest deadline wins."""
+    global _deadline
+    deadline = time.monotonic() + _parse_duration(spec)
+    _deadline = deadline if _deadline is None else min(_deadline, deadline)
+
+
+@contextlib.contextmanager
+def _deadline_lifted():
+    """Let cleanup (cancelling what was submitted) run after the deadline has passed."""
+    global _deadline
+    saved, _deadline = _deadline, None
+    try:
+        yield
+    finally:
+        _deadline = saved
+
+
+def _call_timeout(timeout: float | None) -> float | None:
+    """One call's timeout: its own, capped by what is left of the deadline."""
+    if _aborted.is_set():
+        raise Aborted("❌ Stopped: a parallel step failed.")
+    if _deadline is None:
+        return timeout
+    left = _deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded("❌ Deadline reached, giving up.")
+    return left if timeout is None else min(timeout, left)
+
+
+def _timed_out(cmd: str, timeout: float | None) -> Exception:
+    if _deadline is not None and time.monotonic() >= _deadline:
+        return DeadlineExceeded(f"❌ Deadline reached while running: {cmd}")
+    return RuntimeError(f"❌ Timed out after {timeout:.0f}s running: {cmd}")
+
+
+def _kill_group(pid: int):
+    """SIGKILL a child's whole process group, if the child is still ours."""
+    with _children_lock:
+        if pid not in _children:
+            return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def _kill_children():
+    with _children_lock:
+        pids = list(_children)
+    for pid in pids:
+        _kill_group(pid)
+
+
+def _interrupt(signum, frame):
+    """Ctrl-C: kill every child group we started, then interrupt as usual.
+
+    Children run in their own sessions (see _spawn), so the terminal's SIGINT
+    no longer reaches them; without this they would outlive us, and worker
+    threads waiting on them would hold up the exit.
+    """
+    _interrupted.set()
+    _kill_children()
+    raise KeyboardInterrupt
+
+
+def _spawn(
+    args: list[str], capture: bool, timeout: float | None, started: list[int] | None = None
+) -> subprocess.CompletedProcess:
+    """Run one child to completion in its own session, tracked until it exits.
+
+    Its own session means a timeout or Ctrl-C kills the whole process group:
+    gcloud is a wrapper that forks python, which forks ssh, and killing just
+    the top left the rest running with our pipes still open. Raises
+    subprocess.TimeoutExpired; _run and _gcloud_output turn that into an error
+    naming the command.
+    """
+    pipe = subprocess.PIPE if capture else None
+    started_at = time.monotonic()
+    proc = subprocess.Popen(args, text=True, stdout=pipe, stderr=pipe, start_new_session=True)
+    with _children_lock:
+        _children.add(proc.pid)
+    if started is not None:
+        started.append(proc.pid)
+    try:
+        out, err = proc.communicate(timeout=timeout)
+    except BaseException as exc:
+        _kill_group(proc.pid)
+        proc.communicate()
+        if isinstance(exc, subprocess.TimeoutExpired):
+            # A call that timed out took at least this long; dropping it
+            # would leave the p95 describing only the calls that answered.
+            _record_latency(args, time.monotonic() - started_at)
+        raise
+    finally:
+        with _children_lock:
+            _children.discard(proc.pid)
+    _record_latency(args, time.monotonic() - started_at)
+    return subprocess.CompletedProcess(args, proc.returncode, out, err)
+
+
+def _spawn_hedged(args: list[str], timeout: float | None) -> subprocess.CompletedProcess:
+    """Run an idempotent read, sending a second copy if the first is slower than usual.
+
+    Tail latency on gcloud calls is mostly one slow request, not a slow
+    service, so a duplicate sent at the call's p95 usually answers first. The
+    first successful answer wins and the other copy is killed; if the first
+    to finish failed, the other still gets its chance.
+    """
+    samples = _latency_samples(_latency_label(args))
+    hedge_after = _quantile(samples, 0.95) if len(samples) >= HEDGE_MIN_SAMPLES else None
+    if hedge_after is None or (timeout is not None and hedge_after >= timeout):
+        return _spawn(args, True, timeout)
+
+    outcomes: queue.Queue = queue.Queue()
+    pids: list[int] = []
+
+    def _attempt(limit: float | None):
+        try:
+            outcomes.put(_spawn(args, True, limit, started=pids))
+        except BaseException as exc:
+            outcomes.put(exc)
+
+    def _ok(outcome) -> bool:
+        return isinstance(outcome, subprocess.CompletedProcess) and outcome.returncode == 0
+
+    threading.Thread(target=_attempt, args=(timeout,), daemon=True).start()
+    try:
+        try:
+            outcome = outcomes.get(timeout=hedge_after)
+        except queue.Empty:
+            if VERBOSE:
+                print(f"[dim]Hedging after {hedge_after:.1f}s: {shlex.join(args)}[/dim]")
+            rest = None if timeout is None else timeout - hedge_after
+            threading.Thread(target=_attempt, args=(rest,), daemon=True).start()
+            outcome = outcomes.get()
+            if not _ok(outcome):
+                other = outcomes.get()
+                if _ok(other):
+                    outcome = other
+    finally:
+        for pid in pids:
+            _kill_group(pid)
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
+
+def _latency_label(args: list[str]) -> str:
+    """The call a gcloud command line stands for, e.g. "compute tpus tpu-vm describe"."""
+    words = []
+    for word in args[1:]:
+        if word == "alpha":
+            continue
+        if word.startswith("-") or len(words) == 4:
+            break
+        words.append(word)
+    return " ".join(words)
+
+
+def _quantile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _load_latency() -> dict[str, list[float]]:
+    """latency.json as recorded; missing, unreadable or torn reads as empty."""
+    try:
+        with open(LATENCY_FILE, "r") as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return history if isinstance(history, dict) else {}
+
 
+def _latency_samples(label: str) -> list[float]:
+    """Recorded latencies for one call: earlier runs' plus this run's."""
+    global _latency_history
+    with _latency_lock:
+        if _latency_history is None:
+            _latency_history = _load_latency()
+        return _latency_history.get(label, []) + _latency_new.get(label, [])
 
-def _run(cmd: str, timeout: int | None = None):
+
+def _record_latency(args: list[str], elapsed: float):
+    if not args or os.path.basename(args[0]) != "gcloud":
+        return
+    with _latency_lock:
+        _latency_new.setdefault(_latency_label(args), []).append(round(elapsed, 3))
+
+
+@atexit.register
+def _save_latency():
+    """Fold this run's samples into latency.json on exit.
+
+    The file is re-read and rewritten under its lock, so concurrent runs add
+    to each other's samples rather than overwrite them, and replaced whole so
+    a reader never sees it half-written.
+    """
+    with _latency_lock:
+        if not _latency_new:
+            return
+        with _file_lock(LATENCY_FILE + ".lock"):
+            merged = _load_latency()
+            for label, samples in _latency_new.items():
+                merged[label] = (merged.get(label, []) + samples)[-LATENCY_SAMPLES:]
+            partial = f"{LATENCY_FILE}.{os.getpid()}.tmp"
+            with open(partial, "w") as f:
+                json.dump(merged, f, indent=2)
+            os.replace(partial, LATENCY_FILE)
+        _latency_new.clear()
+
+
+def _run(cmd: str, timeout: float | None = None):
     """Run a command, streaming its output live, and raise on failure or timeout.
 
     Output is deliberately not captured: a remote apt waiting on the dpkg lock,
@@ -152,28 +625,40 @@ def _run(cmd: str, timeout: int | None = None):
     split_cmd = shlex.split(cmd)
     if split_cmd and split_cmd[0] == "gcloud":
         ensure_gcloud_authenticated()
+    limit = _call_timeout(timeout)
     try:
-        result = subprocess.run(split_cmd, text=True, timeout=timeout)
+        result = _spawn(split_cmd, capture=False, timeout=limit)
     except subprocess.TimeoutExpired:
-        raise RuntimeError(f"❌ Timed out after {timeout}s running: {cmd}") from None
+        raise _timed_out(cmd, limit) from None
     if result.returncode != 0:
         raise subprocess.CalledProcessError(result.returncode, split_cmd)
 
 
-def _gcloud_output(cmd: str) -> str:
+def _gcloud_output(cmd: str, timeout: float | None = None, hedge: bool = False) -> str:
     """Run a gcloud command whose parsed output we consume, returning only stdout.
 
     std/stderr are kept separate because every caller feeds the result to
     json.loads or strips quotes from it; a gcloud warning on stderr used to get
     concatenated in and silently break that parse. The nonzero status still
     surfaces through CalledProcessError, and stderr is echoed for the VERBOSE
-    case so a failure is still diagnosable.
+    case so a failure is still diagnosable. A timeout raises RuntimeError, the
+    same as _run. hedge is for idempotent reads only (see _spawn_hedged).
     """
     ensure_gcloud_authenticated()
-    result = subprocess.run(shlex.split(cmd), text=True, capture_output=True)
+    limit = _call_timeout(timeout)
+    args = shlex.split(cmd)
+    try:
+        result = _spawn_hedged(args, limit) if hedge else _spawn(args, True, limit)
+    except subprocess.TimeoutExpired:
+        raise _timed_out(cmd, limit) from None
     if result.returncode != 0:
         if VERBOSE:
             print(f"[bold red]gcloud stderr:[/bold red] {result.stderr.strip()}")
+        if _is_auth_error(result.stderr):
+            # The cached context said we were logged in; check live, which
+            # raises GcloudAuthError with the fix if that no longer holds.
+            _invalidate_context()
+            ensure_gcloud_authenticated()
         # Attach stderr so callers can tell a resource-not-found from a
         # transient API failure rather than re-running gcloud to find out.
         raise subprocess.CalledProcessError(
@@ -182,20 +667,612 @@ def _gcloud_output(cmd: str) -> str:
     return result.stdout
 
 
-def get_cache():
-    cache_path = CACHE_FILE
-    if not os.path.exists(cache_path):
+def _gcloud_read(cmd: str, timeout: float | None = None):
+    """Parse the JSON output of an idempotent gcloud read, hedged and never unbounded."""
+    return json.loads(_gcloud_output(cmd, timeout or GCLOUD_READ_TIMEOUT, hedge=True))
+
+
+async def _agcloud_output(cmd: str) -> str:
+    """asyncio twin of _gcloud_output: stdout only, the same errors on failure.
+
+    Same runner rules as _spawn: its own session, tracked for Ctrl-C, bounded
+    by the deadline, latency recorded. The whole group is also killed if the
+    awaiting task is cancelled (a per-call timeout, a won race), so an
+    abandoned call never outlives the race as an orphaned gcloud.
+    """
+    ensure_gcloud_authenticated()
+    if VERBOSE:
+        print(f"[bold blue]Running command:[/bold blue] {cmd}")
+    limit = _call_timeout(None)
+    args = shlex.split(cmd)
+    started_at = time.monotonic()
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    with _children_lock:
+        _children.add(proc.pid)
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), limit)
+    except asyncio.TimeoutError:
+        _kill_group(proc.pid)
+        await proc.wait()
+        _record_latency(args, time.monotonic() - started_at)
+        raise _timed_out(cmd, limit) from None
+    except asyncio.CancelledError:
+        _kill_group(proc.pid)
+        await proc.wait()
+        raise
+    finally:
+        with _children_lock:
+            _children.discard(proc.pid)
+    _record_latency(args, time.monotonic() - started_at)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, output=out.decode(), stderr=err.decode()
+        )
+    return out.decode()
+
+
+# ---------------------------------------------------------------------------
+# API backends
+# ---------------------------------------------------------------------------
+
+
+def _parse_duration(value: str) -> int:
+    """Turn a gcloud-style duration ("8h", "90m", "1h30m", "45s", "2d") into seconds."""
+    value = value.strip().lower()
+    if not re.fullmatch(r"(\d+[smhd])+", value):
+        raise ValueError(f"❌ Cannot parse duration {value!r}, expected e.g. 8h or 1h30m.")
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return sum(int(n) * units[u] for n, u in re.findall(r"(\d+)([smhd])", value))
+
+
+class GcloudBackend:
+    """Node and queued-resource calls as one gcloud subprocess each.
+
+    The default, and the fallback: it needs nothing but a logged-in gcloud.
+    Mutations stream gcloud's progress unless capture=True, which the
+    concurrent paths use so parallel calls don't interleave on the terminal.
+    """
+
+    def _mutate(self, cmd: str, capture: bool):
+        if capture:
+            _gcloud_output(cmd)
+        else:
+            _run(cmd)
+
+    def list_locations(self) -> list[dict]:
+        return _gcloud_read("gcloud compute tpus locations list --format=json")
+
+    def list_accelerator_types(self, zone: str) -> list[dict]:
+        return _gcloud_read(
+            f"gcloud compute tpus accelerator-types list --zone={zone} --format=json"
+        )
+
+    def list_nodes(self, zone: str, timeout: int | None = None) -> list[dict]:
+        return _gcloud_read(
+            f"gcloud compute tpus tpu-vm list --zone {zone} --format json", timeout
+        )
+
+    def describe_node(self, name: str, zone: str) -> dict:
+        return _gcloud_read(
+            f"gcloud compute tpus tpu-vm describe {name} --zone {zone}"
+            f" --format=json(state,networkEndpoints[].ipAddress,"
+            f"networkEndpoints[].accessConfig.externalIp)"
+        )
+
+    def create_node(
+        self, name: str, zone: str, accelerator_type: str, version: str, capture: bool = False
+    ):
+        self._mutate(
+            f"gcloud alpha compute tpus tpu-vm create {name} --zone {zone}"
+            f" --accelerator-type={accelerator_type} --version={version}",
+            capture,
+        )
+
+    def delete_node(self, name: str, zone: str, capture: bool = False):
+        # Without capture this is an interactive `rm`, so gcloud's own
+        # confirmation prompt is kept.
+        quiet = " --quiet" if capture else ""
+        self._mutate(f"gcloud compute tpus tpu-vm delete {name} --zone {zone}{quiet}", capture)
+
+    def start_node(self, name: str, zone: str, capture: bool = False):
+        self._mutate(f"gcloud compute tpus tpu-vm start {name} --zone {zone}", capture)
+
+    def stop_node(self, name: str, zone: str, capture: bool = False):
+        self._mutate(f"gcloud compute tpus tpu-vm stop {name} --zone {zone}", capture)
+
+    def submit_node_op(self, verb: str, name: str, zone: str) -> str:
+        """Send a start, stop or delete without waiting; return its operation's name."""
+        quiet = " --quiet" if verb == "delete" else ""
+        out = _gcloud_output(
+            f"gcloud compute tpus tpu-vm {verb} {name} --zone {zone} --async --format=json{quiet}"
+        )
+        return json.loads(out)["name"]
+
+    def submit_queued_delete(self, qr_id: str, zone: str) -> str:
+        """Force-delete a queued resource (and its node) without waiting; return its operation."""
+        out = _gcloud_output(f"{self._qr_delete_cmd(qr_id, zone, True)} --async --format=json")
+        return json.loads(out)["name"]
+
+    def poll_operations(self, zone: str, op_names: list[str]) -> dict[str, dict]:
+        """The current state of several of a zone's operations, in one call."""
+        ids = " ".join(op.rsplit("/", 1)[-1] for op in op_names)
+        ops = _gcloud_read(
+            f"gcloud compute tpus tpu-vm operations list --zone {zone}"
+            f" --filter='name:({ids})' --format=json"
+        )
+        return {op["name"]: op for op in ops if op["name"] in op_names}
+
+    def list_queued_resources(self, zone: str) -> list[dict]:
+        return _gcloud_read(self._qr_list_cmd(zone))
+
+    def describe_queued_resource(self, qr_id: str, zone: str) -> dict:
+        return _gcloud_read(
+            f"gcloud alpha compute tpus queued-resources describe"
+            f" {qr_id} --zone {zone} --format json"
+        )
+
+    def create_queued_resource(
+        self,
+        qr_id: str,
+        zone: str,
+        accelerator_type: str,
+        version: str,
+        max_run_duration: str,
+        capture: bool = False,
+    ):
+        self._mutate(
+            self._qr_create_cmd(qr_id, zone, accelerator_type, version, max_run_duration),
+            capture,
+        )
+
+    def delete_queued_resource(self, qr_id: str, zone: str, force: bool = False):
+        _run(self._qr_delete_cmd(qr_id, zone, force))
+
+    # asyncio variants, for the flex-race engine. Same commands, run as asyncio
+    # subprocesses so hundreds can be in flight without a thread each.
+
+    async def alist_queued_resources(self, zone: str) -> list[dict]:
+        return json.loads(await _agcloud_output(self._qr_list_cmd(zone)))
+
+    async def acreate_queued_resource(
+        self, qr_id: str, zone: str, accelerator_type: str, version: str, max_run_duration: str
+    ):
+        await _agcloud_output(
+            self._qr_create_cmd(qr_id, zone, accelerator_type, version, max_run_duration)
+        )
+
+    async def adelete_queued_resource(self, qr_id: str, zone: str, force: bool = False):
+        await _agcloud_output(self._qr_delete_cmd(qr_id, zone, force))
+
+    @staticmethod
+    def _qr_list_cmd(zone: str) -> str:
+        return f"gcloud alpha compute tpus queued-resources list --zone {zone} --format json"
+
+    @staticmethod
+    def _qr_create_cmd(
+        qr_id: str, zone: str, accelerator_type: str, version: str, max_run_duration: str
+    ) -> str:
+        return (
+            f"gcloud alpha compute tpus queued-resources create {qr_id}"
+            f" --zone={zone}"
+            f" --accelerator-type={accelerator_type}"
+            f" --runtime-version={version}"
+            f" --node-id={qr_id}"
+            f" --provisioning-model=flex-start"
+            f" --max-run-duration={max_run_duration}"
+        )
+
+    @staticmethod
+    def _qr_delete_cmd(qr_id: str, zone: str, force: bool) -> str:
+        force_flag = " --force" if force else ""
+        return (
+            f"gcloud alpha compute tpus queued-resources delete"
+            f" {qr_id} --zone {zone}{force_flag} --quiet"
+        )
+
+
+class TpuApiError(subprocess.CalledProcessError):
+    """A non-2xx answer from the TPU REST API.
+
+    Subclasses CalledProcessError, with the API's status and message in
+    stderr, so every caller that already tells NOT_FOUND / "already exists"
+    apart from a transient failure by reading gcloud's stderr handles the
+    REST backend unchanged.
+    """
+
+    def __init__(self, status: int, method: str, url: str, body: bytes):
+        try:
+            error = json.loads(body)["error"]
+            detail = f"({error.get('status', status)}) {error.get('message', '')}"
+        except (ValueError, KeyError, TypeError):
+            detail = f"({status}) {body[:200].decode(errors='replace')}"
+        super().__init__(status, f"{method} {url}", output="", stderr=f"ERROR: {detail}")
+
+
+class RestBackend:
+    """Node and queued-resource calls made directly against the TPU REST API.
+
+    Every gcloud call pays about a second of interpreter start-up before any
+    network I/O, which flex-race multiplies by every zone on every poll. This
+    backend keeps a pool of keep-alive connections and a single access token
+    for the whole process instead. The token still comes from gcloud, once,
+    and is refreshed API_TOKEN_MARGIN seconds before it expires (or on a 401).
+    """
+
+    def __init__(self, endpoint: str = TPU_API_ENDPOINT):
+        url = urllib.parse.urlsplit(endpoint)
+        self._scheme = url.scheme
+        self._host = url.netloc
+        self._prefix = url.path.rstrip("/")
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=16)
+        self._token: str | None = None
+        self._token_expiry = 0.0
+        self._token_lock = threading.Lock()
+        self._project: str | None = None
+
+    # -- plumbing -------------------------------------------------------------
+
+    def _access_token(self) -> str:
+        with self._token_lock:
+            if self._token and time.time() < self._token_expiry - API_TOKEN_MARGIN:
+                return self._token
+            static = os.getenv("GET_TPU_ACCESS_TOKEN")
+            if static:
+                self._token, self._token_expiry = static, float("inf")
+                return static
+            out = json.loads(_gcloud_output("gcloud auth print-access-token --format=json"))
+            self._token = out["token"]
+            expiry = out.get("token_expiry") or out.get("expiry")
+            if expiry:
+                ts = datetime.fromisoformat(expiry.replace("Z", "+00:00"))
+                if ts.tzinfo is None:
+                    ts = ts.replace(tzinfo=timezone.utc)
+                self._token_expiry = ts.timestamp()
+            else:
+                # gcloud may hand back a cached token partway through its life,
+                # so without an expiry assume the least we can be sure of.
+                self._token_expiry = time.time() + 2 * API_TOKEN_MARGIN
+            return self._token
+
+    def _connection(self, fresh: bool = False) -> http.client.HTTPConnection:
+        try:
+            if not fresh:
+                return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        if self._scheme == "http":
+            return http.client.HTTPConnection(self._host, timeout=API_TIMEOUT)
+        return http.client.HTTPSConnection(self._host, timeout=API_TIMEOUT)
+
+    def _release(self, conn: http.client.HTTPConnection):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: dict | None = None,
+        params: dict | None = None,
+        timeout: int | None = None,
+    ) -> dict:
+        url = f"{self._prefix}/{path}"
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        payload = json.dumps(body).encode() if body is not None else None
+        if VERBOSE:
+            print(f"[bold blue]API request:[/bold blue] {method} {url}")
+        for attempt in range(3):
+            headers = {"Authorization": f"Bearer {self._access_token()}"}
+            if payload is not None:
+                headers["Content-Type"] = "application/json"
+            # A mutation never rides a pooled connection the server may have
+            # dropped meanwhile, where its response could be lost after the
+            # request landed.
+            conn = self._connection(fresh=method not in API_IDEMPOTENT)
+            # The same deadline as the gcloud runner: no request outlives it.
+            conn.timeout = _call_timeout(timeout or API_TIMEOUT)
+            if conn.sock is not None:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+            except socket.timeout:
+                conn.close()
+                raise _timed_out(f"{method} {url}", conn.timeout) from None
+            except (http.client.HTTPException, OSError):
+                # Most likely a keep-alive connection the server already closed;
+                # the request never went out, so sending it again is safe.
+                conn.close()
+                if attempt == 2:
+                    raise
+                continue
+            try:
+                resp = conn.getresponse()
+                data = resp.read()
+            except socket.timeout:
+                conn.close()
+                raise _timed_out(f"{method} {url}", conn.timeout) from None
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if method in API_IDEMPOTENT and attempt < 2:
+                    continue
+                # A POST may have reached the server and only its answer been
+                # lost: sending it again could create a second node, or fail
+                # with ALREADY_EXISTS while the first one bills unseen.
+                raise RuntimeError(
+                    f"❌ Lost the response to {method} {url}; it may have gone through"
+                ) from None
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            if resp.status == 401 and attempt < 2:
+                with self._token_lock:
+                    self._token = None
+                continue
+            if resp.status >= 400:
+                raise TpuApiError(resp.status, method, url, data)
+            return json.loads(data) if data else {}
+        raise RuntimeError(f"❌ Gave up calling: {method} {url}")
+
+    def _project_id(self) -> str:
+        if self._project is None:
+            self._project = get_project()
+        return self._project
+
+    def _parent(self, zone: str) -> str:
+        return f"projects/{self._project_id()}/locations/{zone}"
+
+    def _list(self, path: str, key: str, timeout: int | None = None) -> list[dict]:
+        items, params = [], {}
+        while True:
+            page = self._request("GET", path, params=params, timeout=timeout)
+            items.extend(page.get(key, []))
+            if not page.get("nextPageToken"):
+                return items
+            params = {"pageToken": page["nextPageToken"]}
+
+    def _wait(self, operation: dict, version: str = "v2") -> dict:
+        """Poll a long-running operation until done; raise TpuApiError if it failed."""
+        while not operation.get("done"):
+            time.sleep(API_OPERATION_POLL)
+            operation = self._request("GET", f"{version}/{operation['name']}")
+        if "error" in operation:
+            error = operation["error"]
+            raise TpuApiError(
+                error.get("code", 500),
+                "OPERATION",
+                operation["name"],
+                json.dumps({"error": error}).encode(),
+            )
+        return operation
+
+    # -- backend interface ----------------------------------------------------
+
+    def list_locations(self) -> list[dict]:
+        return self._list(f"v2/projects/{self._project_id()}/locations", "locations")
+
+    def list_accelerator_types(self, zone: str) -> list[dict]:
+        return self._list(f"v2/{self._parent(zone)}/acceleratorTypes", "acceleratorTypes")
+
+    def list_nodes(self, zone: str, timeout: int | None = None) -> list[dict]:
+        return self._list(f"v2/{self._parent(zone)}/nodes", "nodes", timeout=timeout)
+
+    def describe_node(self, name: str, zone: str) -> dict:
+        return self._request(
+            "GET",
+            f"v2/{self._parent(zone)}/nodes/{name}",
+            params={"fields": "state,networkEndpoints(ipAddress,accessConfig(externalIp))"},
+        )
+
+    def create_node(
+        self, name: str, zone: str, accelerator_type: str, version: str, capture: bool = False
+    ):
+        body = {
+            "acceleratorType": accelerator_type,
+            "runtimeVersion": version,
+            # gcloud's default; the API's own default is internal IPs only.
+            "networkConfig": {"enableExternalIps": True},
+        }
+        op = self._request(
+            "POST", f"v2/{self._parent(zone)}/nodes", body=body, params={"nodeId": name}
+        )
+        self._wait(op)
+
+    def delete_node(self, name: str, zone: str, capture: bool = False):
+        self._wait(self._request("DELETE", f"v2/{self._parent(zone)}/nodes/{name}"))
+
+    def start_node(self, name: str, zone: str, capture: bool = False):
+        self._wait(self._request("POST", f"v2/{self._parent(zone)}/nodes/{name}:start", body={}))
+
+    def stop_node(self, name: str, zone: str, capture: bool = False):
+        self._wait(self._request("POST", f"v2/{self._parent(zone)}/nodes/{name}:stop", body={}))
+
+    def submit_node_op(self, verb: str, name: str, zone: str) -> str:
+        node = f"v2/{self._parent(zone)}/nodes/{name}"
+        if verb == "delete":
+            return self._request("DELETE", node)["name"]
+        return self._request("POST", f"{node}:{verb}", body={})["name"]
+
+    def submit_queued_delete(self, qr_id: str, zone: str) -> str:
+        return self._request(
+            "DELETE",
+            f"v2alpha1/{self._parent(zone)}/queuedResources/{qr_id}",
+            params={"force": "true"},
+        )["name"]
+
+    def poll_operations(self, zone: str, op_names: list[str]) -> dict[str, dict]:
+        # Each GET rides the pooled keep-alive connections, so there is no
+        # process to save by listing the zone's whole operation history.
+        return {op: self._request("GET", f"v2/{op}") for op in op_names}
+
+    def list_queued_resources(self, zone: str) -> list[dict]:
+        return self._list(f"v2alpha1/{self._parent(zone)}/queuedResources", "queuedResources")
+
+    def describe_queued_resource(self, qr_id: str, zone: str) -> dict:
+        return self._request("GET", f"v2alpha1/{self._parent(zone)}/queuedResources/{qr_id}")
+
+    def create_queued_resource(
+        self,
+        qr_id: str,
+        zone: str,
+        accelerator_type: str,
+        version: str,
+        max_run_duration: str,
+        capture: bool = False,
+    ):
+        parent = self._parent(zone)
+        body = {
+            "tpu": {
+                "nodeSpec": [
+                    {
+                        "parent": parent,
+                        "nodeId": qr_id,
+                        "node": {
+                            "acceleratorType": accelerator_type,
+                            "runtimeVersion": version,
+                            "networkConfig": {"enableExternalIps": True},
+                        },
+                    }
+                ]
+            },
+            "provisioningModel": "FLEX_START",
+            "runDuration": {"maxRunDuration": f"{_parse_duration(max_run_duration)}s"},
+        }
+        # Like gcloud, return once the request is accepted; it then sits in
+        # WAITING_FOR_RESOURCES, which is what the callers poll for.
+        self._request(
+            "POST",
+            f"v2alpha1/{parent}/queuedResources",
+            body=body,
+            params={"queuedResourceId": qr_id},
+        )
+
+    def delete_queued_resource(self, qr_id: str, zone: str, force: bool = False):
+        params = {"force": "true"} if force else None
+        op = self._request(
+            "DELETE",
+            f"v2alpha1/{self._parent(zone)}/queuedResources/{qr_id}",
+            params=params,
+        )
+        self._wait(op, version="v2alpha1")
+
+    # asyncio variants, for the flex-race engine. http.client blocks, so these
+    # run on worker threads; the engine's semaphore bounds how many at once.
+
+    async def alist_queued_resources(self, zone: str) -> list[dict]:
+        return await asyncio.to_thread(self.list_queued_resources, zone)
+
+    async def acreate_queued_resource(
+        self, qr_id: str, zone: str, accelerator_type: str, version: str, max_run_duration: str
+    ):
+        await asyncio.to_thread(
+            self.create_queued_resource, qr_id, zone, accelerator_type, version, max_run_duration
+        )
+
+    async def adelete_queued_resource(self, qr_id: str, zone: str, force: bool = False):
+        await asyncio.to_thread(self.delete_queued_resource, qr_id, zone, force)
+
+
+_backend_instance: GcloudBackend | RestBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _backend() -> GcloudBackend | RestBackend:
+    """The process-wide API backend selected by GET_TPU_BACKEND."""
+    global _backend_instance
+    with _backend_lock:
+        if _backend_instance is None:
+            if BACKEND == "rest":
+                _backend_instance = RestBackend()
+            elif BACKEND == "gcloud":
+                _backend_instance = GcloudBackend()
+            else:
+                raise ValueError(
+                    f"❌ Unknown GET_TPU_BACKEND {BACKEND!r}, expected gcloud or rest."
+                )
+        return _backend_instance
+
+
+def _read_cache() -> dict:
+    if not os.path.exists(CACHE_FILE):
         return {}
-    with open(cache_path, "r") as f:
+    with open(CACHE_FILE, "r") as f:
         return json.load(f, object_pairs_hook=OrderedDict)
 
 
-def save_cache(cache: dict):
-    """Persist the cache, creating ~/.get-tpu if it does not exist."""
-    if not os.access(CONFIG_DIR, os.F_OK):
-        os.makedirs(CONFIG_DIR)
-    with open(CACHE_FILE, "w") as f:
+class _Cache(OrderedDict):
+    """The cache as get_cache read it, remembering what was read as `base`.
+
+    The base belongs to this dict, not to the process: a helper that reads the
+    cache again mid-command must not move the merge base of a dict its caller
+    read earlier and is about to save.
+    """
+
+    base: dict[str, dict]
+
+
+def _write_cache(cache: dict):
+    partial = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    with open(partial, "w") as f:
         json.dump(cache, f, indent=2)
+    os.replace(partial, CACHE_FILE)
+
+
+def get_cache() -> _Cache:
+    cache = _Cache(_read_cache())
+    cache.base = {name: dict(entry) for name, entry in cache.items()}
+    return cache
+
+
+def save_cache(cache: dict):
+    """Persist the cache, creating ~/.get-tpu if it does not exist.
+
+    Another get-tpu process (a background pool refill, say) may have written
+    the file since cache was read. The save is a three-way merge against what
+    get_cache returned: entries added, changed or deleted in cache since then
+    win, every other entry is taken from the file as it is now. cache is
+    updated in place to the merged result, which becomes its new base.
+    """
+    base = getattr(cache, "base", {})
+    with _file_lock(CACHE_LOCK):
+        disk = _read_cache()
+        merged = OrderedDict()
+        for name, entry in cache.items():
+            if base.get(name) != entry:
+                merged[name] = entry
+            elif name in disk:
+                merged[name] = disk[name]
+        for name, entry in disk.items():
+            if name not in merged and name not in base:
+                merged[name] = entry
+        _write_cache(merged)
+    cache.clear()
+    cache.update(merged)
+    if isinstance(cache, _Cache):
+        cache.base = {name: dict(entry) for name, entry in merged.items()}
+
+
+def update_cache(fn):
+    """Apply fn to the cache as it is on disk now and save the result, atomically.
+
+    fn runs under CACHE_LOCK on a fresh read, so no other process can change
+    the cache in between; it edits the dict in place and its return value is
+    passed back. For short read-modify-write steps, such as pool state changes
+    and claims, where a merge against an earlier read is not enough.
+    """
+    with _file_lock(CACHE_LOCK):
+        cache = _read_cache()
+        result = fn(cache)
+        _write_cache(cache)
+    return result
 
 
 def _zone_sort_key(zone: str) -> tuple[int, str]:
@@ -207,60 +1284,152 @@ def _zone_sort_key(zone: str) -> tuple[int, str]:
     return (2, zone)
 
 
-def discover_zones(accelerator_type: str) -> list[str]:
-    """Sweep every GCP zone and return the ones that offer accelerator_type.
+def _load_zone_index() -> dict:
+    """Read zones-cache.json: {"zones": {zone: {"types": [...], "checked_at": ts}}}.
 
-    Runs `gcloud compute tpus locations list` once, then fans out 16 parallel
-    `accelerator-types list` calls. The result is merged into zones-cache.json
-    under the accelerator-type key so refreshing one type never wipes another.
+    The file used to map one accelerator type to its zones. That layout is
+    dropped rather than migrated: it recorded nothing about the other types,
+    so the first sweep has to happen either way.
     """
-    out = _gcloud_output("gcloud compute tpus locations list --format=json")
-    all_zones = sorted(
-        (loc["locationId"] for loc in json.loads(out)), key=_zone_sort_key
-    )
-
-    def _offers(zone: str) -> str | None:
-        try:
-            out = _gcloud_output(
-                f"gcloud compute tpus accelerator-types list"
-                f" --zone={zone} --format=json"
-            )
-            types = {t["type"] for t in json.loads(out)}
-            return zone if accelerator_type in types else None
-        except Exception:
-            return None
-
-    found = []
-    with ThreadPoolExecutor(max_workers=16) as pool:
-        for result in pool.map(_offers, all_zones):
-            if result is not None:
-                found.append(result)
-
-    zones_cache = {}
     if os.path.exists(ZONES_CACHE_FILE):
         with open(ZONES_CACHE_FILE, "r") as f:
-            zones_cache = json.load(f)
-    zones_cache[accelerator_type] = found
+            index = json.load(f)
+        if index.get("version") == ZONE_INDEX_VERSION:
+            return index
+    return {"version": ZONE_INDEX_VERSION, "zones": {}}
+
+
+def _save_zone_index(index: dict):
     if not os.access(CONFIG_DIR, os.F_OK):
         os.makedirs(CONFIG_DIR)
     with open(ZONES_CACHE_FILE, "w") as f:
-        json.dump(zones_cache, f, indent=2)
+        json.dump(index, f, indent=2)
+
+
+def _sweep_zone_index(zones: list[str] | None = None):
+    """Re-read the accelerator types offered in zones (default: every zone), yielding as they answer.
+
+    One `accelerator-types list` per zone records every type the zone offers,
+    so a single sweep answers v5e as well as v6e. Yields (zone, types) in
+    completion order, types being None for a zone whose call failed: that
+    zone keeps its previous entry and timestamp, so it is retried the next
+    time it goes stale. A full sweep also drops zones GCP no longer lists.
+    The index is written once the sweep ends, even if the consumer stops early.
+    """
+    removed: set[str] = set()
+    if zones is None:
+        zones = [loc["locationId"] for loc in _backend().list_locations()]
+        removed = set(_load_zone_index()["zones"]) - set(zones)
+    answered: dict[str, list[str]] = {}
+
+    def _types(zone: str) -> tuple[str, list[str] | None]:
+        try:
+            return zone, sorted({t["type"] for t in _backend().list_accelerator_types(zone)})
+        except Exception:
+            return zone, None
 
-    return found
+    pool = ThreadPoolExecutor(max_workers=16)
+    try:
+        for future in as_completed([pool.submit(_types, zone) for zone in zones]):
+            zone, types = future.result()
+            if types is not None:
+                answered[zone] = types
+            yield zone, types
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        with _zone_index_lock:
+            index = _load_zone_index()
+            for zone in removed:
+                index["zones"].pop(zone, None)
+            for zone, types in answered.items():
+                index["zones"][zone] = {"types": types, "checked_at": time.time()}
+            _save_zone_index(index)
+
+
+def refresh_zone_index(zones: list[str] | None = None) -> dict:
+    """Run a whole _sweep_zone_index and return the updated index."""
+    for _ in _sweep_zone_index(zones):
+        pass
+    return _load_zone_index()
+
+
+def iter_zones_offering(accelerator_type: str):
+    """Sweep every zone, yielding each one that offers accelerator_type as soon as it answers."""
+    for zone, types in _sweep_zone_index():
+        if types and accelerator_type in types:
+            yield zone
+
+
+def _zones_offering(index: dict, accelerator_type: str) -> list[str]:
+    return sorted(
+        (z for z, entry in index["zones"].items() if accelerator_type in entry["types"]),
+        key=_zone_sort_key,
+    )
+
+
+def discover_zones(accelerator_type: str) -> list[str]:
+    """Sweep every GCP zone and return the ones that offer accelerator_type."""
+    return _zones_offering(refresh_zone_index(), accelerator_type)
 
 
 def get_zones(accelerator_type: str, rediscover: bool = False) -> list[str]:
-    """Return the cached zone list for accelerator_type, sweeping only when needed.
+    """Return the zones offering accelerator_type, answered from the zone index.
 
-    A missing entry triggers discovery on its own; the flag is only needed to
-    refresh a type that's already cached.
+    Only zones whose entry is older than ZONE_INDEX_TTL are re-checked, so
+    asking about a new type costs no gcloud call at all once any sweep has
+    run. An empty index or rediscover triggers a full sweep.
     """
-    if os.path.exists(ZONES_CACHE_FILE) and not rediscover:
-        with open(ZONES_CACHE_FILE, "r") as f:
-            zones_cache = json.load(f)
-        if accelerator_type in zones_cache:
-            return zones_cache[accelerator_type]
-    return discover_zones(accelerator_type)
+    index = _load_zone_index()
+    if rediscover or not index["zones"]:
+        return discover_zones(accelerator_type)
+    stale = [
+        zone
+        for zone, entry in index["zones"].items()
+        if time.time() - entry["checked_at"] > ZONE_INDEX_TTL
+    ]
+    if stale:
+        index = refresh_zone_index(stale)
+    return _zones_offering(index, accelerator_type)
+
+
+def evict_zone_type(zone: str, accelerator_type: str):
+    """Drop accelerator_type from zone's index entry after GCP refused it there.
+
+    The index can be up to ZONE_INDEX_TTL old. A "not offered" answer from a
+    create or flex submit is fresher than that, so it wins until the zone's
+    next refresh.
+    """
+    with _zone_index_lock:
+        index = _load_zone_index()
+        entry = index["zones"].get(zone)
+        if entry and accelerator_type in entry["types"]:
+            entry["types"].remove(accelerator_type)
+            _save_zone_index(index)
+
+
+def _is_not_offered(reason: str) -> bool:
+    """True if a create/submit error says the zone does not offer the type at all.
+
+    Kept apart from stock-outs: no capacity today is worth retrying, a type the
+    zone does not carry is not.
+    """
+    reason = reason.lower()
+    return any(
+        marker in reason
+        for marker in (
+            "not offered",
+            "not available in zone",
+            "not supported in zone",
+            "accelerator type not found",
+        )
+    ) or ("acceleratortype" in reason and "not found" in reason)
+
+
+def _print_zones(accelerator_type: str, zones: list[str], index: dict):
+    print(f"✅ {len(zones)} zones offer {accelerator_type}:")
+    for z in zones:
+        checked = datetime.fromtimestamp(index["zones"][z]["checked_at"])
+        print(f"  {z}  [dim](checked {checked.strftime('%Y-%m-%d %H:%M')})[/dim]")
 
 
 @app.command("discover-zones")
@@ -268,31 +1437,23 @@ def discover_zones_cmd(
     accelerator_type: str = DEFAULT_ACCELERATOR,
     force: bool = False,
 ):
-    """Discover which GCP zones offer a given accelerator type, caching the result."""
-    if force:
-        print(f"🔄 Force-refreshing zone cache for [bold]{accelerator_type}[/bold]...")
-        zones = discover_zones(accelerator_type)
-        print(f"✅ Found {len(zones)} zones offering {accelerator_type}:")
-        for z in zones:
-            print(f"  {z}")
-        return
-
-    if os.path.exists(ZONES_CACHE_FILE):
-        with open(ZONES_CACHE_FILE, "r") as f:
-            zones_cache = json.load(f)
-        if accelerator_type in zones_cache:
-            zones = zones_cache[accelerator_type]
-            print(f"📋 {accelerator_type} zones (from cache):")
-            for z in zones:
-                print(f"  {z}")
-            print(f"\nRun with --force to refresh.")
-            return
+    """Show which GCP zones offer a given accelerator type, from the zone index.
 
-    print(f"🔍 Discovering zones offering [bold]{accelerator_type}[/bold]...")
-    zones = discover_zones(accelerator_type)
-    print(f"✅ Found {len(zones)} zones offering {accelerator_type}:")
-    for z in zones:
-        print(f"  {z}")
+    The index records every type each zone offers, refreshing zones older than
+    a week on its own. Use --force to re-sweep every zone now.
+    """
+    if force:
+        print("🔄 Re-sweeping every zone...")
+        index = refresh_zone_index()
+    else:
+        index = _load_zone_index()
+        if not index["zones"]:
+            print("🔍 No zone index yet, sweeping every zone...")
+        get_zones(accelerator_type)
+        index = _load_zone_index()
+    _print_zones(accelerator_type, _zones_offering(index, accelerator_type), index)
+    if not force:
+        print("\nRun with --force to refresh.")
 
 
 def _create_config_interactively() -> Config:
@@ -345,47 +1506,148 @@ def _create_config_interactively() -> Config:
 
 
 def get_config():
-    config = Config()
-    config_path = CONFIG_FILE
+    """Load config.json, parsing it once per process unless the file changes."""
+    global _config_memo
     try:
-        with open(config_path, "r") as f:
+        mtime = os.path.getmtime(CONFIG_FILE)
+    except FileNotFoundError:
+        return _create_config_interactively()
+    if _config_memo is None or _config_memo[0] != mtime:
+        config = Config()
+        with open(CONFIG_FILE, "r") as f:
             data = json.load(f)
             for key in data:
                 setattr(config, key, data[key])
-    except FileNotFoundError:
-        config = _create_config_interactively()
-    return config
+        _config_memo = (mtime, config)
+    return dataclasses.replace(_config_memo[1])
 
 
 def get_project():
-    value = _gcloud_output("gcloud config get-value project --format=json")
-    return value.replace('"', "").strip()
+    # gcloud gives CLOUDSDK_CORE_PROJECT precedence over its config anyway;
+    # reading it first saves the call, and lets the REST backend run against a
+    # stub with no gcloud at all.
+    if os.getenv("CLOUDSDK_CORE_PROJECT"):
+        return os.environ["CLOUDSDK_CORE_PROJECT"]
+    with _context_lock:
+        project = _load_context().get("project")
+        if project:
+            return project
+        value = _gcloud_output("gcloud config get-value project --format=json")
+        project = value.replace('"', "").strip()
+        _save_context(project=project)
+        return project
+
+
+def invalidate_zone(zone: str):
+    """Forget every snapshot and describe taken in zone.
+
+    Called after anything that changes a node there (start/stop/create/delete),
+    so the next lookup sees the new state instead of a pre-change snapshot.
+    """
+    with _snapshot_lock:
+        _zone_snapshots.pop(zone, None)
+        for key in [k for k in _node_details if k[1] == zone]:
+            del _node_details[key]
 
 
-def list_tpus(zone: str):
-    desc = _gcloud_output(
-        f"gcloud compute tpus tpu-vm list --zone {zone} --format json"
-    )
-    # convert to json
-    desc = json.loads(desc)
-    return desc
+def list_tpus(
+    zone: str, fresh: bool = False, timeout: int | None = None
+) -> list[dict]:
+    """Return every node in zone, reusing a snapshot younger than ZONE_SNAPSHOT_TTL.
+
+    One `tpu-vm list` per zone answers every lookup in that zone for the rest
+    of the command, which is what keeps `ls --details` at one gcloud call per
+    zone rather than two per cached node.
+    """
+    if not fresh:
+        with _snapshot_lock:
+            snapshot = _zone_snapshots.get(zone)
+        if snapshot and time.time() - snapshot[0] < ZONE_SNAPSHOT_TTL:
+            return snapshot[1]
+    desc = _backend().list_nodes(zone, timeout=timeout)
+    with _snapshot_lock:
+        _zone_snapshots[zone] = (time.time(), desc)
+    return desc
+
+
+def _node_id(node: dict) -> str:
+    """The short node id out of GCP's projects/.../locations/.../nodes/<id> name."""
+    return node["name"].rsplit("/", 1)[-1]
+
+
+def _node_summary(node: dict) -> dict:
+    """Reduce a node resource to the fields lookups need: state and its workers' IPs.
+
+    externalIp is worker 0's, the only one a single-host TPU has;
+    externalIps and internalIps list every worker of a slice, in worker order.
+    """
+    endpoints = node.get("networkEndpoints") or [{}]
+    external = [(e.get("accessConfig") or {}).get("externalIp") for e in endpoints]
+    return {
+        "state": node.get("state", "UNKNOWN"),
+        "externalIp": external[0],
+        "externalIps": external,
+        "internalIps": [e.get("ipAddress") for e in endpoints],
+    }
+
+
+_NOT_FOUND = {"state": "NOT FOUND", "externalIp": None, "externalIps": [], "internalIps": []}
 
 
-def get_ext_ip(name: str, zone: str):
-    desc = list_tpus(zone)
-    filtered_desc = [item for item in desc if item["name"].endswith(name)]
-    cur_tpu = filtered_desc[0]
-    external_ip = cur_tpu["networkEndpoints"][0]["accessConfig"]["externalIp"]  # type: ignore
-    return external_ip
+def describe_tpu(name: str, zone: str, fresh: bool = False) -> dict:
+    """Return _node_summary for one node; state is NOT FOUND if GCP has none.
 
+    A live zone snapshot answers for free. Otherwise a targeted describe asks
+    for just those two fields, which is cheaper than listing the whole zone
+    when only one node is of interest.
+    """
+    if not fresh:
+        now = time.time()
+        with _snapshot_lock:
+            snapshot = _zone_snapshots.get(zone)
+            detail = _node_details.get((name, zone))
+        if snapshot and now - snapshot[0] < ZONE_SNAPSHOT_TTL:
+            for node in snapshot[1]:
+                if _node_id(node) == name:
+                    return _node_summary(node)
+            return dict(_NOT_FOUND)
+        if detail and now - detail[0] < ZONE_SNAPSHOT_TTL:
+            return detail[1]
+    try:
+        info = _node_summary(_backend().describe_node(name, zone))
+    except subprocess.CalledProcessError as exc:
+        stderr = (exc.stderr or "").lower()
+        if "not_found" not in stderr and "not found" not in stderr:
+            raise
+        info = dict(_NOT_FOUND)
+    with _snapshot_lock:
+        _node_details[(name, zone)] = (time.time(), info)
+    return info
 
-def get_state(name: str, zone: str):
-    desc = list_tpus(zone)
-    filtered_desc = [item for item in desc if item["name"].endswith(name)]
-    if not filtered_desc:
-        return "NOT FOUND"
-    state = filtered_desc[0]["state"]
-    return state
+
+def get_ext_ip(name: str, zone: str, fresh: bool = False) -> str:
+    info = describe_tpu(name, zone, fresh=fresh)
+    if not info["externalIp"]:
+        raise RuntimeError(f"❌ {name} has no external IP (state: {info['state']}).")
+    return info["externalIp"]
+
+
+def get_ext_ips(name: str, zone: str, fresh: bool = False) -> list[str]:
+    """External IPs of every worker of the node, worker 0 first."""
+    info = describe_tpu(name, zone, fresh=fresh)
+    ips = info["externalIps"]
+    if not ips or not all(ips):
+        raise RuntimeError(f"❌ {name} has workers without an external IP (state: {info['state']}).")
+    return ips
+
+
+def _worker_alias(name: str, worker: int) -> str:
+    """ssh alias of one worker: the node's own name for worker 0, name-wN for the rest."""
+    return name if worker == 0 else f"{name}-w{worker}"
+
+
+def get_state(name: str, zone: str, fresh: bool = False) -> str:
+    return describe_tpu(name, zone, fresh=fresh)["state"]
 
 
 def wait_for_ssh(
@@ -403,40 +1665,47 @@ def wait_for_ssh(
 
     A node that has been up for hours can also stop answering here. We wait out
     the short version and give up on the rest (see _retry_transient).
+
+    On a multi-host slice every worker has to answer, not just worker 0.
     """
     deadline = time.time() + timeout
     next_notice = time.time() + 60
-    ext_ip = None
+    ext_ips = None
+    waiting: list[str] = []
     while time.time() < deadline:
-        if ext_ip is None:
+        _note_attempt("wait_ssh")
+        if ext_ips is None:
             try:
-                ext_ip = get_ext_ip(name, zone)
-                print(f"⏳ Waiting for SSH to become reachable on {ext_ip}:22...")
+                ext_ips = get_ext_ips(name, zone, fresh=True)
+                waiting = list(ext_ips)
+                print(f"⏳ Waiting for SSH to become reachable on {', '.join(ext_ips)}:22...")
             except Exception:
                 # Not materialised / no external IP assigned yet — keep waiting.
-                ext_ip = None
-        if ext_ip is not None:
+                ext_ips = None
+        for ext_ip in list(waiting):
             try:
                 with socket.create_connection((ext_ip, 22), timeout=5):
-                    print("✅ SSH port is open.")
-                    return
+                    waiting.remove(ext_ip)
             except OSError:
                 pass
+        if ext_ips is not None and not waiting:
+            print("✅ SSH port is open.")
+            return
         if time.time() >= next_notice:
-            target = f"{ext_ip}:22" if ext_ip else f"{name} (no external IP yet)"
+            target = f"{', '.join(waiting)}:22" if ext_ips else f"{name} (no external IP yet)"
             print(
                 f"   still no answer on {target},"
                 f" {int(deadline - time.time())}s of patience left..."
             )
             next_notice = time.time() + 60
         time.sleep(interval)
-    if ext_ip is None:
+    if ext_ips is None:
         raise RuntimeError(
             f"❌ {name} got no external IP within {timeout}s."
             f" Check the node's state before retrying."
         )
     raise RuntimeError(
-        f"❌ No answer on {ext_ip}:22 after {timeout}s. The node reports ready but is"
+        f"❌ No answer on {', '.join(waiting)}:22 after {timeout}s. The node reports ready but is"
         f" not accepting SSH — check its state before retrying."
     )
 
@@ -447,6 +1716,7 @@ def wait_for_ssh_auth(
     project: str,
     budget: int = UNREACHABLE_BUDGET,
     interval: int = 10,
+    worker: int = 0,
 ):
     """Confirm a real SSH session can be opened, not just that port 22 answers.
 
@@ -454,31 +1724,51 @@ def wait_for_ssh_auth(
     Failing here explicitly beats handing the problem to gcloud, which retries
     10x5s internally and reports nothing useful. Bounded by the same budget as
     every other reachability wait, so the whole phase cannot outlive it.
+
+    The check runs over plain ssh through the alias, so a success leaves the
+    master connection every later step reuses. Plain ssh only works once
+    gcloud has pushed its key to the node, so the first failure runs one
+    `gcloud ... ssh` to do that; on a reinstall the key is already there and
+    gcloud is never started.
+
+    worker picks which worker of a slice to check, through its own alias.
     """
+    alias = _worker_alias(name, worker)
     deadline = time.time() + budget
     attempt = 0
+    pushed = False
     while True:
         attempt += 1
+        _note_attempt("ssh_auth")
         remaining = int(deadline - time.time())
         try:
-            _run(
-                _ssh_command(name, zone, project, "true"),
-                timeout=max(1, min(60, remaining)),
-            )
+            _run(_ssh_command(alias, "true"), timeout=max(1, min(60, remaining)))
             print("✅ SSH authentication works.")
             return
         except (subprocess.CalledProcessError, RuntimeError):
-            if time.time() + interval >= deadline:
-                raise RuntimeError(
-                    f"❌ Gave up on: opening an SSH session to {name}.\n"
-                    f"   Failed {attempt}x over {budget}s. Either the pushed key is"
-                    f" not propagated or the node is not reachable from here."
-                ) from None
-            print(
-                f"⏳ SSH not usable yet (attempt {attempt}), retrying in {interval}s"
-                f" ({remaining}s left before giving up)..."
+            pass
+        if not pushed:
+            print("🔑 Pushing the ssh key with gcloud...")
+            try:
+                _run(
+                    _gcloud_ssh_command(name, zone, project, "true", worker=worker),
+                    timeout=max(1, min(120, int(deadline - time.time()))),
+                )
+                pushed = True
+                continue
+            except (subprocess.CalledProcessError, RuntimeError):
+                pass
+        if time.time() + interval >= deadline:
+            raise RuntimeError(
+                f"❌ Gave up on: opening an SSH session to {alias}.\n"
+                f"   Failed {attempt}x over {budget}s. Either the pushed key is"
+                f" not propagated or the node is not reachable from here."
             )
-            time.sleep(interval)
+        print(
+            f"⏳ SSH not usable yet (attempt {attempt}), retrying in {interval}s"
+            f" ({remaining}s left before giving up)..."
+        )
+        time.sleep(interval)
 
 
 def _retry_transient(label: str, budget: int, fn):
@@ -514,10 +1804,53 @@ def _retry_transient(label: str, budget: int, fn):
             time.sleep(backoff)
 
 
-def _ssh_command(name: str, zone: str, project: str, remote_cmd: str) -> str:
-    """Build a gcloud tpu-vm ssh invocation running remote_cmd."""
+def _ssh_options() -> str:
+    """The -o options every plain ssh/scp to a node shares, master connection included."""
+    if not os.access(SSH_CONTROL_DIR, os.F_OK):
+        os.makedirs(SSH_CONTROL_DIR, mode=0o700)
+    options = [
+        "ControlMaster=auto",
+        f"ControlPath={SSH_CONTROL_DIR}/%C",
+        f"ControlPersist={SSH_CONTROL_PERSIST}",
+        # Fail instead of prompting: nobody is there to answer mid-install.
+        "BatchMode=yes",
+        # cleanup_known_hosts has already dropped the keys of a previous node
+        # on this IP, so a key we have not seen is a new node, not an attack.
+        "StrictHostKeyChecking=accept-new",
+        "ConnectTimeout=10",
+        "ServerAliveInterval=15",
+        "ServerAliveCountMax=4",
+    ]
+    if not get_config().ssh_identity_file:
+        options.append(f"IdentityFile={GCLOUD_SSH_KEY}")
+    return " ".join(f"-o {option}" for option in options)
+
+
+def _ssh_command(name: str, remote_cmd: str) -> str:
+    """Build a plain ssh invocation of remote_cmd on the node's alias, via its master.
+
+    A dead master needs no handling here: with ControlMaster=auto, ssh drops a
+    stale socket and the next command simply becomes the new master.
+    """
+    return f"ssh {_ssh_options()} {name} {shlex.quote(remote_cmd)}"
+
+
+def _scp_command(src: str, name: str, dest: str) -> str:
+    """Build a plain scp of src to dest on the node, via its master."""
+    return f"scp {_ssh_options()} {src} {name}:{dest}"
+
+
+def _gcloud_ssh_command(
+    name: str, zone: str, project: str, remote_cmd: str, worker: int = 0
+) -> str:
+    """Build a gcloud tpu-vm ssh invocation running remote_cmd.
+
+    Only used to get gcloud's key onto the node; everything else goes through
+    _ssh_command.
+    """
     return (
         f"gcloud compute tpus tpu-vm ssh --zone {zone} {name} --project {project}"
+        f" --worker={worker}"
         f" --ssh-flag=-o --ssh-flag=ConnectTimeout=10"
         f" --ssh-flag=-o --ssh-flag=ServerAliveInterval=15"
         f" --ssh-flag=-o --ssh-flag=ServerAliveCountMax=4"
@@ -527,12 +1860,11 @@ def _ssh_command(name: str, zone: str, project: str, remote_cmd: str) -> str:
 
 def remote_run_logged(
     name: str,
-    zone: str,
-    project: str,
     script: str,
     log: str = REMOTE_LOG,
     timeout: int = REMOTE_INSTALL_TIMEOUT,
     prepare: str = "",
+    prefix: str = "",
 ):
     """Run a script on the TPU detached from the SSH channel, following its log.
 
@@ -540,8 +1872,12 @@ def remote_run_logged(
     ssh channel, so anything that dropped that channel — an sshd restart from
     unattended-upgrades, a laptop sleep, a flaky link — killed the install with
     no log left behind. Here the script is launched under setsid/nohup writing to
-    ~/{log}, and a second session merely tails it. Losing the tail costs nothing:
-    we reattach at the line we got to, and the install keeps going regardless.
+    ~/{log}, and a second session merely follows it. Losing that session costs
+    nothing: we reattach at the byte we got to, and the install keeps going
+    regardless.
+
+    With a prefix, the log is printed a whole line at a time, each line
+    prefixed, so several workers' logs can share the terminal.
     """
     rc_file = f"{log}.rc"
     pid_file = f"{log}.pid"
@@ -563,64 +1899,106 @@ def remote_run_logged(
     _retry_transient(
         f"launching {script} on {name}",
         UNREACHABLE_BUDGET,
-        lambda left: _run(_ssh_command(name, zone, project, launch), timeout=left),
+        lambda left: _run(_ssh_command(name, launch), timeout=left),
     )
 
-    # Log lines are tagged remotely so gcloud's own chatter on stderr cannot be
-    # mistaken for install output and throw off the resume offset.
-    offset = 1
+    # The follower tracks a byte offset into the log: each wake-up stats the
+    # file and ships only the bytes past the offset (tail -c +N seeks, so the
+    # cost is the new output, not the log size), framed as LOG_TAG<n> + n raw
+    # bytes so the local side knows exactly how far it has got. It wakes on
+    # inotify where inotifywait is installed and polls every
+    # FOLLOW_POLL_WAIT otherwise. The rc file is checked before the final
+    # stat, so every byte written before the script exited is shipped first.
+    #
+    # Everything runs in the foreground and the loop ends once the rc file
+    # exists, so the session always reaches EOF on its own. A backgrounded
+    # `tail -F` kept the pipe open after its watcher was killed and blocked
+    # the local read indefinitely.
+    offset = 0
     attempt = 0
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    pending = ""
     deadline = time.time() + timeout
     while time.time() < deadline:
-        # Each session is capped so control always comes back here to re-check the
-        # deadline; an uncapped follower would be its own silent hang. It signals
-        # why it ended: ROT_TAG for hitting the cap (reattach quietly), RC_TAG for
-        # the script finishing, neither for a dropped channel.
-        #
-        # A polling tailer rather than `tail -F`: every command runs in the
-        # foreground and the loop is bounded, so the session always reaches EOF on
-        # its own. A backgrounded `tail -F` kept the pipe open after its watcher
-        # was killed and blocked the local read indefinitely.
         follow = (
-            f"cd ~; n={offset}; i=0;"
+            f"cd ~; o={offset}; d=;"
+            f" command -v inotifywait >/dev/null 2>&1 && w=1 || w=;"
             f" while :; do"
-            f" t=$(wc -l <{log} 2>/dev/null | tr -d ' ' || echo 0);"
-            f' if [ "$t" -ge "$n" ]; then'
-            f" tail -n +$n {log} | sed 's/^/{LOG_TAG}/'; n=$((t+1)); fi;"
-            f" if [ -f {rc_file} ]; then break; fi;"
-            f" i=$((i+1));"
-            f" if [ $i -ge {FOLLOW_SESSION_TICKS} ]; then echo {ROT_TAG}; break; fi;"
-            f" sleep 2; done;"
-            f" [ -f {rc_file} ] && printf '{RC_TAG}%s\\n' \"$(cat {rc_file})\"; true"
+            f" [ -f {rc_file} ] && d=1;"
+            f" s=$(stat -c %s {log} 2>/dev/null || echo 0);"
+            f' if [ "$s" -gt "$o" ]; then'
+            f" printf '{LOG_TAG}%s\\n' $((s-o));"
+            f" tail -c +$((o+1)) {log} | head -c $((s-o)); o=$s; fi;"
+            f' if [ -n "$d" ]; then printf \'{RC_TAG}%s\\n\' "$(cat {rc_file})"; break; fi;'
+            f' if [ -n "$w" ]; then inotifywait -qq -t {FOLLOW_INOTIFY_WAIT}'
+            f" -e modify -e close_write {log} >/dev/null 2>&1;"
+            f" else sleep {FOLLOW_POLL_WAIT}; fi;"
+            f" done"
         )
-        cmd = _ssh_command(name, zone, project, follow)
-        ensure_gcloud_authenticated()
+        cmd = _ssh_command(name, follow)
         if VERBOSE:
             print(f"[bold blue]Running command:[/bold blue] {cmd}")
+        # One session for the whole install. It streams, so it cannot go
+        # through _spawn, but it follows the same rules: its own session,
+        # tracked for Ctrl-C, and killed locally once the install timeout or
+        # the command's deadline runs out. stderr is left on the terminal:
+        # only the follower's framed output is on stdout.
+        left = deadline - time.time()
+        overall = _call_timeout(None)
+        if overall is not None:
+            left = min(left, overall)
         proc = subprocess.Popen(
-            shlex.split(cmd),
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
+            shlex.split(cmd), stdout=subprocess.PIPE, start_new_session=True
         )
+        with _children_lock:
+            _children.add(proc.pid)
+        watchdog = threading.Timer(max(0, left), _kill_group, (proc.pid,))
+        watchdog.start()
         assert proc.stdout is not None  # stdout=PIPE always gives us one
         rc = None
-        rotated = False
-        for line in proc.stdout:
-            if line.startswith(RC_TAG):
-                rc = int(line[len(RC_TAG) :].strip() or 1)
-                break
-            if line.startswith(ROT_TAG):
-                rotated = True
-                continue
-            if line.startswith(LOG_TAG):
-                offset += 1
-                line = line[len(LOG_TAG) :]
-            print(line, end="")
-        proc.stdout.close()
-        proc.terminate()
-        proc.wait()
-
+        try:
+            while True:
+                header = proc.stdout.readline()
+                if not header:
+                    break
+                if header.startswith(RC_TAG.encode()):
+                    rc = int(header[len(RC_TAG) :].strip() or 1)
+                    break
+                if not header.startswith(LOG_TAG.encode()):
+                    continue
+                remaining = int(header[len(LOG_TAG) :])
+                while remaining:
+                    # read1 hands over whatever has arrived, so output reaches
+                    # the terminal as it comes rather than a chunk at a time.
+                    data = proc.stdout.read1(min(remaining, 1 << 16))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    # Advanced per byte actually printed: a drop mid-chunk
+                    # resumes right after the last byte shown, never repeats.
+                    offset += len(data)
+                    text = decoder.decode(data)
+                    if prefix:
+                        pending += text
+                        *lines, pending = pending.split("\n")
+                        text = "".join(f"{prefix}{line}\n" for line in lines)
+                    with _output_lock:
+                        sys.stdout.write(text)
+                        sys.stdout.flush()
+                if remaining:
+                    break
+        finally:
+            watchdog.cancel()
+            _kill_group(proc.pid)
+            proc.stdout.close()
+            proc.wait()
+            with _children_lock:
+                _children.discard(proc.pid)
+        _call_timeout(None)  # a session cut by the deadline ends here, not in a retry
+
+        if rc is not None and pending:
+            with _output_lock:
+                sys.stdout.write(f"{prefix}{pending}\n")
         if rc == 0:
             return
         if rc is not None:
@@ -628,15 +2006,13 @@ def remote_run_logged(
                 f"❌ {script} exited {rc} on {name}."
                 f" Full log: ssh {name} 'cat ~/{log}'"
             )
-        if rotated:
-            # Ran its full course: a normal session rotation, not a failure.
-            attempt = 0
-            continue
+        if time.time() >= deadline:
+            break
         attempt += 1
         backoff = min(60, 5 * 2 ** (attempt - 1))
         print(
-            f"⚠️  Lost the log stream (attempt {attempt}); the install is still"
-            f" running on the TPU. Reattaching at line {offset} in {backoff}s..."
+            f"\n⚠️  Lost the log stream (attempt {attempt}); the install is still"
+            f" running on the TPU. Reattaching at byte {offset} in {backoff}s..."
         )
         time.sleep(backoff)
 
@@ -647,38 +2023,45 @@ def remote_run_logged(
 
 
 def describe_queued_resource(queued_resource_id: str, zone: str) -> dict:
-    out = _gcloud_output(
-        f"gcloud alpha compute tpus queued-resources describe"
-        f" {queued_resource_id} --zone {zone} --format json"
-    )
-    return json.loads(out)
+    return _backend().describe_queued_resource(queued_resource_id, zone)
 
 
-def queued_resource_state(queued_resource_id: str, zone: str) -> str:
-    """Return the queued resource's state, or GONE if GCP no longer has it.
+def fetch_queued_resources(entries: dict[str, str]) -> dict[str, tuple[str, dict]]:
+    """Return {qr_id: (state, info)} for {qr_id: zone}, with one list call per zone.
+
+    A describe per request means one API call (and, on the gcloud backend, one
+    process) per node on every poll, which a long race turns into the read
+    quota. A zone's list answers for every request we have there at once.
 
     GONE and ERROR are deliberately distinct: a cache entry may only be dropped
-    when GCP actually reports the resource missing, never on a transient API
-    failure that would otherwise look identical.
+    when GCP actually reports the resource missing (the zone's list succeeded
+    without it), never on a transient API failure (the list itself failed),
+    which would otherwise look identical. info is {} for both.
     """
-    try:
-        out = _gcloud_output(
-            f"gcloud alpha compute tpus queued-resources describe"
-            f" {queued_resource_id} --zone {zone} --format json"
-        )
-        info = json.loads(out)
-    except subprocess.CalledProcessError as exc:
-        # A describe of a deleted resource exits non-zero with NOT_FOUND on
-        # stderr. That is how a cancelled/expired request reaches the caller;
-        # a genuine API failure must stay distinct from "gone".
-        stderr = (exc.stderr or "").lower()
-        if "not_found" in stderr or "not found" in stderr:
-            return "GONE"
-        return "ERROR"
-    raw_state = info.get("state", {})
-    if isinstance(raw_state, dict):
-        return raw_state.get("state", "UNKNOWN")
-    return str(raw_state)
+    by_zone: dict[str, list[str]] = {}
+    for qr_id, zone in entries.items():
+        by_zone.setdefault(zone, []).append(qr_id)
+
+    def _zone(zone: str) -> dict[str, tuple[str, dict]]:
+        try:
+            listed = {_node_id(q): q for q in _backend().list_queued_resources(zone)}
+        except Exception:
+            return {qr_id: ("ERROR", {}) for qr_id in by_zone[zone]}
+        return {
+            qr_id: (qr_state(listed[qr_id]), listed[qr_id]) if qr_id in listed else ("GONE", {})
+            for qr_id in by_zone[zone]
+        }
+
+    results: dict[str, tuple[str, dict]] = {}
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for zone_results in pool.map(_zone, by_zone):
+            results.update(zone_results)
+    return results
+
+
+def poll_queued_resources(entries: dict[str, str]) -> dict[str, str]:
+    """Return {qr_id: state} for {qr_id: zone}; see fetch_queued_resources."""
+    return {qr_id: state for qr_id, (state, _) in fetch_queued_resources(entries).items()}
 
 
 def qr_state(info: dict) -> str:
@@ -693,17 +2076,54 @@ def qr_state(info: dict) -> str:
     return str(raw_state)
 
 
-def update_ssh_config(name: str, zone: str):
+@contextlib.contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive flock on path (created if missing) for the block."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def update_ssh_config(name: str, zone: str) -> list[str]:
+    """Point one ~/.ssh/config alias per worker at its external IP; return the aliases.
+
+    Worker 0 keeps the node's own name, so a single-host TPU has the one alias
+    it always had; the other workers of a slice get name-w1, name-w2, ...
+    """
     print(
         f"TPU [bold blue]{name}[/bold blue] restarted, updating local IP/ssh records."
     )
-    ext_ip = get_ext_ip(name, zone)
-    print(f"External IP: {ext_ip}, updating ~/.ssh/config")
+    ext_ips = get_ext_ips(name, zone)
+    aliases = [_worker_alias(name, worker) for worker in range(len(ext_ips))]
+    print(f"External IP: {', '.join(ext_ips)}, updating ~/.ssh/config")
+    # Concurrent reinstalls each rewrite ~/.ssh/config and known_hosts;
+    # serialise them so no update is lost.
+    with _file_lock(SSH_CONFIG_LOCK):
+        for alias, ext_ip in zip(aliases, ext_ips):
+            _update_ssh_config(alias, ext_ip)
+    # And point the tpu-hermes profile at the fresh alias, if it's set up.
+    _write_hermes_env(name)
+    return aliases
+
+
+def _ssh_aliases(name: str) -> list[str]:
+    """The node's aliases present in ~/.ssh/config, worker 0's first."""
+    try:
+        with open(os.path.expanduser("~/.ssh/config")) as f:
+            hosts = [line.split()[1] for line in f if line.startswith("Host ") and len(line.split()) > 1]
+    except FileNotFoundError:
+        return []
+    return [h for h in hosts if h == name or re.fullmatch(rf"{re.escape(name)}-w\d+", h)]
+
+
+def _update_ssh_config(name: str, ext_ip: str):
     with open(os.path.expanduser("~/.ssh/config"), "r") as f:
         host_found = False
         lines = f.readlines()
         for i, line in enumerate(lines):
-            if f"Host {name}" in line:
+            # Exact match: "Host foo" must not match foo-w1's entry.
+            if line.strip() == f"Host {name}":
                 lines[i + 1] = f"  HostName {ext_ip}\n"
                 host_found = True
                 break
@@ -719,8 +2139,6 @@ def update_ssh_config(name: str, zone: str):
         f.writelines(lines)
     # Finally, cleanup known_hosts.
     cleanup_known_hosts(name)
-    # And point the tpu-hermes profile at the fresh alias, if it's set up.
-    _write_hermes_env(name)
 
 
 def cleanup_known_hosts(ssh_alias: str):
@@ -850,6 +2268,199 @@ def cleanup_known_hosts(ssh_alias: str):
             print("Restored known_hosts from backup")
 
 
+def record_metric(
+    phase: str,
+    zone: str,
+    accelerator_type: str | None,
+    outcome: str,
+    seconds: float,
+    attempts: int = 1,
+):
+    """Append one timed phase to METRICS_FILE."""
+    line = json.dumps(
+        {
+            "at": round(time.time(), 1),
+            "phase": phase,
+            "zone": zone,
+            "type": accelerator_type,
+            "secs": round(seconds, 1),
+            "outcome": outcome,
+            "attempts": attempts,
+        }
+    )
+    with _file_lock(METRICS_FILE + ".lock"):
+        with open(METRICS_FILE, "a") as f:
+            f.write(line + "\n")
+        if os.path.getsize(METRICS_FILE) > METRICS_MAX_BYTES:
+            with open(METRICS_FILE) as f:
+                lines = f.readlines()[-METRICS_KEEP:]
+            with open(METRICS_FILE + ".tmp", "w") as f:
+                f.writelines(lines)
+            os.replace(METRICS_FILE + ".tmp", METRICS_FILE)
+
+
+def load_metrics(phase: str | None = None, since: float = 0) -> list[dict]:
+    """The newest METRICS_KEEP samples, oldest first, optionally of one phase and newer than since."""
+    try:
+        with open(METRICS_FILE) as f:
+            lines = f.readlines()[-METRICS_KEEP:]
+    except FileNotFoundError:
+        return []
+    samples = []
+    for line in lines:
+        with contextlib.suppress(json.JSONDecodeError):
+            samples.append(json.loads(line))
+    return [
+        m for m in samples if (phase is None or m["phase"] == phase) and m["at"] >= since
+    ]
+
+
+@contextlib.contextmanager
+def measure(phase: str, zone: str, accelerator_type: str | None = None):
+    """Time the block as phase and record it, with its outcome, when it ends.
+
+    Retry loops inside the block count their tries with _note_attempt(phase),
+    from any thread.
+    """
+    record = {"attempts": 0}
+    with _metrics_lock:
+        _open_phases.setdefault(phase, []).append(record)
+    started = time.time()
+    outcome = "failed"
+    try:
+        yield
+        outcome = "ok"
+    except DeadlineExceeded:
+        outcome = "timeout"
+        raise
+    except KeyboardInterrupt:
+        outcome = "aborted"
+        raise
+    except subprocess.CalledProcessError as exc:
+        if exc.returncode < 0 or _interrupted.is_set():
+            # Killed by a signal (Ctrl-C kills every child), not refused.
+            outcome = "aborted"
+        raise
+    finally:
+        with _metrics_lock:
+            _open_phases[phase].remove(record)
+        record_metric(
+            phase, zone, accelerator_type, outcome, time.time() - started, max(1, record["attempts"])
+        )
+
+
+def _note_attempt(phase: str):
+    """Count one more try towards the innermost open measurement of phase, if any."""
+    with _metrics_lock:
+        if _open_phases.get(phase):
+            _open_phases[phase][-1]["attempts"] += 1
+
+
+@dataclass
+class ZoneScore:
+    zone: str
+    samples: float  # decayed weight of the recorded samples
+    success: float  # probability an attempt succeeds
+    ok_secs: float  # expected time to READY when it does
+    fail_secs: float  # expected time lost when it does not
+
+    @property
+    def per_hour(self) -> float:
+        """Expected successes per hour spent trying this zone; zones are tried highest first.
+
+        Trying zones in decreasing success / expected-attempt-cost order
+        minimises the expected time until one succeeds.
+        """
+        cost = self.success * self.ok_secs + (1 - self.success) * self.fail_secs
+        return 3600 * self.success / max(cost, 1.0)
+
+
+def score_zones(zones: list[str], accelerator_type: str) -> list[ZoneScore]:
+    """Score zones from the recorded outcomes and return them best first.
+
+    Ties, including every zone when nothing is recorded yet, keep the order
+    zones came in.
+    """
+    now = time.time()
+    totals = {
+        zone: {
+            "ok": 1.0,
+            "fail": 2.0,
+            "ok_secs": float(ZONE_PRIOR_OK_SECS),
+            "fail_secs": 2.0 * ZONE_PRIOR_FAIL_SECS,
+            "samples": 0.0,
+        }
+        for zone in zones
+    }
+    for sample in load_metrics():
+        entry = totals.get(sample["zone"])
+        if entry is None or sample["phase"] not in ZONE_SCORE_PHASES:
+            continue
+        if sample.get("type") != accelerator_type or sample["outcome"] not in ("ok", "failed"):
+            continue
+        weight = 0.5 ** ((now - sample["at"]) / ZONE_SCORE_HALF_LIFE)
+        entry["samples"] += weight
+        kind = "ok" if sample["outcome"] == "ok" else "fail"
+        entry[kind] += weight
+        entry[f"{kind}_secs"] += weight * sample["secs"]
+    scores = [
+        ZoneScore(
+            zone=zone,
+            samples=t["samples"],
+            success=t["ok"] / (t["ok"] + t["fail"]),
+            ok_secs=t["ok_secs"] / t["ok"],
+            fail_secs=t["fail_secs"] / t["fail"],
+        )
+        for zone, t in totals.items()
+    ]
+    return sorted(scores, key=lambda score: -score.per_hour)
+
+
+def node_scores(cache: dict, names: list[str]) -> dict[str, ZoneScore]:
+    """Each named node's zone score for the node's own accelerator type."""
+    by_type: dict[str, set[str]] = {}
+    for name in names:
+        by_type.setdefault(cache[name]["type"], set()).add(cache[name]["zone"])
+    scores = {
+        (score.zone, accelerator_type): score
+        for accelerator_type, zones in by_type.items()
+        for score in score_zones(sorted(zones), accelerator_type)
+    }
+    return {name: scores[cache[name]["zone"], cache[name]["type"]] for name in names}
+
+
+def rank_zones(zones: list[str], accelerator_type: str, explain: bool = False) -> list[str]:
+    """zones in the order to try them, printing the ranking if explain."""
+    scores = score_zones(zones, accelerator_type)
+    if explain:
+        table = Table(
+            "#", "Zone", "Samples", "Success", "To READY", "Lost on failure", "Score",
+            title=f"Zone ranking for {accelerator_type} (half-life {ZONE_SCORE_HALF_LIFE // 3600}h)",
+            title_justify="left",
+        )
+        for rank, score in enumerate(scores, 1):
+            table.add_row(
+                str(rank),
+                score.zone,
+                f"{score.samples:.1f}",
+                f"{100 * score.success:.0f}%",
+                f"{score.ok_secs:.0f}s",
+                f"{score.fail_secs:.0f}s",
+                f"{score.per_hour:.1f}/h",
+            )
+        Console().print(table)
+    return [score.zone for score in scores]
+
+
+def _start_node(name: str, zone: str, capture: bool = False):
+    """`tpu-vm start` the node, recording the outcome for its zone."""
+    try:
+        with measure("start", zone, get_cache().get(name, {}).get("type")):
+            _backend().start_node(name, zone, capture=capture)
+    finally:
+        invalidate_zone(zone)
+
+
 def restart_tpu(name: str, zone: str):
     """Restart a TPU instance by name and zone.
 
@@ -867,78 +2478,1073 @@ def restart_tpu(name: str, zone: str):
         f"🚀 TPU [bold blue]{name}[/bold blue] is available, restarting at {datetime.now().isoformat()}..."
     )
     start_time = time.time()
-    _run(f"gcloud compute tpus tpu-vm start {name} --zone {zone}")
+    _start_node(name, zone)
     update_ssh_config(name, zone)
     print(
         f"✅ Done! Restarted [bold green]{name}[/bold green] in {time.time() - start_time} seconds"
     )
 
 
-def build_payload(tmpdir: str, config: Config) -> str:
-    """Collect everything the install needs into a single tarball.
+def _payload_entries(stage: str) -> list[str]:
+    """Every path under stage, relative to it, in a fixed (sorted) order."""
+    entries = []
+    for root, dirs, files in os.walk(stage):
+        for entry in dirs + files:
+            entries.append(os.path.relpath(os.path.join(root, entry), stage))
+    return sorted(entries)
 
-    Shipping one archive replaces the nine separate scp/ssh invocations this used
-    to take, and lets the whole install run as one remote process.
+
+def _payload_digest(stage: str, entries: list[str]) -> str:
+    """sha256 over the staged tree: paths, kinds, exec bits and contents.
+
+    Only what the install can observe goes in. mtimes and owners do not, as
+    the extra script regenerates its files on every run.
     """
+    digest = hashlib.sha256(f"get-tpu payload v{PAYLOAD_FORMAT}\0".encode())
+    for rel in entries:
+        path = os.path.join(stage, rel)
+        st = os.lstat(path)
+        if os.path.islink(path):
+            kind, size = f"l:{os.readlink(path)}", 0
+        elif os.path.isdir(path):
+            kind, size = "d", 0
+        else:
+            kind, size = ("x" if st.st_mode & 0o111 else "f"), st.st_size
+        digest.update(f"{rel}\0{kind}\0{size}\0".encode())
+        if kind in ("f", "x"):
+            with open(path, "rb") as f:
+                while chunk := f.read(1 << 20):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_payload_tar(stage: str, entries: list[str], dest: str):
+    """Tar and gzip stage with fixed metadata, so the same tree gives the same bytes."""
+    with open(dest, "wb") as raw, gzip.GzipFile(
+        filename="", fileobj=raw, mode="wb", compresslevel=6, mtime=0
+    ) as gz:
+        _tar_payload(stage, entries, gz)
+
+
+def _tar_payload(stage: str, entries: list[str], out):
+    """Write stage as an uncompressed tar stream to out, with fixed metadata."""
+    with tarfile.open(fileobj=out, mode="w|", format=tarfile.GNU_FORMAT) as tar:
+        for rel in entries:
+            path = os.path.join(stage, rel)
+            info = tar.gettarinfo(path, arcname=rel)
+            info.mtime = 0
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            if info.isdir() or info.mode & 0o111:
+                info.mode = 0o755
+            elif not info.issym():
+                info.mode = 0o644
+            if info.isreg():
+                with open(path, "rb") as f:
+                    tar.addfile(info, f)
+            else:
+                tar.addfile(info)
+
+
+def _prune_payload_cache():
+    """Keep only the PAYLOAD_CACHE_KEEP most recently used tarballs."""
+    tarballs = sorted(
+        (
+            os.path.join(PAYLOAD_CACHE_DIR, f)
+            for f in os.listdir(PAYLOAD_CACHE_DIR)
+            if f.endswith(".tar.gz")
+        ),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for stale in tarballs[PAYLOAD_CACHE_KEEP:]:
+        os.remove(stale)
+
+
+def stage_extra(dest: str, config: Config) -> bool:
+    """Run the configured extra_startup_script into dest; False if there is none."""
+    if not config.extra_startup_script:
+        return False
+    os.makedirs(dest)
+    print(f"🔧 Staging extra files with {config.extra_startup_script}")
+    subprocess.check_call(f"{config.extra_startup_script} {shlex.quote(dest)}", shell=True)
+    return True
+
+
+def stage_payload(tmpdir: str, config: Config, extra: bool = True) -> str:
+    """Lay out the files the install needs under tmpdir/payload and return that dir."""
     stage = os.path.join(tmpdir, "payload")
     os.makedirs(stage)
-    for script in ("setup.sh", "run-all.sh"):
-        shutil.copy(os.path.join(CUR_DIR, script), stage)
-
-    if config.extra_startup_script:
-        extra = os.path.join(stage, "extra")
-        os.makedirs(extra)
-        print(f"🔧 Staging extra files with {config.extra_startup_script}")
-        subprocess.check_call(
-            f"{config.extra_startup_script} {shlex.quote(extra)}", shell=True
+    shutil.copy(os.path.join(CUR_DIR, "run-all.sh"), stage)
+    shutil.copytree(os.path.join(CUR_DIR, "steps"), os.path.join(stage, "steps"))
+    if extra:
+        stage_extra(os.path.join(stage, "extra"), config)
+    return stage
+
+
+def build_payload(tmpdir: str, config: Config, extra: bool = True) -> tuple[str, str]:
+    """Collect everything the install needs into a single tarball; return (path, digest).
+
+    Shipping one archive replaces the nine separate scp/ssh invocations this used
+    to take, and lets the whole install run as one remote process.
+
+    The staged tree is hashed and the tarball kept in PAYLOAD_CACHE_DIR under
+    that digest: a reinstall with unchanged inputs reuses it instead of
+    re-compressing what may be gigabytes of extra files, and the digest lets
+    install_tpu_script skip the upload altogether when the node has it already.
+    The tarball is written with sorted entries, zeroed mtimes and owners and a
+    zeroed gzip header, so the same inputs give the same bytes.
+
+    With extra=False the extra files are left out, for sync_extra_delta to
+    send separately.
+    """
+    stage = stage_payload(tmpdir, config, extra)
+    entries = _payload_entries(stage)
+    digest = _payload_digest(stage, entries)
+    if not os.access(PAYLOAD_CACHE_DIR, os.F_OK):
+        os.makedirs(PAYLOAD_CACHE_DIR)
+    tar_path = os.path.join(PAYLOAD_CACHE_DIR, f"{digest}.tar.gz")
+    if os.path.exists(tar_path):
+        print(f"📦 Payload {digest[:12]} unchanged, reusing the cached tarball")
+        os.utime(tar_path)
+    else:
+        partial = f"{tar_path}.{os.getpid()}.part"
+        _write_payload_tar(stage, entries, partial)
+        os.replace(partial, tar_path)
+    _prune_payload_cache()
+    return tar_path, digest
+
+
+def _remote_output(name: str, remote_cmd: str, timeout: float | None = None) -> str:
+    """Run remote_cmd on the node over its shared ssh connection and return stdout."""
+    cmd = _ssh_command(name, remote_cmd)
+    if VERBOSE:
+        print(f"[bold blue]Running command:[/bold blue] {cmd}")
+    limit = _call_timeout(timeout)
+    try:
+        result = _spawn(shlex.split(cmd), capture=True, timeout=limit)
+    except subprocess.TimeoutExpired:
+        raise _timed_out(cmd, limit) from None
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(
+            result.returncode, cmd, output=result.stdout, stderr=result.stderr
+        )
+    return result.stdout
+
+
+def upload_payload(name: str, tar_path: str, digest: str):
+    """Put the payload on the node as ~/PAYLOAD_TAR, unless it already holds that digest.
+
+    The tarball goes up under a temporary name and is renamed into place
+    together with writing its stamp, so an interrupted upload never leaves a
+    stamp vouching for a half-written file.
+    """
+    stamp = f"{PAYLOAD_TAR}.sha256"
+    if _payload_held(name, digest):
+        print(f"🧾 {name} already holds payload {digest[:12]}, skipping the upload")
+        return
+
+    size = os.path.getsize(tar_path) / 1e6
+    print(f"🧾 Copying the install payload ({digest[:12]}, {size:.1f} MB)")
+
+    def _upload(left: int):
+        _run(_scp_command(tar_path, name, f"{PAYLOAD_TAR}.part"), timeout=left)
+        _run(
+            _ssh_command(
+                name, f"cd ~; mv -f {PAYLOAD_TAR}.part {PAYLOAD_TAR} && echo {digest} > {stamp}"
+            ),
+            timeout=60,
+        )
+
+    _retry_transient(f"copying the install payload to {name}", UNREACHABLE_BUDGET, _upload)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _payload_held(alias: str, digest: str) -> bool:
+    stamp = f"{PAYLOAD_TAR}.sha256"
+    held = _retry_transient(
+        f"checking the payload on {alias}",
+        UNREACHABLE_BUDGET,
+        lambda left: _remote_output(
+            alias, f"cd ~; [ -f {PAYLOAD_TAR} ] && cat {stamp} 2>/dev/null; true", timeout=left
+        ),
+    ).strip()
+    return held == digest
+
+
+def _serve_payload(alias: str, ip: str, port: int, token: str):
+    """Serve ~/PAYLOAD_TAR from alias at http://ip:port/token/PAYLOAD_TAR, in the background.
+
+    The empty index.html stops http.server listing the directory, so the
+    token cannot be read off the server itself.
+    """
+    serve = (
+        f"cd ~; mkdir -p {FANOUT_DIR}/{token} && : > {FANOUT_DIR}/index.html"
+        f" && ln -sf ~/{PAYLOAD_TAR} {FANOUT_DIR}/{token}/{PAYLOAD_TAR} || exit 1;"
+        f" setsid nohup timeout {FANOUT_SERVE_TIMEOUT} python3 -m http.server {port}"
+        f" --bind {ip} --directory {FANOUT_DIR} </dev/null >/dev/null 2>&1 &"
+        f" echo $! > {FANOUT_DIR}/server.pid"
+    )
+    _retry_transient(
+        f"serving the payload from {alias}",
+        UNREACHABLE_BUDGET,
+        lambda left: _run(_ssh_command(alias, serve), timeout=min(60, left)),
+    )
+
+
+def _stop_serving(alias: str):
+    """Best-effort: stop alias's payload server and remove its token dir."""
+    try:
+        _run(
+            _ssh_command(
+                alias,
+                f"cd ~; [ -f {FANOUT_DIR}/server.pid ] && kill \"$(cat {FANOUT_DIR}/server.pid)\";"
+                f" rm -rf {FANOUT_DIR}; true",
+            ),
+            timeout=30,
+        )
+    except (subprocess.CalledProcessError, RuntimeError):
+        pass
+
+
+def _fetch_payload(alias: str, url: str, file_sha: str, digest: str):
+    """Have alias download the payload from url, check its sha256 and install it with its stamp.
+
+    Like upload_payload, the file is only renamed into place, stamp and all,
+    once it is complete and verified.
+    """
+    stamp = f"{PAYLOAD_TAR}.sha256"
+    fetch = (
+        f"cd ~; curl -fsS --retry 10 --retry-connrefused --retry-delay 1"
+        f" -o {PAYLOAD_TAR}.part {url}"
+        f" && echo '{file_sha}  {PAYLOAD_TAR}.part' | sha256sum -c --quiet"
+        f" && mv -f {PAYLOAD_TAR}.part {PAYLOAD_TAR} && echo {digest} > {stamp}"
+    )
+    _run(_ssh_command(alias, fetch), timeout=SCP_TIMEOUT)
+
+
+def distribute_payload(aliases: list[str], internal_ips: list[str], tar_path: str, digest: str):
+    """Put the payload on every worker, crossing the client's uplink only once.
+
+    Worker 0 gets it from here (upload_payload). The other workers copy it
+    from a worker that already holds it, over the internal network, in a
+    binomial tree: each round, every holder feeds one worker that is still
+    missing it. Each copy is checked against the tarball's sha256 before it
+    counts. A worker that cannot fetch its copy (a firewall between workers,
+    say) is uploaded to directly instead, so the fan-out can only save
+    uplink, never cost the install.
+    """
+    upload_payload(aliases[0], tar_path, digest)
+    if len(aliases) == 1:
+        return
+    with ThreadPoolExecutor(max_workers=len(aliases) - 1) as pool:
+        held = list(pool.map(lambda alias: _payload_held(alias, digest), aliases[1:]))
+    holders = [0] + [w for w, h in enumerate(held, start=1) if h]
+    missing = [w for w, h in enumerate(held, start=1) if not h]
+    if not missing:
+        print(f"🧾 Every worker already holds payload {digest[:12]}")
+        return
+
+    file_sha = _file_sha256(tar_path)
+    token = secrets.token_hex(16)
+    serving: list[int] = []
+    started = time.time()
+    print(f"🌳 Spreading the payload from {aliases[0]} to {len(missing)} workers inside the slice")
+    try:
+        rounds = 0
+        while missing:
+            rounds += 1
+            pairs = list(zip(holders, missing))
+            for src, _ in pairs:
+                if src not in serving:
+                    _serve_payload(aliases[src], internal_ips[src], FANOUT_PORT + src, token)
+                    serving.append(src)
+
+            def _copy(i: int, alias: str):
+                src, dst = pairs[i]
+                url = f"http://{internal_ips[src]}:{FANOUT_PORT + src}/{token}/{PAYLOAD_TAR}"
+                try:
+                    _fetch_payload(alias, url, file_sha, digest)
+                except (subprocess.CalledProcessError, RuntimeError) as exc:
+                    print(
+                        f"⚠️  {alias} could not fetch the payload from {aliases[src]}"
+                        f" ({exc}), uploading it directly"
+                    )
+                    upload_payload(alias, tar_path, digest)
+
+            _on_every_worker([aliases[dst] for _, dst in pairs], _copy)
+            holders += [dst for _, dst in pairs]
+            missing = missing[len(pairs) :]
+    finally:
+        with ThreadPoolExecutor(max_workers=max(1, len(serving))) as pool:
+            list(pool.map(lambda w: _stop_serving(aliases[w]), serving))
+    print(
+        f"🌳 Payload on all {len(aliases)} workers after {rounds} rounds"
+        f" in {time.time() - started:.1f}s"
+    )
+
+
+class _HashingWriter:
+    """File-like wrapper that hashes and counts everything written through it."""
+
+    def __init__(self, out):
+        self.out = out
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.out.write(data)
+
+
+def _feed_payload(stage: str, compressor: list[str] | None, stdin):
+    """Tar stage into stdin, through the compressor command if one is given.
+
+    Returns the sha256 of the uncompressed tar stream. The compressor writes
+    straight into stdin (ssh's), so tarring, compressing and sending overlap
+    and nothing is buffered on disk.
+    """
+    entries = _payload_entries(stage)
+    if compressor is None:
+        # The in-process fallback is gzip at level 1: slower than zstd -T0 on
+        # a big payload, but it never holds up the link on a small one.
+        with gzip.GzipFile(filename="", fileobj=stdin, mode="wb", compresslevel=1, mtime=0) as gz:
+            writer = _HashingWriter(gz)
+            _tar_payload(stage, entries, writer)
+        return writer.sha256.hexdigest()
+
+    proc = subprocess.Popen(
+        compressor, stdin=subprocess.PIPE, stdout=stdin, start_new_session=True
+    )
+    with _children_lock:
+        _children.add(proc.pid)
+    try:
+        writer = _HashingWriter(proc.stdin)
+        try:
+            _tar_payload(stage, entries, writer)
+        finally:
+            proc.stdin.close()
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, compressor)
+    except BaseException:
+        _kill_group(proc.pid)
+        proc.wait()
+        raise
+    finally:
+        with _children_lock:
+            _children.discard(proc.pid)
+    return writer.sha256.hexdigest()
+
+
+def stream_payload(name: str, stage: str):
+    """Stream the staged payload straight into ~ on the node, verified by hash.
+
+    tar -> `zstd -T0` -> ssh -> `zstd -dc` -> extraction on the node, all
+    concurrent, so compression, transfer and unpacking overlap and no
+    tarball is written on either side. The node hashes the tar stream it
+    unpacked and the upload only counts if that matches what was sent.
+    Falls back to gzip when either side lacks zstd.
+
+    Since the payload lands directly in ~, nothing is streamed while an
+    install is running there: remote_run_logged just re-attaches to it.
+    """
+    probe = _retry_transient(
+        f"checking {name} before streaming the payload",
+        UNREACHABLE_BUDGET,
+        lambda left: _remote_output(
+            name,
+            f"cd ~; command -v zstd >/dev/null && echo zstd;"
+            f" [ -f {REMOTE_LOG}.pid ] && kill -0 \"$(cat {REMOTE_LOG}.pid)\" 2>/dev/null"
+            f" && echo running; true",
+            timeout=left,
+        ),
+    ).split()
+    if "running" in probe:
+        print(f"🧾 An install is already running on {name}, not streaming over it")
+        return
+    if "zstd" in probe and shutil.which("zstd"):
+        compressor, decompress, method = ["zstd", "-T0", "-3", "-q", "-c"], "zstd -dc", "zstd"
+    else:
+        compressor, decompress, method = None, "gzip -dc", "gzip"
+
+    sent = ""
+
+    def _stream(left: int):
+        nonlocal sent
+
+        def _feed(stdin):
+            nonlocal sent
+            sent = _feed_payload(stage, compressor, stdin)
+
+        received = _remote_pipe(
+            name,
+            f"cd ~ && {decompress} | python3 -c {shlex.quote(STREAM_UNPACK)}",
+            timeout=left,
+            feed=_feed,
+        )
+        received = received.decode().strip()
+        if received != sent:
+            raise RuntimeError(
+                f"❌ Payload hash mismatch on {name}: sent {sent[:12]}, unpacked {received[:12]}"
+            )
+
+    print(f"🧾 Streaming the install payload ({method})")
+    started = time.time()
+    _retry_transient(f"streaming the install payload to {name}", UNREACHABLE_BUDGET, _stream)
+    print(f"🧾 Payload {sent[:12]} unpacked and verified in {time.time() - started:.1f}s")
+
+
+def _remote_pipe(
+    name: str, remote_cmd: str, timeout: float | None = None, feed=None
+) -> bytes:
+    """Run remote_cmd on the node over its shared ssh connection, bytes in and out.
+
+    feed, if given, is called with the command's stdin and streams into it;
+    the command's stdout is returned once it exits. This is the binary
+    counterpart of _remote_output, and like remote_run_logged's follower it
+    cannot go through the text-mode _spawn, so it follows the same rules by
+    hand: own session, tracked for Ctrl-C, killed once its timeout is up.
+    """
+    cmd = _ssh_command(name, remote_cmd)
+    if VERBOSE:
+        print(f"[bold blue]Running command:[/bold blue] {cmd}")
+    limit = _call_timeout(timeout)
+    proc = subprocess.Popen(
+        shlex.split(cmd),
+        stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    with _children_lock:
+        _children.add(proc.pid)
+    expired = threading.Event()
+
+    def _expire():
+        expired.set()
+        _kill_group(proc.pid)
+
+    watchdog = threading.Timer(limit, _expire) if limit is not None else None
+    if watchdog:
+        watchdog.start()
+    try:
+        if feed:
+            # A remote side that died makes this a BrokenPipeError; its exit
+            # status says why. communicate() closes stdin.
+            with contextlib.suppress(BrokenPipeError):
+                feed(proc.stdin)
+        out, err = proc.communicate()
+    except BaseException:
+        _kill_group(proc.pid)
+        proc.wait()
+        raise
+    finally:
+        if watchdog:
+            watchdog.cancel()
+        with _children_lock:
+            _children.discard(proc.pid)
+    if expired.is_set():
+        raise _timed_out(cmd, limit)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, output=out, stderr=err.decode(errors="replace")
         )
+    return out
 
-    tar_path = os.path.join(tmpdir, PAYLOAD_TAR)
-    # COPYFILE_DISABLE keeps bsdtar on macOS from adding ._* AppleDouble entries.
-    _run(f"env COPYFILE_DISABLE=1 tar czf {tar_path} -C {stage} .", timeout=SCP_TIMEOUT)
-    return tar_path
 
+def sync_extra_delta(name: str, extra: str):
+    """Bring ~/extra on the node up to date with the local extra dir, rsync-style.
 
-def install_tpu_script(name: str, location: str, project: str, config: Config):
-    wait_for_ssh(name, location)
-    wait_for_ssh_auth(name, location, project)
+    The node sends per-block checksums of what it holds, and only the blocks
+    and files that differ go back, patched in place by delta_sync.py on the
+    node. Nothing is deleted, just as unpacking a tarball over ~/extra would
+    not. An interrupted sync leaves every file either old or new, and the
+    retry starts from fresh signatures, so it only sends what is still missing.
+    """
+    import delta_sync  # sits next to this file; imported lazily, as only --delta needs it
+
+    _retry_transient(
+        f"copying delta_sync.py to {name}",
+        UNREACHABLE_BUDGET,
+        lambda left: _run(
+            _scp_command(os.path.join(CUR_DIR, "delta_sync.py"), name, DELTA_SYNC_REMOTE),
+            timeout=left,
+        ),
+    )
+
+    def _sync(left: int) -> tuple[int, delta_sync.Stats]:
+        attempt_started = time.time()
+        signatures = _remote_pipe(
+            name, f"cd ~; python3 {DELTA_SYNC_REMOTE} signatures extra", timeout=left
+        )
+        stats = delta_sync.Stats()
+
+        def _feed(stdin):
+            nonlocal stats
+            parsed = delta_sync.read_signatures(io.BytesIO(signatures))
+            stats = delta_sync.write_delta(extra, parsed, stdin)
+
+        _remote_pipe(
+            name,
+            f"cd ~; python3 {DELTA_SYNC_REMOTE} patch extra",
+            timeout=max(1, left - (time.time() - attempt_started)),
+            feed=_feed,
+        )
+        return len(signatures), stats
+
+    print("🔁 Syncing extra/ by delta")
+    started = time.time()
+    signature_bytes, stats = _retry_transient(
+        f"syncing extra/ to {name}", UNREACHABLE_BUDGET, _sync
+    )
+    print(
+        f"🔁 extra/: {stats.changed} of {stats.files} files changed,"
+        f" {(signature_bytes + stats.wire_bytes) / 1e6:.2f} MB transferred"
+        f" ({stats.copied_bytes / 1e6:.1f} MB reused on the node)"
+        f" in {time.time() - started:.1f}s"
+    )
+
+
+# `reinstall a b c` / `reinstall --all` runs one child `get-tpu.py reinstall`
+# per node, REINSTALL_WORKERS at a time, and prefixes each child's output with
+# its node's name. Children mark the start of each install phase with a
+# PHASE_TAG<phase> line on stdout (see _phase); the parent shows those in its
+# summary table rather than in the log.
+REINSTALL_WORKERS = 4
+PHASE_TAG = "__GETTPU_PHASE__"
+_NODE_COLORS = ("cyan", "magenta", "green", "yellow", "blue", "bright_cyan", "bright_magenta")
+
+
+def install_steps() -> list[str]:
+    """Names --force-step accepts: the steps in steps/ORDER, the extra step, and "all".
+
+    run-all.sh runs exactly the steps steps/ORDER lists, so a script in steps/
+    that is missing from it is not a step.
+    """
+    with open(os.path.join(CUR_DIR, "steps", "ORDER")) as f:
+        steps = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    return steps + ["extra", "all"]
+
+
+def _phase(label: str):
+    """Report that the install has reached phase label, when a parent reinstall is listening."""
+    if os.getenv("GET_TPU_PHASES"):
+        sys.stdout.write(f"{PHASE_TAG}{label}\n")
+        sys.stdout.flush()
+
+
+def _stop_remote_install(alias: str, log: str = REMOTE_LOG):
+    """Best-effort kill of the detached install remote_run_logged started on alias."""
+    pid_file = f"{log}.pid"
+    try:
+        _run(
+            _ssh_command(
+                alias,
+                f"cd ~; [ -f {pid_file} ] && kill -TERM -\"$(cat {pid_file})\" 2>/dev/null; true",
+            ),
+            timeout=30,
+        )
+    except (subprocess.CalledProcessError, RuntimeError):
+        pass
+
+
+def _on_every_worker(aliases: list[str], fn, stop_remote: bool = False):
+    """Run fn(worker, alias) on every worker of the node at once, failing fast.
+
+    A single-host TPU just runs fn. On a slice, the first worker to fail stops
+    the rest: their local sessions are killed and every call they make from
+    then on raises Aborted. With stop_remote, the installs they had running
+    are killed on the workers too, since a slice with a half-installed worker
+    is no use. The error names the worker that failed.
+    """
+    if len(aliases) == 1:
+        fn(0, aliases[0])
+        return
+    with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+        futures = {pool.submit(fn, worker, alias): alias for worker, alias in enumerate(aliases)}
+        try:
+            for future in as_completed(futures):
+                future.result()
+            return
+        except Exception as exc:
+            failed, error = futures[future], exc
+            _aborted.set()
+            _kill_children()
+    for future in futures:
+        future.exception()  # the rest only stop; the first failure is the one reported
+    _aborted.clear()
+    if isinstance(error, DeadlineExceeded):
+        raise error
+    if stop_remote:
+        with ThreadPoolExecutor(max_workers=len(aliases)) as pool:
+            list(pool.map(_stop_remote_install, [a for a in aliases if a != failed]))
+    raise RuntimeError(f"❌ Worker {failed} failed, stopped the others: {error}") from error
+
+
+def install_tpu_script(
+    name: str,
+    location: str,
+    project: str,
+    config: Config,
+    delta: bool = False,
+    stream: bool = False,
+    force_steps: list[str] | None = None,
+):
+    accelerator_type = get_cache().get(name, {}).get("type")
+    _phase("waiting for ssh")
+    with measure("wait_ssh", location, accelerator_type):
+        wait_for_ssh(name, location)
+    # The alias comes first: every ssh from here on, the auth check included,
+    # goes through it and its shared master connection.
     print("🤖 Retrieving IP and updating local ssh settings")
-    update_ssh_config(name, location)
+    aliases = update_ssh_config(name, location)
+    if len(aliases) > 1:
+        print(f"🧩 {len(aliases)}-worker slice: installing on {', '.join(aliases)} in parallel")
+    _phase("ssh auth")
+    with measure("ssh_auth", location, accelerator_type):
+        _on_every_worker(
+            aliases, lambda worker, _: wait_for_ssh_auth(name, location, project, worker=worker)
+        )
 
+    # The payload is built once and shipped to every worker.
+    _phase("payload")
     with tempfile.TemporaryDirectory() as tmpdir:
-        tar_path = build_payload(tmpdir, config)
-        print("🧾 Copying the install payload")
-        _retry_transient(
-            f"copying the install payload to {name}",
-            UNREACHABLE_BUDGET,
-            lambda left: _run(
-                f"gcloud compute tpus tpu-vm scp --zone {location}"
-                f" --scp-flag=-o --scp-flag=ConnectTimeout=10"
-                f" {tar_path} {name}:{PAYLOAD_TAR} --project {project}",
-                timeout=left,
+        with measure("payload", location, accelerator_type):
+            if stream:
+                stage = stage_payload(tmpdir, config, extra=not delta)
+                _on_every_worker(aliases, lambda _, alias: stream_payload(alias, stage))
+                prepare = ""
+            else:
+                tar_path, digest = build_payload(tmpdir, config, extra=not delta)
+                internal_ips = describe_tpu(name, location)["internalIps"]
+                distribute_payload(aliases, internal_ips, tar_path, digest)
+                prepare = f"tar xzf {PAYLOAD_TAR} || exit 1;"
+        extra = os.path.join(tmpdir, "extra")
+        if delta and stage_extra(extra, config):
+            _phase("extra delta")
+            with measure("extra_delta", location, accelerator_type):
+                _on_every_worker(aliases, lambda _, alias: sync_extra_delta(alias, extra))
+
+    # Steps whose stamps on the node still match are skipped by run-all.sh
+    # itself; --force-step names the ones to re-run anyway.
+    _phase("install")
+    script = "run-all.sh" + "".join(f" --force {step}" for step in force_steps or [])
+    prefixed = len(aliases) > 1
+    with measure("install", location, accelerator_type):
+        _on_every_worker(
+            aliases,
+            lambda _, alias: remote_run_logged(
+                alias, script, prepare=prepare, prefix=f"{alias} │ " if prefixed else ""
             ),
+            stop_remote=True,
         )
+    print(f"✅ Done! You can now use [bold green]{name}[/bold green]")
 
-    remote_run_logged(
-        name,
-        location,
-        project,
-        "run-all.sh",
-        prepare=f"tar xzf {PAYLOAD_TAR} || exit 1;",
+
+def _reinstall_one(
+    name: str, delta: bool = False, stream: bool = False, force_steps: list[str] | None = None
+):
+    instance = get_cache()[name]
+    location = instance["zone"]
+    project = get_project()
+    install_tpu_script(
+        name, location, project, get_config(), delta=delta, stream=stream, force_steps=force_steps
     )
-    print(f"✅ Done! You can now use [bold green]{name}[/bold green]")
+
+
+def _reinstall_table(runs: dict[str, dict], started_at: float) -> Table:
+    """Build the rich renderable summarising a multi-node reinstall."""
+    active = sum(1 for run in runs.values() if run["started"] and run["rc"] is None)
+    skipped = sum(1 for run in runs.values() if run.get("skipped"))
+    elapsed = timedelta(seconds=int(time.time() - started_at))
+    table = Table(
+        title=f"nodes {len(runs) - skipped} | installing {active} | skipped {skipped} | elapsed {elapsed}",
+        title_justify="left",
+    )
+    table.add_column("Node")
+    table.add_column("Phase")
+    table.add_column("Elapsed")
+    for name, run in runs.items():
+        if run["rc"] == 0:
+            phase = "[bold green]DONE[/bold green]"
+        elif run["rc"] is not None:
+            phase = f"[red]FAILED[/red] in {run['phase']} (exit {run['rc']})"
+        elif run["started"]:
+            phase = f"[yellow]{run['phase']}[/yellow]"
+        else:
+            phase = f"[dim]{run['phase']}[/dim]"
+        took = ""
+        if run["started"]:
+            took = str(timedelta(seconds=int((run["finished"] or time.time()) - run["started"])))
+        table.add_row(f"[{run['color']}]{name}[/{run['color']}]", phase, took)
+    return table
+
+
+def _reinstall_many(
+    names: list[str],
+    workers: int,
+    delta: bool,
+    stream: bool,
+    force_steps: list[str],
+    skipped: dict[str, str] | None = None,
+) -> bool:
+    """Reinstall several nodes at once, each in its own child process; True if all succeeded.
+
+    A child per node rather than a thread: each install keeps its own
+    deadline, ssh master and terminal-bound output, exactly as when it is
+    run alone, and the parent only has to prefix its lines. `skipped` maps
+    nodes left out to their state, listed in the table but not installed.
+    """
+    from rich.live import Live
+    from rich.text import Text
+
+    get_config()  # prompt for a missing config once, here, not in every child
+    flags = [flag for flag, on in (("--delta", delta), ("--stream", stream)) if on]
+    for step in force_steps:
+        flags += ["--force-step", step]
+    skipped = skipped or {}
+    width = max(len(name) for name in [*names, *skipped])
+    runs = {
+        name: {
+            "color": _NODE_COLORS[i % len(_NODE_COLORS)],
+            "phase": "queued",
+            "started": None,
+            "finished": None,
+            "rc": None,
+        }
+        for i, name in enumerate(names)
+    }
+    for name, state in skipped.items():
+        runs[name] = {
+            "color": "dim",
+            "phase": f"skipped, {state}",
+            "started": None,
+            "finished": None,
+            "rc": None,
+            "skipped": True,
+        }
+    stopping = threading.Event()
+
+    def _child(name: str, console):
+        run = runs[name]
+        try:
+            left = _call_timeout(None)
+        except DeadlineExceeded:
+            run["phase"] = "not started (deadline)"
+            return
+        if stopping.is_set():
+            return
+        args = [sys.executable, os.path.abspath(__file__), "reinstall", name, *flags]
+        if left is not None:
+            args += ["--deadline", f"{max(1, int(left))}s"]
+        # A wide COLUMNS keeps rich in the child from wrapping lines the parent prefixes.
+        env = dict(os.environ, GET_TPU_PHASES="1", COLUMNS="1000")
+        run["started"], run["phase"] = time.time(), "starting"
+        proc = subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            env=env,
+        )
+        with _children_lock:
+            _children.add(proc.pid)
+        prefix = (f"{name:<{width}} │ ", run["color"])
+        try:
+            assert proc.stdout is not None  # stdout=PIPE always gives us one
+            for raw in proc.stdout:
+                # Progress bars redraw with \r: keep only what the line ends on.
+                line = raw.decode(errors="replace").rstrip("\n").split("\r")[-1]
+                if line.startswith(PHASE_TAG):
+                    run["phase"] = line[len(PHASE_TAG) :]
+                    continue
+                console.print(Text.assemble(prefix, line), soft_wrap=True)
+            run["rc"] = proc.wait()
+        finally:
+            _kill_group(proc.pid)
+            with _children_lock:
+                _children.discard(proc.pid)
+            run["finished"] = time.time()
+
+    started_at = time.time()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        with Live(_reinstall_table(runs, started_at), refresh_per_second=2) as live:
+            futures = [pool.submit(_child, name, live.console) for name in names]
+            while not all(future.done() for future in futures):
+                time.sleep(0.5)
+                live.update(_reinstall_table(runs, started_at))
+            live.update(_reinstall_table(runs, started_at))
+        for future in futures:
+            future.result()
+    except BaseException:
+        stopping.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        _kill_children()
+        raise
+    pool.shutdown()
+
+    failed = [name for name, run in runs.items() if run["rc"] != 0 and not run.get("skipped")]
+    if failed:
+        print(f"❌ {len(failed)} of {len(names)} reinstalls did not succeed: {', '.join(failed)}")
+    else:
+        print(f"✅ Done! Reinstalled {len(names)} TPUs in {timedelta(seconds=int(time.time() - started_at))}")
+    if skipped:
+        print(f"⚠️  Skipped {len(skipped)} TPUs that were not READY: {', '.join(skipped)}")
+    return not failed
 
 
 @app.command()
-def reinstall(name: str):
-    """Re-run the setup script on an existing TPU VM."""
+def reinstall(
+    names: list[str] | None = typer.Argument(None, help="TPUs to reinstall"),
+    all_nodes: bool = typer.Option(False, "--all", help="Reinstall every cached TPU"),
+    workers: int = typer.Option(
+        REINSTALL_WORKERS, help="How many TPUs to install at once"
+    ),
+    delta: bool = typer.Option(
+        False, help="Send only what changed in extra/ since the node's last install"
+    ),
+    stream: bool = typer.Option(
+        False, help="Stream the payload through zstd into the node instead of uploading a tarball"
+    ),
+    force_step: list[str] | None = typer.Option(
+        None, help="Re-run this install step even if it is unchanged (repeatable; 'all' for every step)"
+    ),
+    deadline: str | None = typer.Option(
+        None, help="Give up after this long, e.g. 2h; in-flight calls are killed"
+    ),
+):
+    """Re-run the setup script on existing TPU VMs, several at once if given more than one.
+
+    Install steps that already ran with the same content are skipped.
+    """
+    if deadline:
+        set_deadline(deadline)
+    force_steps = force_step or []
+    unknown = [step for step in force_steps if step not in install_steps()]
+    if unknown:
+        raise ValueError(
+            f"❌ Unknown install step {', '.join(unknown)}; expected one of {', '.join(install_steps())}."
+        )
     cache = get_cache()
-    if name not in cache:
-        raise ValueError(f"❌ TPU {name} not found in cache, cannot reinstall it.")
-    instance = cache[name]
-    location = instance["zone"]
-    project = get_project()
-    install_tpu_script(name, location, project, get_config())
+    skipped: dict[str, str] = {}
+    if all_nodes:
+        # Only a READY node can be reached over ssh; a stopped node or a flex
+        # request still queued would hold a worker for UNREACHABLE_BUDGET.
+        candidates = {name: instance for name, instance in cache.items() if not instance.get("pool")}
+        print(f"Checking the state of {len(candidates)} cached TPUs...")
+        states = probe_states(candidates)
+        names = [name for name in candidates if states[name] == "READY"]
+        skipped = {name: states[name] for name in candidates if states[name] != "READY"}
+        if not names:
+            raise ValueError(
+                f"❌ No cached TPU is READY; skipped {', '.join(f'{n} ({s})' for n, s in skipped.items()) or 'none'}."
+            )
+    if not names:
+        raise ValueError("❌ Name at least one TPU to reinstall, or use --all.")
+    missing = [name for name in names if name not in cache]
+    if missing:
+        raise ValueError(
+            f"❌ TPU {', '.join(missing)} not found in cache, cannot reinstall it."
+        )
+    if len(names) == 1 and not skipped:
+        _reinstall_one(names[0], delta=delta, stream=stream, force_steps=force_steps)
+    elif not _reinstall_many(names, workers, delta, stream, force_steps, skipped):
+        raise typer.Exit(1)
+
+
+_CREATE_OUTCOME_COLORS = {
+    "WON": "bold green",
+    "CREATING": "yellow",
+    "DELETED": "yellow",
+    "FAILED": "red",
+    "LEAKED": "bold red",
+}
+
+
+def _error_reason(exc: subprocess.CalledProcessError) -> str:
+    """The last non-empty stderr line of a failed gcloud call, which carries the error."""
+    for line in reversed((exc.stderr or "").strip().splitlines()):
+        if line.strip():
+            return line.strip()
+    return f"exit code {exc.returncode}"
+
+
+def _create_table(outcomes: dict[str, tuple[str, str]], started_at: float) -> Table:
+    """Build the rich renderable for the `create --parallel` view."""
+    running = sum(1 for outcome, _ in outcomes.values() if outcome == "CREATING")
+    elapsed = timedelta(seconds=int(time.time() - started_at))
+    table = Table(
+        title=f"zones {len(outcomes)} | creating {running} | elapsed {elapsed}",
+        title_justify="left",
+    )
+    table.add_column("Zone")
+    table.add_column("Outcome")
+    table.add_column("Detail")
+    for zone, (outcome, detail) in outcomes.items():
+        color = _CREATE_OUTCOME_COLORS.get(outcome, "dim")
+        table.add_row(zone, f"[{color}]{outcome}[/{color}]", detail)
+    return table
+
+
+def _create_parallel(
+    locations: list[str],
+    parallel: int,
+    accelerator_type: str,
+    software_version: str,
+    config: Config,
+    cache: dict,
+) -> tuple[tuple[str, str] | None, Callable[[], None]]:
+    """Run `tpu-vm create` in up to `parallel` zones at once and keep the first node.
+
+    Zones that already hold a node are found in one concurrent pass first, as
+    the serial path does one zone at a time. A create that succeeds after the
+    winner is deleted on the spot: it was only ever a hedge, and a second node
+    is a second bill. One whose delete fails is kept in the cache so `rm` can
+    still reach it.
+
+    Returns as soon as a node is won, with (name, zone) of the winner or None,
+    and a function that waits for the losing creates and their deletes and
+    reports any node that leaked. The caller installs the winner meanwhile and
+    must call it before exiting.
+    """
+    from rich.live import Live
+
+    print(f"Checking {len(locations)} zones for existing TPUs...")
+
+    def _occupied(zone: str) -> tuple[str, str | None]:
+        try:
+            return zone, "already has a TPU" if list_tpus(zone) else None
+        except (subprocess.CalledProcessError, RuntimeError):
+            return zone, "could not list TPUs"
+
+    outcomes: dict[str, tuple[str, str]] = {}
+    candidates = []
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for zone, reason in pool.map(_occupied, locations):
+            if reason:
+                outcomes[zone] = ("SKIPPED", reason)
+            else:
+                outcomes[zone] = ("QUEUED", "")
+                candidates.append(zone)
+    if not candidates:
+        print("❌ Every zone already has a TPU or could not be checked.")
+        return None, lambda: None
+
+    winner: tuple[str, str] | None = None
+    lock = threading.Lock()
+
+    def _attempt(zone: str):
+        nonlocal winner
+        with lock:
+            if winner is not None:
+                outcomes[zone] = ("NOT TRIED", "a node was already won")
+                return
+            if _deadline is not None and time.monotonic() >= _deadline:
+                outcomes[zone] = ("NOT TRIED", "deadline reached")
+                return
+            if _interrupted.is_set():
+                outcomes[zone] = ("NOT TRIED", "interrupted")
+                return
+            outcomes[zone] = ("CREATING", datetime.now().strftime("since %H:%M:%S"))
+        name = f"{config.tpu_name_prefix}{zone}"
+        start_time = time.time()
+
+        def _leaked(why: str):
+            # The killed create may still have gone through on GCP's side.
+            outcomes[zone] = ("LEAKED", f"{why}, check and rm {name}")
+            with lock:
+                cache[name] = {"type": accelerator_type, "zone": zone}
+                save_cache(cache)
+
+        try:
+            with measure("create", zone, accelerator_type):
+                _backend().create_node(
+                    name, zone, accelerator_type, software_version, capture=True
+                )
+        except subprocess.CalledProcessError as exc:
+            if exc.returncode < 0 or _interrupted.is_set():
+                # Killed by a signal (Ctrl-C kills every child), not refused.
+                _leaked("interrupted")
+                return
+            outcomes[zone] = ("FAILED", _error_reason(exc))
+            if _is_not_offered(outcomes[zone][1]):
+                evict_zone_type(zone, accelerator_type)
+            return
+        except DeadlineExceeded:
+            _leaked("cut short by the deadline")
+            return
+        except RuntimeError:
+            _leaked("response lost")
+            return
+        except Exception as exc:
+            # Nobody reads these futures' results: an error left here would
+            # leave the row at CREATING for good.
+            outcomes[zone] = ("FAILED", str(exc))
+            return
+        finally:
+            invalidate_zone(zone)
+        took = f"READY in {int(time.time() - start_time)}s"
+        with lock:
+            if winner is None:
+                winner = (name, zone)
+                outcomes[zone] = ("WON", took)
+                cache[name] = {"type": accelerator_type, "zone": zone}
+                save_cache(cache)
+                return
+        outcomes[zone] = ("DELETING", f"{took}, extra node")
+        try:
+            _backend().delete_node(name, zone, capture=True)
+            outcomes[zone] = ("DELETED", f"{took}, extra node")
+        except subprocess.CalledProcessError as exc:
+            outcomes[zone] = ("LEAKED", f"delete failed, run rm {name}: {_error_reason(exc)}")
+            with lock:
+                cache[name] = {"type": accelerator_type, "zone": zone}
+                save_cache(cache)
+        finally:
+            invalidate_zone(zone)
+
+    started_at = time.time()
+    print(f"Creating in up to {parallel} zones at once, first READY node wins.")
+    pool = ThreadPoolExecutor(max_workers=parallel)
+    futures = [pool.submit(_attempt, zone) for zone in candidates]
+
+    def join_losers():
+        pending = sum(1 for f in futures if not f.done())
+        if pending:
+            print(f"Waiting for {pending} losing creates to finish and be deleted...")
+        pool.shutdown(wait=True)
+        if pending:
+            print(_create_table(outcomes, started_at))
+        for zone, (outcome, detail) in outcomes.items():
+            if outcome == "LEAKED":
+                print(f"⚠️  {zone}: {detail}")
+
+    try:
+        with Live(_create_table(outcomes, started_at), refresh_per_second=1) as live:
+            while winner is None and not all(f.done() for f in futures):
+                time.sleep(1)
+                live.update(_create_table(outcomes, started_at))
+            live.update(_create_table(outcomes, started_at))
+    except BaseException:
+        # Ctrl-C: the creates were killed, but may have landed; wait for
+        # each attempt to cache its name, then say which to check.
+        join_losers()
+        raise
+    # Losing creates go on in the background while the winner installs;
+    # attempts not started yet see the winner and bow out.
+    pool.shutdown(wait=False)
+
+    return winner, join_losers
 
 
 @app.command()
@@ -946,8 +3552,30 @@ def create(
     accelerator_type: str = DEFAULT_ACCELERATOR,
     software_version: str = DEFAULT_SOFTWARE_VERSION,
     location: str | None = None,
+    parallel: int = typer.Option(
+        1, help="Try this many zones at once; the first READY node is kept"
+    ),
+    deadline: str | None = typer.Option(
+        None, help="Give up after this long, e.g. 2h; in-flight calls are killed"
+    ),
+    from_pool: bool = typer.Option(
+        False, help="Start an installed node from the warm pool if one is ready"
+    ),
+    explain: bool = typer.Option(False, help="Print the zone ranking before trying zones"),
+    reinstall_node: bool = typer.Option(
+        False, "--reinstall", help="With --from-pool, send what changed since the pool install"
+    ),
 ):
     """Create a new TPU VM, trying all zones until one succeeds."""
+    if deadline:
+        set_deadline(deadline)
+    if from_pool:
+        if take_from_pool(accelerator_type, software_version, location, reinstall=reinstall_node):
+            return
+        where = f" in {location}" if location else ""
+        print(
+            f"⚠️  No ready {accelerator_type} ({software_version}) node{where} in the warm pool, creating one."
+        )
     print("[bold green]Creating TPU[bold green]")
     cache = get_cache()
     if cache:
@@ -960,7 +3588,20 @@ def create(
     if location:
         locations = [location]
     else:
-        locations = LOCATIONS
+        locations = rank_zones(LOCATIONS, accelerator_type, explain)
+    if parallel > 1:
+        won, join_losers = _create_parallel(
+            locations, parallel, accelerator_type, software_version, config, cache
+        )
+        try:
+            if won is None:
+                print("❌ No zone could create a TPU.")
+                return
+            name, location = won
+            install_tpu_script(name, location, project, config)
+        finally:
+            join_losers()
+        return
     for location in locations:
         print(f"\nTrying to create a TPU VM in [bold]{location}[/bold]...")
         name = f"{config.tpu_name_prefix}{location}"
@@ -975,8 +3616,13 @@ def create(
         print(f"TPU not found, creating at {datetime.now().isoformat()}...")
         start_time = time.time()
         try:
-            command = f"gcloud alpha compute tpus tpu-vm create {name} --zone {location} --accelerator-type={accelerator_type} --version={software_version}"
-            _run(command)
+            with measure("create", location, accelerator_type):
+                # Captured, so the error can tell a stock-out from a type the
+                # zone does not carry.
+                _backend().create_node(
+                    name, location, accelerator_type, software_version, capture=True
+                )
+            invalidate_zone(location)
             print(
                 f"🚀 TPU created in [bold]{location}[/bold] in {time.time() - start_time} seconds"
             )
@@ -987,41 +3633,393 @@ def create(
             save_cache(cache)
             install_tpu_script(name, location, project, config)
             return
-        except subprocess.CalledProcessError:
-            print(f"❌ TPU not available in [bold]{location}[/bold]")
+        except subprocess.CalledProcessError as exc:
+            reason = _error_reason(exc)
+            print(f"❌ TPU not available in [bold]{location}[/bold]: {reason}")
+            if _is_not_offered(reason):
+                evict_zone_type(location, accelerator_type)
             continue
+        except (DeadlineExceeded, RuntimeError, KeyboardInterrupt):
+            if name not in cache:
+                # The killed create may still have gone through on GCP's side.
+                print(f"⚠️  Create in {location} may have gone through; keeping {name} in the cache so rm can reach it.")
+                cache[name] = {"type": accelerator_type, "zone": location}
+                save_cache(cache)
+            raise
+
+
+def probe_states(cache: dict) -> dict[str, str]:
+    """Every cached node's state, one `tpu-vm list` per zone, all zones at once."""
+    by_zone: dict[str, list[str]] = {}
+    for name, instance in cache.items():
+        by_zone.setdefault(instance["zone"], []).append(name)
+    states = {}
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for rows in pool.map(lambda item: _ls_zone_rows(*item), by_zone.items()):
+            states.update({name: state for name, (state, _) in rows.items()})
+    return states
+
+
+def rank_restart_candidates(cache: dict, states: dict[str, str]) -> list[str]:
+    """Order the nodes worth starting, best first; nodes that are gone are left out.
+
+    READY nodes come first, as they need no start at all. STOPPED nodes come
+    next, best zone first by the same score `create` ranks zones with, for
+    each node's own accelerator type. Anything else (a node mid-transition,
+    or a zone that did not answer) comes last. Ties keep the cache's order.
+    """
+    stopped = [name for name in cache if states[name] == "STOPPED"]
+    scores = node_scores(cache, stopped)
+
+    def _key(name: str) -> tuple[int, float]:
+        if states[name] == "READY":
+            return 0, 0.0
+        if states[name] == "STOPPED":
+            return 1, -scores[name].per_hour
+        return 2, 0.0
+
+    return sorted((name for name in cache if states[name] != "NOT FOUND"), key=_key)
+
+
+def _restart_table(cache: dict, states: dict[str, str], ranked: list[str]) -> Table:
+    scores = node_scores(cache, ranked)
+    table = Table("#", "Name", "Zone", "State", "Samples", "Success", "Score")
+    for rank, name in enumerate(ranked, 1):
+        score = scores[name]
+        table.add_row(
+            str(rank),
+            name,
+            cache[name]["zone"],
+            states[name],
+            f"{score.samples:.1f}",
+            f"{100 * score.success:.0f}%",
+            f"{score.per_hour:.1f}/h",
+        )
+    return table
+
+
+def _start_race(names: list[str], cache: dict) -> str | None:
+    """Start names at once; keep the first node that comes up and stop the others.
+
+    A start cannot be called off once sent, so each extra node is stopped as
+    soon as its own start returns. The command waits for those stops before
+    it returns: an extra node left running is a second bill.
+    """
+    winner: str | None = None
+    lock = threading.Lock()
+
+    def _start(name: str):
+        nonlocal winner
+        zone = cache[name]["zone"]
+        try:
+            _start_node(name, zone, capture=True)
+        except subprocess.CalledProcessError as exc:
+            print(f"❌ TPU [bold blue]{name}[/bold blue] did not start: {_error_reason(exc)}")
+            return
+        with lock:
+            if winner is None:
+                winner = name
+                return
+        print(f"Stopping [bold blue]{name}[/bold blue], another node came up first...")
+        try:
+            _backend().stop_node(name, zone, capture=True)
+            print(f"🧘 TPU [bold blue]{name}[/bold blue] stopped")
+        except subprocess.CalledProcessError as exc:
+            print(f"❌ Could not stop {name}, stop it by hand: {_error_reason(exc)}")
+        finally:
+            invalidate_zone(zone)
+
+    print(f"Starting {', '.join(names)} at once, the first one up is kept...")
+    pool = ThreadPoolExecutor(max_workers=len(names))
+    try:
+        for _ in as_completed([pool.submit(_start, name) for name in names]):
+            if winner is not None:
+                update_ssh_config(winner, cache[winner]["zone"])
+                print("Waiting for the other starts to return so they can be stopped...")
+                break
+    finally:
+        pool.shutdown(wait=True)
+    return winner
+
+
+# Bulk stop / rm / restart (--all or any selector) send every operation with
+# --async, BULK_WORKERS at a time, then track them all from one poller: one
+# operations call per zone every BULK_POLL_INTERVAL seconds, however many
+# nodes are in flight. Whatever has not finished after BULK_OP_TIMEOUT is
+# reported as failed and left to GCP.
+BULK_WORKERS = 8
+BULK_POLL_INTERVAL = 5
+BULK_OP_TIMEOUT = 1800
+_BULK_RUNNING = {"start": "STARTING", "stop": "STOPPING", "delete": "DELETING"}
+_BULK_COLORS = {"DONE": "bold green", "GONE": "yellow", "FAILED": "red", "SKIPPED": "dim"}
+
+
+def node_kind(instance: dict) -> str:
+    """"pool", "flex-start" or plain "node"."""
+    if instance.get("pool"):
+        return "pool"
+    return instance.get("kind", "node")
+
+
+def select_nodes(
+    cache: dict,
+    all_nodes: bool = False,
+    prefix: str | None = None,
+    zone: str | None = None,
+    accelerator_type: str | None = None,
+    kind: str | None = None,
+    match: str | None = None,
+) -> list[str] | None:
+    """Cached names matching every selector given, or None if none was given.
+
+    zone and match are shell globs. Pool nodes are only selected by --kind
+    pool: they are managed with the pool-* commands.
+    """
+    if not (all_nodes or prefix or zone or accelerator_type or kind or match):
+        return None
+    return [
+        name
+        for name, instance in cache.items()
+        if (prefix is None or name.startswith(prefix))
+        and (zone is None or fnmatch.fnmatch(instance["zone"], zone))
+        and (accelerator_type is None or instance["type"] == accelerator_type)
+        and (node_kind(instance) == kind if kind else node_kind(instance) != "pool")
+        and (match is None or fnmatch.fnmatch(name, match))
+    ]
+
+
+def _bulk_table(verb: str, outcomes: dict[str, tuple[str, str]], started_at: float) -> Table:
+    running = sum(1 for state, _ in outcomes.values() if state == _BULK_RUNNING[verb])
+    elapsed = timedelta(seconds=int(time.time() - started_at))
+    table = Table(
+        title=f"{verb} {len(outcomes)} nodes | in flight {running} | elapsed {elapsed}",
+        title_justify="left",
+    )
+    table.add_column("Node")
+    table.add_column("State")
+    table.add_column("Detail")
+    for name, (state, detail) in outcomes.items():
+        color = _BULK_COLORS.get(state, "yellow")
+        table.add_row(name, f"[{color}]{state}[/{color}]", detail)
+    return table
+
+
+def run_bulk(
+    verb: str,
+    names: list[str],
+    cache: dict,
+    skipped: dict[str, str] | None = None,
+    workers: int = BULK_WORKERS,
+) -> dict[str, tuple[str, str]]:
+    """Start, stop or delete every named node at once; return each one's (outcome, detail).
+
+    Outcomes are DONE, FAILED, GONE for a node GCP no longer has, and SKIPPED
+    for the entries of skipped (name -> reason), which are only shown.
+
+    Deleting a flex-start entry deletes its queued resource, with --force so
+    a node already handed out goes too. Deleting only the node would miss a
+    request still waiting, which has no node yet and bills once granted; its
+    NOT_FOUND would read as GONE.
+    """
+    from rich.live import Live
+
+    outcomes: dict[str, tuple[str, str]] = {name: ("QUEUED", "") for name in names}
+    outcomes.update({name: ("SKIPPED", reason) for name, reason in (skipped or {}).items()})
+    ops: dict[str, str] = {}
+    submitted: dict[str, float] = {}
+    finished: dict[str, float] = {}
+
+    def _submit(name: str):
+        instance = cache[name]
+        try:
+            if verb == "delete" and node_kind(instance) == "flex-start":
+                qr_id = instance.get("queued_resource_id", name)
+                ops[name] = _backend().submit_queued_delete(qr_id, instance["zone"])
+            else:
+                ops[name] = _backend().submit_node_op(verb, name, instance["zone"])
+        except subprocess.CalledProcessError as exc:
+            reason = _error_reason(exc)
+            outcomes[name] = ("GONE" if "NOT_FOUND" in reason else "FAILED", reason)
+            return
+        except Exception as exc:
+            # A timeout or an API error: the pool would swallow it and leave
+            # the node QUEUED, reading as neither done nor failed.
+            outcomes[name] = ("FAILED", str(exc) or type(exc).__name__)
+            return
+        submitted[name] = time.time()
+        outcomes[name] = (_BULK_RUNNING[verb], datetime.now().strftime("since %H:%M:%S"))
+
+    def _poll(zone: str, zone_ops: dict[str, str]):
+        try:
+            found = _backend().poll_operations(zone, list(zone_ops.values()))
+        except (subprocess.CalledProcessError, RuntimeError):
+            return  # Transient: the next round asks again.
+        for name, op in zone_ops.items():
+            result = found.get(op, {})
+            if not result.get("done"):
+                continue
+            finished[name] = time.time()
+            took = f"in {int(finished[name] - submitted[name])}s"
+            if "error" in result:
+                outcomes[name] = ("FAILED", result["error"].get("message", took))
+            else:
+                outcomes[name] = ("DONE", took)
+
+    started_at = time.time()
+    with Live(_bulk_table(verb, outcomes, started_at), refresh_per_second=1) as live:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [pool.submit(_submit, name) for name in names]
+            while not all(f.done() for f in futures):
+                time.sleep(0.5)
+                live.update(_bulk_table(verb, outcomes, started_at))
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            while True:
+                in_flight = [n for n in ops if outcomes[n][0] == _BULK_RUNNING[verb]]
+                if not in_flight:
+                    break
+                if time.time() - started_at > BULK_OP_TIMEOUT:
+                    for name in in_flight:
+                        outcomes[name] = ("FAILED", f"still running after {BULK_OP_TIMEOUT}s, check gcloud")
+                    break
+                by_zone: dict[str, dict[str, str]] = {}
+                for name in in_flight:
+                    by_zone.setdefault(cache[name]["zone"], {})[name] = ops[name]
+                list(pool.map(lambda item: _poll(*item), by_zone.items()))
+                live.update(_bulk_table(verb, outcomes, started_at))
+                if any(outcomes[n][0] == _BULK_RUNNING[verb] for n in in_flight):
+                    time.sleep(BULK_POLL_INTERVAL)
+        live.update(_bulk_table(verb, outcomes, started_at))
+    for zone in {cache[name]["zone"] for name in names}:
+        invalidate_zone(zone)
+    for name in ops:
+        outcome = "ok" if outcomes[name][0] == "DONE" else "failed"
+        took = finished.get(name, time.time()) - submitted[name]
+        record_metric(verb, cache[name]["zone"], cache[name]["type"], outcome, took)
+    return outcomes
+
+
+def _bulk_summary(verb: str, outcomes: dict[str, tuple[str, str]]):
+    """Print how the bulk run went; exit non-zero if any node did not finish.
+
+    Anything but DONE, GONE or SKIPPED counts as failed: a node still QUEUED
+    or in flight when the run ended never got its operation through.
+    """
+    failed = [
+        name for name, (state, _) in outcomes.items() if state not in ("DONE", "GONE", "SKIPPED")
+    ]
+    done = sum(1 for state, _ in outcomes.values() if state in ("DONE", "GONE"))
+    if failed:
+        print(f"❌ {verb} failed on {len(failed)} node(s): {', '.join(failed)}")
+        raise typer.Exit(1)
+    print(f"✅ Done! {verb} finished on {done} node(s).")
+
+
+def _in_state(names: list[str], cache: dict, wanted: str) -> tuple[list[str], dict[str, str]]:
+    """Split names into those currently in state wanted and the rest, with their state."""
+    states = probe_states({name: cache[name] for name in names})
+    targets = [name for name in names if states[name] == wanted]
+    return targets, {name: states[name] for name in names if states[name] != wanted}
 
 
 @app.command()
-def restart(name: str | None = None):
-    """Start a stopped TPU and update SSH config. If no name, tries all cached TPUs."""
+def restart(
+    name: str | None = None,
+    race: int = typer.Option(
+        1, help="With no name, start this many stopped TPUs at once and keep the first one up"
+    ),
+    all_nodes: bool = typer.Option(False, "--all", help="Every cached TPU (pool nodes aside)"),
+    prefix: str | None = typer.Option(None, help="Only TPUs whose name starts with this"),
+    zone: str | None = typer.Option(None, help="Only TPUs in zones matching this glob"),
+    accelerator_type: str | None = typer.Option(None, "--type", help="Only TPUs of this accelerator type"),
+    kind: str | None = typer.Option(None, help="Only TPUs of this kind: node, flex-start or pool"),
+    match: str | None = typer.Option(None, help="Only TPUs whose name matches this glob"),
+    workers: int = typer.Option(BULK_WORKERS, help="How many operations to send at once"),
+):
+    """Start a stopped TPU and update SSH config. If no name, starts the best cached TPU.
+
+    With no name, every cached TPU's state is checked at once and they are
+    tried best first: a READY one, then STOPPED ones in zones where starts
+    have been going well. --all or any selector starts every matching
+    stopped TPU instead.
+    """
     cache = get_cache()
     print("[bold green]Restarting TPU[bold green]")
+    selected = select_nodes(cache, all_nodes, prefix, zone, accelerator_type, kind, match)
+    if selected is not None:
+        targets, skipped = _in_state(selected, cache, "STOPPED")
+        outcomes = run_bulk("start", targets, cache, skipped, workers)
+        for tpu_name in targets:
+            if outcomes[tpu_name][0] == "DONE":
+                update_ssh_config(tpu_name, cache[tpu_name]["zone"])
+        _bulk_summary("start", outcomes)
+        return
     if name:
         if name not in cache:
             print(f"❌ TPU {name} not found in cache, cannot stop it.")
             return -1
         print(f"Restarting TPU [bold blue]{name}[/bold blue]...")
-        cache = {name: cache[name]}
-    else:
-        print(f"{len(cache)} elements in cache, trying to resume one of them...")
+        try:
+            restart_tpu(name, cache[name]["zone"])
+        except subprocess.CalledProcessError:
+            print(f"❌ TPU [bold blue]{name}[/bold blue] is not available")
+        return
 
-    for tpu_name in cache:
-        instance = cache[tpu_name]
-        zone = instance["zone"]
+    # Pool nodes are left for `create --from-pool`.
+    cache = {n: i for n, i in cache.items() if not i.get("pool")}
+    print(f"{len(cache)} elements in cache, checking their state...")
+    states = probe_states(cache)
+    ranked = rank_restart_candidates(cache, states)
+    gone = [n for n in cache if states[n] == "NOT FOUND"]
+    if gone:
+        print(f"⚠️  Not found on GCP, skipped: {', '.join(gone)}")
+    if not ranked:
+        print("❌ No cached TPU can be restarted.")
+        return
+    Console().print(_restart_table(cache, states, ranked))
+    if states[ranked[0]] == "READY":
+        restart_tpu(ranked[0], cache[ranked[0]]["zone"])
+        return
+
+    race = max(1, race)
+    for i in range(0, len(ranked), race):
+        batch = ranked[i : i + race]
+        if len(batch) > 1:
+            if _start_race(batch, cache):
+                return
+            continue
+        tpu_name = batch[0]
+        zone = cache[tpu_name]["zone"]
         print(f"\nChecking [bold blue]{tpu_name}[/bold blue] in [bold]{zone}[/bold]...")
         try:
             restart_tpu(tpu_name, zone)
             return
         except subprocess.CalledProcessError:
             print(f"❌ TPU [bold blue]{tpu_name}[/bold blue] is not available")
-            continue
+    print("❌ None of the cached TPUs could be started.")
 
 
 @app.command()
-def stop(name: str | None = None):
-    """Stop a running TPU to save cost. If no name, stops the first running one found."""
+def stop(
+    name: str | None = None,
+    all_nodes: bool = typer.Option(False, "--all", help="Every cached TPU (pool nodes aside)"),
+    prefix: str | None = typer.Option(None, help="Only TPUs whose name starts with this"),
+    zone: str | None = typer.Option(None, help="Only TPUs in zones matching this glob"),
+    accelerator_type: str | None = typer.Option(None, "--type", help="Only TPUs of this accelerator type"),
+    kind: str | None = typer.Option(None, help="Only TPUs of this kind: node, flex-start or pool"),
+    match: str | None = typer.Option(None, help="Only TPUs whose name matches this glob"),
+    workers: int = typer.Option(BULK_WORKERS, help="How many operations to send at once"),
+):
+    """Stop a running TPU to save cost. If no name, stops the first running one found.
+
+    --all or any selector stops every matching running TPU at once.
+    """
     cache = get_cache()
+    selected = select_nodes(cache, all_nodes, prefix, zone, accelerator_type, kind, match)
+    if selected is not None:
+        print("[bold green]Stopping TPUs[bold green]")
+        targets, skipped = _in_state(selected, cache, "READY")
+        _bulk_summary("stop", run_bulk("stop", targets, cache, skipped, workers))
+        return
     if name:
         if name not in cache:
             print(f"❌ TPU {name} not found in cache, cannot stop it.")
@@ -1030,6 +4028,8 @@ def stop(name: str | None = None):
         cache = {name: cache[name]}
     else:
         print("[bold green]Stopping TPU[bold green]")
+        # A pool node still installing is running on purpose.
+        cache = {n: i for n, i in cache.items() if not i.get("pool")}
         print(
             f"{len(cache)} elements in cache, trying to stop the first one that appears running."
         )
@@ -1042,13 +4042,56 @@ def stop(name: str | None = None):
             print(
                 f"Stopping TPU [bold blue]{tpu_name}[/bold blue] in [bold]{zone}[/bold]..."
             )
-            _run(f"gcloud compute tpus tpu-vm stop {tpu_name} --zone {zone}")
+            _backend().stop_node(tpu_name, zone)
+            invalidate_zone(zone)
             print(f"🧘 TPU [bold blue]{tpu_name}[/bold blue] stopped")
             return
         else:
-            print(
-                f"TPU {tpu_name} is not running, (state: [cyan]{state}[/cyan]) skipping.."
-            )
+            print(
+                f"TPU {tpu_name} is not running, (state: [cyan]{state}[/cyan]) skipping.."
+            )
+
+
+# Per-zone budget for `ls --details`. A zone that hasn't answered by then is
+# shown as TIMEOUT rather than holding up every other row.
+LS_ZONE_TIMEOUT = 30
+
+
+def _ls_table(cache: dict, rows: dict[str, tuple[str, str] | None]) -> Table:
+    """Build the `ls --details` table; rows still waiting on their zone show as '…'."""
+    table = Table("Name", "Zone", "Type", "State", "IP")
+    for name, instance in cache.items():
+        row = rows[name]
+        if row is None:
+            state, ip = "[dim]…[/dim]", ""
+        else:
+            state, ip = row
+            color = {"READY": "bold green", "TIMEOUT": "red", "ERROR": "red"}.get(state)
+            if color:
+                state = f"[{color}]{state}[/{color}]"
+        table.add_row(name, instance["zone"], instance["type"], state, ip)
+    return table
+
+
+def _ls_zone_rows(zone: str, names: list[str]) -> dict[str, tuple[str, str]]:
+    """Fetch one zone's snapshot and turn it into (state, ip) rows for names."""
+    try:
+        list_tpus(zone, fresh=True, timeout=LS_ZONE_TIMEOUT)
+    except RuntimeError:
+        return {name: ("TIMEOUT", "") for name in names}
+    except subprocess.CalledProcessError:
+        return {name: ("ERROR", "") for name in names}
+    rows = {}
+    for name in names:
+        info = describe_tpu(name, zone)
+        if info["state"] == "READY":
+            ip = info["externalIp"] or ""
+        elif info["state"] == "NOT FOUND":
+            ip = "N/A"
+        else:
+            ip = ""
+        rows[name] = (info["state"], ip)
+    return rows
 
 
 @app.command()
@@ -1056,44 +4099,79 @@ def ls(details: bool = False):
     """List cached TPUs. Use --details to fetch live state and IP from GCP."""
     print("[bold green]Listing cached TPUs[bold green]")
     cache = get_cache()
-    if details:
-        table = Table("Name", "Zone", "Type", "State", "IP")
-    else:
+    if not details:
         table = Table("Name", "Zone")
-    for name in cache:
-        instance = cache[name]
-        zone = instance["zone"]
-        if details:
-            state = get_state(name, zone)
-            if state == "READY":
-                ip = get_ext_ip(name, zone)
-            elif state == "NOT FOUND":
-                ip = "N/A"
-            else:
-                ip = ""
-            tpu_type = instance["type"]
-            table.add_row(name, zone, tpu_type, state, ip)
-        else:
-            table.add_row(name, zone)
-    Console().print(table)
+        for name, instance in cache.items():
+            table.add_row(name, instance["zone"])
+        Console().print(table)
+        return
+
+    from rich.live import Live
+
+    # One `tpu-vm list` per zone, all zones at once: the table is ready in the
+    # time of the slowest zone, and each zone's rows fill in as it answers.
+    by_zone: dict[str, list[str]] = {}
+    for name, instance in cache.items():
+        by_zone.setdefault(instance["zone"], []).append(name)
+    rows: dict[str, tuple[str, str] | None] = {name: None for name in cache}
+
+    with Live(_ls_table(cache, rows), refresh_per_second=4) as live:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            futures = [
+                pool.submit(_ls_zone_rows, zone, names)
+                for zone, names in by_zone.items()
+            ]
+            for future in as_completed(futures):
+                rows.update(future.result())
+                live.update(_ls_table(cache, rows))
 
 
 @app.command()
-def rm(name: str):
-    """Delete a TPU VM and remove it from cache."""
-    print(f"[bold green]Deleting TPU {name}[bold green]")
+def rm(
+    name: str | None = typer.Argument(None, help="TPU to delete"),
+    all_nodes: bool = typer.Option(False, "--all", help="Every cached TPU (pool nodes aside)"),
+    prefix: str | None = typer.Option(None, help="Only TPUs whose name starts with this"),
+    zone: str | None = typer.Option(None, help="Only TPUs in zones matching this glob"),
+    accelerator_type: str | None = typer.Option(None, "--type", help="Only TPUs of this accelerator type"),
+    kind: str | None = typer.Option(None, help="Only TPUs of this kind: node, flex-start or pool"),
+    match: str | None = typer.Option(None, help="Only TPUs whose name matches this glob"),
+    workers: int = typer.Option(BULK_WORKERS, help="How many operations to send at once"),
+):
+    """Delete a TPU VM and remove it from cache.
+
+    --all or any selector deletes every matching TPU at once, without asking.
+    """
     cache = get_cache()
+    selected = select_nodes(cache, all_nodes, prefix, zone, accelerator_type, kind, match)
+    if selected is not None:
+        print(f"[bold green]Deleting {len(selected)} TPUs[bold green]")
+        outcomes = run_bulk("delete", selected, cache, workers=workers)
+        # One cache write for the whole run.
+        for tpu_name, (state, _) in outcomes.items():
+            if state in ("DONE", "GONE"):
+                del cache[tpu_name]
+        save_cache(cache)
+        _bulk_summary("delete", outcomes)
+        return
+    if not name:
+        raise ValueError("❌ Name a TPU to delete, or select several with --all or a selector.")
+    print(f"[bold green]Deleting TPU {name}[bold green]")
     if name not in cache:
         print(f"❌ TPU {name} not found in cache, delete it manually.")
         return
     instance = cache[name]
     zone = instance["zone"]
+    if node_kind(instance) == "flex-start":
+        print(f"❌ {name} is a flex-start request; delete it with [bold]flex-cancel {name}[/bold].")
+        return
     print(f"Deleting TPU [bold blue]{name}[/bold blue] in [bold]{zone}[/bold]...")
     try:
-        _run(f"gcloud compute tpus tpu-vm delete {name} --zone {zone}")
+        _backend().delete_node(name, zone)
     except subprocess.CalledProcessError:
         print(f"❌ TPU {name} could not be deleted.")
         return
+    finally:
+        invalidate_zone(zone)
     del cache[name]
     save_cache(cache)
     print(f"✅ TPU [bold blue]{name}[/bold blue] deleted")
@@ -1121,19 +4199,19 @@ def flex_start(
     print(f"  Runtime version:    {software_version}")
     print(f"  Max run duration:   {max_run_duration}")
 
-    command = (
-        f"gcloud alpha compute tpus queued-resources create {queued_resource_id}"
-        f" --zone={zone}"
-        f" --accelerator-type={accelerator_type}"
-        f" --runtime-version={software_version}"
-        f" --node-id={node_id}"
-        f" --provisioning-model=flex-start"
-        f" --max-run-duration={max_run_duration}"
-    )
     try:
-        _run(command)
+        _backend().create_queued_resource(
+            queued_resource_id,
+            zone,
+            accelerator_type,
+            software_version,
+            max_run_duration,
+            capture=True,
+        )
     except subprocess.CalledProcessError as e:
         stderr = e.stderr or ""
+        if _is_not_offered(_error_reason(e)):
+            evict_zone_type(zone, accelerator_type)
         if "already exists" in stderr.lower():
             print(
                 f"\n⚠️  A queued resource named [bold blue]{queued_resource_id}[/bold blue] already exists"
@@ -1152,7 +4230,19 @@ def flex_start(
             }
             save_cache(cache)
         else:
-            print(f"❌ Failed to submit flex-start request for [bold]{zone}[/bold]")
+            print(f"❌ Failed to submit flex-start request for [bold]{zone}[/bold]: {_error_reason(e)}")
+        return
+    except RuntimeError as e:
+        # The request may have been accepted before its response was lost.
+        print(f"⚠️  {e}")
+        print("   Keeping it in the cache; run [bold]flex-status[/bold] to see whether it landed.")
+        cache[node_id] = {
+            "type": accelerator_type,
+            "zone": zone,
+            "queued_resource_id": queued_resource_id,
+            "kind": "flex-start",
+        }
+        save_cache(cache)
         return
 
     cache[node_id] = {
@@ -1188,7 +4278,7 @@ def flex_start(
             if state == "ACTIVE":
                 elapsed = time.time() - start_time
                 print(f"\n✅ Resource is ACTIVE after {elapsed:.1f} secs. Starting reinstall...")
-                reinstall(node_id)
+                _reinstall_one(node_id)
                 break
             elif state in ("SUSPENDED", "FAILED", "ERROR"):
                 print(f"\n❌ Resource entered terminal state [{color}]{state}[/{color}], aborting auto-reinstall.")
@@ -1216,22 +4306,6 @@ RACE_POLL_INTERVAL = 10
 RACE_ACTIVE_WAIT = 900
 
 
-def _race_verdict(states: dict[str, str]) -> tuple[str | None, bool]:
-    """Return (winner, all_dead) from a {node_id: state} mapping.
-
-    Winner: the first node in PROVISIONING or ACTIVE. all_dead: every
-    participant is in a terminal state (FAILED / SUSPENDED / GONE / ERROR).
-    """
-    winner = None
-    for node_id, state in states.items():
-        if state in ("PROVISIONING", "ACTIVE") and winner is None:
-            winner = node_id
-    all_dead = all(
-        s in ("FAILED", "SUSPENDED", "GONE", "ERROR") for s in states.values()
-    )
-    return winner, all_dead
-
-
 def _wait_for_winner_active(
     winner: str, cache: dict, timeout: int = RACE_ACTIVE_WAIT
 ) -> bool:
@@ -1246,55 +4320,35 @@ def _wait_for_winner_active(
     as 'keep waiting' rather than losing track of a live node.
     """
     zone = cache[winner]["zone"]
+    accelerator_type = cache[winner].get("type")
     started = time.time()
+    polls = 0
     print(f"\n⏳ Waiting for [bold blue]{winner}[/bold blue] to become ACTIVE...")
     while time.time() - started < timeout:
         time.sleep(RACE_POLL_INTERVAL)
-        state = queued_resource_state(winner, zone)
+        polls += 1
+        state = poll_queued_resources({winner: zone})[winner]
         elapsed = int(time.time() - started)
         if state == "ACTIVE":
             print(f"✅ [bold green]{winner}[/bold green] is ACTIVE after {elapsed}s.")
+            record_metric("flex_active", zone, accelerator_type, "ok", time.time() - started, polls)
             return True
         if state in ("FAILED", "SUSPENDED", "GONE"):
             print(
                 f"❌ [bold red]{winner}[/bold red] entered terminal state"
                 f" [{state}], aborting."
             )
+            record_metric("flex_active", zone, accelerator_type, "failed", time.time() - started, polls)
             return False
         print(f"   {winner} is {state}, waiting for ACTIVE ({elapsed}s)...")
     print(
         f"❌ [bold red]{winner}[/bold red] did not reach ACTIVE within"
         f" {timeout}s."
     )
+    record_metric("flex_active", zone, accelerator_type, "timeout", time.time() - started, polls)
     return False
 
 
-def _submit_flex(
-    node_id: str, zone: str, accel: str, version: str, duration: str
-) -> str | None:
-    """Submit a flex-start request, returning None on success or a short reason."""
-    cmd = (
-        f"gcloud alpha compute tpus queued-resources create {node_id}"
-        f" --zone={zone}"
-        f" --accelerator-type={accel}"
-        f" --runtime-version={version}"
-        f" --node-id={node_id}"
-        f" --provisioning-model=flex-start"
-        f" --max-run-duration={duration}"
-    )
-    try:
-        _gcloud_output(cmd)
-        return None
-    except subprocess.CalledProcessError as exc:
-        stderr = (exc.stderr or "").strip()
-        # Take the last non-empty line as the reason — it's usually the one
-        # that carries the actual error message.
-        for line in reversed(stderr.splitlines()):
-            if line.strip():
-                return line.strip()
-        return f"exit code {exc.returncode}"
-
-
 def _race_table(
     states: dict[str, str], failures: dict[str, str], started_at: float
 ) -> Table:
@@ -1321,12 +4375,227 @@ def _race_table(
     return table
 
 
+# The race engine's caps. Every submit, poll and cancel goes through one
+# semaphore, so a few hundred participants never mean a few hundred gcloud
+# processes (or API connections) at once; the per-call timeout keeps one hung
+# call from pinning a slot, and a participant whose poll times out just
+# tries again on its next turn.
+RACE_MAX_CONCURRENCY = 32
+RACE_CALL_TIMEOUT = 60
+
+
+class FlexRace:
+    """Submit / poll / cancel for one flex-race, on asyncio.
+
+    The threaded version polled in lockstep rounds: every RACE_POLL_INTERVAL
+    all participants were read together and the round took as long as its
+    slowest zone, so with hundreds of zones a round could outlast the interval
+    and a winner sat unnoticed behind the stragglers. Here each accepted
+    request gets its own poller, on its own schedule, starting one interval
+    after its submission, so a slow or failing zone only delays itself. Calls
+    are asyncio subprocesses on the gcloud backend and worker threads on the
+    rest backend, both bounded by RACE_MAX_CONCURRENCY.
+
+    states / failures are read by the caller afterwards, and also after a
+    Ctrl-C, so everything accepted so far can still be cancelled.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        cache: dict,
+        accelerator_type: str,
+        software_version: str,
+        max_run_duration: str,
+        poll_interval: float = RACE_POLL_INTERVAL,
+        concurrency: int = RACE_MAX_CONCURRENCY,
+        call_timeout: float = RACE_CALL_TIMEOUT,
+    ):
+        self.config = config
+        self.cache = cache
+        self.accelerator_type = accelerator_type
+        self.software_version = software_version
+        self.max_run_duration = max_run_duration
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.call_timeout = call_timeout
+        self.states: dict[str, str] = {}
+        self.failures: dict[str, str] = {}
+        # When each accepted request was submitted, and when its poller first
+        # saw it won or fail, for the per-zone flex_race metrics.
+        self.submitted_at: dict[str, float] = {}
+        self.ended_at: dict[str, float] = {}
+        self.winner: str | None = None
+        self.started_at = time.time()
+        # Poll timings, for the benchmark: how long each list call took (slot
+        # wait included), and the gap between consecutive polls of the same
+        # participant (the per-participant equivalent of a poll round).
+        self.poll_latencies: list[float] = []
+        self.poll_gaps: list[float] = []
+        self._dirty = False
+
+    def table(self) -> Table:
+        return _race_table(self.states, self.failures, self.started_at)
+
+    async def _call(self, fn, *args):
+        """Run one backend call under the global cap and the per-call timeout."""
+        async with self._slots:
+            return await asyncio.wait_for(fn(*args), self.call_timeout)
+
+    async def _feed(self, zone_source):
+        """Start a submission per zone as the (possibly still sweeping) source yields."""
+        loop = asyncio.get_running_loop()
+        zones = iter(zone_source)
+        while self.winner is None:
+            # The source may block on a discovery sweep; keep that off the loop.
+            zone = await loop.run_in_executor(None, next, zones, None)
+            if zone is None:
+                return
+            self._submissions.append(asyncio.create_task(self._submit(zone)))
+
+    async def _submit(self, zone: str):
+        node_id = f"{self.config.tpu_name_prefix}flex-{zone}"
+        try:
+            await self._call(
+                _backend().acreate_queued_resource,
+                node_id, zone, self.accelerator_type, self.software_version, self.max_run_duration,
+            )
+        except subprocess.CalledProcessError as exc:
+            reason = _error_reason(exc)
+            if _is_not_offered(reason):
+                evict_zone_type(zone, self.accelerator_type)
+            self.failures[zone] = reason
+            return
+        except (asyncio.TimeoutError, RuntimeError):
+            # The request may well have been created before we gave up on it:
+            # track it like an accepted one. If it never landed, its first
+            # poll reports GONE and flex-cleanup drops the entry.
+            pass
+        except DeadlineExceeded:
+            # Same for a create cut short by the deadline: it has to be cancellable.
+            self._track(node_id, zone)
+            return
+        except asyncio.CancelledError:
+            # ...or by Ctrl-C.
+            self._track(node_id, zone)
+            raise
+        self._track(node_id, zone)
+        self._pollers.append(asyncio.create_task(self._poll(node_id, zone)))
+
+    def _track(self, node_id: str, zone: str):
+        self.states[node_id] = "SUBMITTED"
+        self.submitted_at[node_id] = time.time()
+        # Recorded per accepted request (flushed to disk on the next tick), so
+        # flex-status / flex-cancel / flex-cleanup can reach every live
+        # request even if the race is interrupted mid-submission.
+        self.cache[node_id] = {
+            "type": self.accelerator_type,
+            "zone": zone,
+            "queued_resource_id": node_id,
+            "kind": "flex-start",
+        }
+        self._dirty = True
+
+    async def _poll(self, node_id: str, zone: str):
+        last = time.time()
+        while self.winner is None:
+            await asyncio.sleep(self.poll_interval)
+            started = time.time()
+            try:
+                listed = await self._call(_backend().alist_queued_resources, zone)
+                found = {_node_id(q): q for q in listed}
+                state = qr_state(found[node_id]) if node_id in found else "GONE"
+            except (subprocess.CalledProcessError, asyncio.TimeoutError, RuntimeError, ValueError):
+                state = "ERROR"
+            except DeadlineExceeded:
+                return  # run() notices on its next tick and ends the race
+            now = time.time()
+            self.poll_latencies.append(now - started)
+            self.poll_gaps.append(now - last)
+            last = now
+            self.states[node_id] = state
+            if state in ("PROVISIONING", "ACTIVE"):
+                self.ended_at[node_id] = now
+                if self.winner is None:
+                    self.winner = node_id
+                return
+            if state in ("FAILED", "SUSPENDED", "GONE"):
+                self.ended_at[node_id] = now
+                return
+            # ERROR keeps polling: a failed read says nothing about the request.
+
+    def record_failures(self):
+        """Record a failed flex_race sample for each zone whose request FAILED or was SUSPENDED.
+
+        A request that merely lost the race, or was still waiting when the
+        race ended, says nothing about its zone and is not recorded.
+        """
+        for node_id, state in self.states.items():
+            if state in ("FAILED", "SUSPENDED"):
+                took = self.ended_at.get(node_id, time.time()) - self.submitted_at[node_id]
+                record_metric("flex_race", self.cache[node_id]["zone"], self.accelerator_type, "failed", took)
+
+    def _flush(self):
+        if self._dirty:
+            self._dirty = False
+            save_cache(self.cache)
+
+    async def run(self, zone_source, on_tick=None) -> str | None:
+        """Race until one request is granted or every one is dead; return the winner.
+
+        Submissions still in flight when the winner is found are awaited, not
+        abandoned: a create we stop waiting for may still land on GCP, and it
+        has to be in states (and the cache) to be cancelled with the losers.
+        """
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._submissions: list[asyncio.Task] = []
+        self._pollers: list[asyncio.Task] = []
+        feeder = asyncio.create_task(self._feed(zone_source))
+        try:
+            while self.winner is None:
+                await asyncio.sleep(1)
+                self._flush()
+                _call_timeout(None)  # raises DeadlineExceeded once --deadline is spent
+                if on_tick:
+                    on_tick()
+                submitting = not feeder.done() or any(not t.done() for t in self._submissions)
+                if not submitting and all(t.done() for t in self._pollers):
+                    break
+            await asyncio.gather(*self._submissions, return_exceptions=True)
+        finally:
+            feeder.cancel()
+            for task in self._pollers:
+                task.cancel()
+            self._flush()
+            if on_tick:
+                on_tick()
+        return self.winner
+
+    async def cancel(self, node_ids: list[str]):
+        """Delete the given requests concurrently (best-effort), under the same cap."""
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+        async def _one(node_id: str):
+            zone = self.cache[node_id]["zone"]
+            try:
+                await self._call(_backend().adelete_queued_resource, node_id, zone, True)
+            except Exception:
+                pass
+            invalidate_zone(zone)
+
+        await asyncio.gather(*(_one(n) for n in node_ids))
+
+
 @app.command("flex-race")
 def flex_race(
     max_run_duration: str = typer.Argument("8h"),
     accelerator_type: str = DEFAULT_ACCELERATOR,
     software_version: str = DEFAULT_SOFTWARE_VERSION,
     zone_discovery: bool = False,
+    deadline: str | None = typer.Option(
+        None, help="Give up after this long, e.g. 2h; unanswered requests are cancelled"
+    ),
+    explain: bool = typer.Option(False, help="Print the zone ranking before submitting"),
 ):
     """Fan out flex-start requests to every zone offering the accelerator type.
 
@@ -1337,121 +4606,89 @@ def flex_race(
     """
     from rich.live import Live
 
+    if deadline:
+        set_deadline(deadline)
     ensure_gcloud_authenticated()
 
-    zones = get_zones(accelerator_type, rediscover=zone_discovery)
-    if not zones:
-        print(f"❌ No zones found offering {accelerator_type}.")
-        return
-    if zone_discovery:
-        print(f"🔄 Zone list refreshed: {len(zones)} zones offering {accelerator_type}.")
-    else:
-        print(f"📋 Using cached zone list: {len(zones)} zones offering {accelerator_type}.")
-
     config = get_config()
     cache = get_cache()
     project = get_project()
 
-    # -- submit ---------------------------------------------------------------
-    print(f"\n[bold green]Submitting flex-start requests to {len(zones)} zones...[/bold green]")
-    states: dict[str, str] = {}
-    failures: dict[str, str] = {}
-
-    def _submit_one(zone: str) -> tuple[str, str, str | None]:
-        node_id = f"{config.tpu_name_prefix}flex-{zone}"
-        reason = _submit_flex(
-            node_id, zone, accelerator_type, software_version, max_run_duration
-        )
-        return node_id, zone, reason
-
-    with ThreadPoolExecutor(max_workers=8) as pool:
-        results = list(pool.map(_submit_one, zones))
-
-    accepted = []
-    for node_id, zone, reason in results:
-        if reason is None:
-            states[node_id] = "SUBMITTED"
-            accepted.append((node_id, zone))
-        else:
-            failures[zone] = reason
-
-    # One cache write for all accepted entries so flex-status / flex-cancel /
-    # flex-cleanup all keep working on them.
-    for node_id, zone in accepted:
-        cache[node_id] = {
-            "type": accelerator_type,
-            "zone": zone,
-            "queued_resource_id": node_id,
-            "kind": "flex-start",
-        }
-    save_cache(cache)
+    if zone_discovery:
+        # No waiting for the whole sweep: each zone is submitted to as soon as
+        # its accelerator-types answer comes back, so the early zones are
+        # already queued (and polled) while the slow ones are still being
+        # checked. In a race for capacity those seconds are what count.
+        print(f"🔍 Discovering zones offering {accelerator_type}, submitting as they answer...")
+        if explain:
+            print("⚠️  --explain has no ranking to show with --zone-discovery: zones go in as they answer.")
+        zone_source = iter_zones_offering(accelerator_type)
+    else:
+        zones = get_zones(accelerator_type)
+        if not zones:
+            print(f"❌ No zones found offering {accelerator_type}.")
+            return
+        print(f"📋 Using cached zone list: {len(zones)} zones offering {accelerator_type}.")
+        # Best zones are submitted to, and so polled, first.
+        zone_source = iter(rank_zones(zones, accelerator_type, explain))
 
-    print(f"✅ Submitted to {len(accepted)} zones; {len(failures)} refused.")
-    if failures:
-        for zone, reason in sorted(failures.items()):
-            print(f"   {zone}: {reason}")
+    race = FlexRace(config, cache, accelerator_type, software_version, max_run_duration)
+    print(f"\n[bold green]Submitting flex-start requests...[/bold green]")
+    try:
+        with Live(race.table(), refresh_per_second=1) as live:
+            winner = asyncio.run(race.run(zone_source, on_tick=lambda: live.update(race.table())))
+    except (KeyboardInterrupt, DeadlineExceeded) as exc:
+        race.record_failures()
+        why = "Deadline reached" if isinstance(exc, DeadlineExceeded) else "Interrupted"
+        print(f"\n⚠️  {why} — cancelling all submitted requests...")
+        save_cache(cache)
+        with _deadline_lifted():
+            _cancel_all(race.states, cache)
+            flex_cleanup()
+        print("Done.")
+        return
 
+    states, failures = race.states, race.failures
+    print(f"✅ Submitted to {len(states)} zones; {len(failures)} refused.")
+    for zone, reason in sorted(failures.items()):
+        print(f"   {zone}: {reason}")
     if not states:
         print("❌ No zone accepted the request. Nothing to race.")
         return
 
-    # -- poll loop ------------------------------------------------------------
-    started_at = time.time()
-    winner: str | None = None
-
-    def _poll_all():
-        """Fetch the state of every live participant in parallel."""
-        def _one(node_id: str) -> tuple[str, str]:
-            try:
-                info = describe_queued_resource(node_id, cache[node_id]["zone"])
-                return node_id, qr_state(info)
-            except Exception:
-                return node_id, "ERROR"
-
-        with ThreadPoolExecutor(max_workers=8) as pool:
-            for node_id, state in pool.map(_one, list(states)):
-                states[node_id] = state
-
-    try:
-        with Live(_race_table(states, failures, started_at), refresh_per_second=1) as live:
-            while True:
-                time.sleep(RACE_POLL_INTERVAL)
-                _poll_all()
-                winner, all_dead = _race_verdict(states)
-                live.update(_race_table(states, failures, started_at))
-                if winner or all_dead:
-                    break
-    except KeyboardInterrupt:
-        print("\n⚠️  Interrupted — cancelling all submitted requests...")
-        _cancel_all(states, cache)
-        flex_cleanup()
-        print("Done.")
-        return
-
     # -- winner or all dead ---------------------------------------------------
-    if all_dead and not winner:
+    # One sample per raced zone: each one that failed now, the winner's own
+    # submit-to-ACTIVE time once it gets there.
+    race.record_failures()
+    if winner is None:
         print("\n❌ All requests ended in a terminal state. No winner.")
         flex_cleanup()
         return
 
-    assert winner is not None  # _race_verdict guarantees this when not all_dead
     print(f"\n🏆 [bold green]{winner}[/bold green] is {states[winner]}! Cancelling the rest...")
-    losers = [n for n in states if n != winner]
-    with ThreadPoolExecutor(max_workers=8) as pool:
-        pool.map(lambda n: _delete_queued_resource(n, cache[n]["zone"], force=True), losers)
-    flex_cleanup()
+    with _deadline_lifted():
+        asyncio.run(race.cancel([n for n in states if n != winner]))
+        flex_cleanup()
 
     # -- wait for the winner to be installable --------------------------------
     # PROVISIONING beats the losers to the cancel, but the node may not be
     # reachable (or even listed) until it turns ACTIVE. Don't hand a phantom to
     # the installer.
-    if not _wait_for_winner_active(winner, cache):
+    active = _wait_for_winner_active(winner, cache)
+    record_metric(
+        "flex_race",
+        cache[winner]["zone"],
+        accelerator_type,
+        "ok" if active else "failed",
+        time.time() - race.submitted_at[winner],
+    )
+    if not active:
         print("No install to run — leaving the winner node as-is.")
         return
 
     # -- install --------------------------------------------------------------
     print(f"\n🚀 Running install on [bold blue]{winner}[/bold blue]...")
-    reinstall(winner)
+    _reinstall_one(winner)
 
 
 def _cancel_all(states: dict[str, str], cache: dict):
@@ -1484,16 +4721,13 @@ def flex_status(name: str | None = None):
 
     table = Table("Name", "Zone", "Type", "QR State", "VM State", "Requested")
     has_suspended = False
+    fetched = fetch_queued_resources(
+        {v["queued_resource_id"]: v["zone"] for v in flex_entries.values()}
+    )
     for node_id, instance in flex_entries.items():
         zone = instance["zone"]
-        qr_id = instance["queued_resource_id"]
-        create_time = None
-        try:
-            info = describe_queued_resource(qr_id, zone)
-            state = qr_state(info)
-            create_time = info.get("createTime")
-        except Exception:
-            state = "ERROR"
+        state, info = fetched[instance["queued_resource_id"]]
+        create_time = info.get("createTime")
         qr_color = _STATE_COLORS.get(state, "white")
 
         if create_time:
@@ -1534,11 +4768,9 @@ def flex_status(name: str | None = None):
 
 def _delete_queued_resource(qr_id: str, zone: str, force: bool = False):
     """Delete a queued resource, optionally with --force."""
-    force_flag = " --force" if force else ""
-    _run(
-        f"gcloud alpha compute tpus queued-resources delete"
-        f" {qr_id} --zone {zone}{force_flag} --quiet"
-    )
+    _backend().delete_queued_resource(qr_id, zone, force=force)
+    # Deleting the request also tears down its node, if one was handed out.
+    invalidate_zone(zone)
 
 
 @app.command()
@@ -1569,11 +4801,15 @@ def flex_cancel(
             return
         flex_entries = {name: flex_entries[name]}
 
+    known = poll_queued_resources(
+        {v["queued_resource_id"]: v["zone"] for v in flex_entries.values()}
+    )
+
     def _cancel_one(instance: dict) -> tuple[str, str, str | None, bool]:
         """Cancel one flex-start entry. Returns (node_id, zone, error_reason, was_gone)."""
         node_id = instance["queued_resource_id"]
         zone = instance["zone"]
-        state = queued_resource_state(node_id, zone)
+        state = known[node_id]
 
         if state == "GONE":
             return node_id, zone, None, True
@@ -1630,10 +4866,13 @@ def flex_cleanup():
         return
 
     removed = []
+    known = poll_queued_resources(
+        {v["queued_resource_id"]: v["zone"] for v in flex_entries.values()}
+    )
     for node_id, instance in flex_entries.items():
         zone = instance["zone"]
         qr_id = instance["queued_resource_id"]
-        state = queued_resource_state(qr_id, zone)
+        state = known[qr_id]
 
         if state == "ERROR":
             # Could be a transient API failure, so keep the entry rather than
@@ -1669,6 +4908,376 @@ def flex_cleanup():
         print("Nothing to clean up.")
 
 
+# ---------------------------------------------------------------------------
+# warm pool
+# ---------------------------------------------------------------------------
+
+# The warm pool keeps installed, stopped nodes ready to be started: `create
+# --from-pool` takes one and pays only for a `tpu-vm start`, not for a create
+# plus a full install. Pool nodes live in the cache like any other, with a
+# "pool" field saying whether they are still "installing" or "ready"; taking
+# one drops the field. POOL_FILE holds the target size and what to create.
+POOL_FILE = os.path.join(CONFIG_DIR, "pool.json")
+# Claims and pool-state changes are each one update_cache, so two creates
+# never take the same node. POOL_FILL_LOCK is held for a whole refill, so at
+# most one runs at a time; a background refill writes to POOL_LOG.
+POOL_FILL_LOCK = os.path.join(CONFIG_DIR, "pool-fill.lock")
+POOL_LOG = os.path.join(CONFIG_DIR, "pool-fill.log")
+# A node "installing" for longer than this outlived any install a live refill
+# could still be running (a create, the unreachable budget and the install).
+POOL_INSTALL_STALE = REMOTE_INSTALL_TIMEOUT + UNREACHABLE_BUDGET + 1800
+
+
+def _load_pool() -> dict:
+    try:
+        with open(POOL_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {
+            "size": 0,
+            "accelerator_type": DEFAULT_ACCELERATOR,
+            "software_version": DEFAULT_SOFTWARE_VERSION,
+        }
+
+
+def _pool_nodes(cache: dict, accelerator_type: str | None = None) -> list[str]:
+    """Cached pool nodes, installing or ready, optionally of one accelerator type."""
+    return [
+        name
+        for name, instance in cache.items()
+        if instance.get("pool")
+        and (accelerator_type is None or instance["type"] == accelerator_type)
+    ]
+
+
+def _set_pool_state(
+    name: str,
+    state: str | None,
+    zone: str = "",
+    accelerator_type: str = "",
+    software_version: str = "",
+):
+    """Record a pool node's state in the cache, or drop its entry when state is None.
+
+    Only an "installing" node is added to the cache, stamped with when its
+    install began; a later state for a node that is no longer cached (removed
+    with `rm` meanwhile) is not brought back.
+    """
+
+    def _apply(cache: dict):
+        if state is None:
+            cache.pop(name, None)
+        elif name in cache:
+            entry = {k: v for k, v in cache[name].items() if k != "installing_since"}
+            cache[name] = dict(entry, pool=state)
+        elif state == "installing":
+            cache[name] = {
+                "type": accelerator_type,
+                "zone": zone,
+                "software_version": software_version,
+                "pool": state,
+                "installing_since": time.time(),
+            }
+
+    update_cache(_apply)
+
+
+def _fill_one(pool: dict, config: Config, project: str) -> bool:
+    """Create, install and stop one pool node; return whether it made it in."""
+    accelerator_type = pool["accelerator_type"]
+    name = f"{config.tpu_name_prefix}pool-{secrets.token_hex(3)}"
+    for zone in rank_zones(get_zones(accelerator_type), accelerator_type):
+        print(f"\nCreating pool node [bold blue]{name}[/bold blue] in [bold]{zone}[/bold]...")
+        try:
+            with measure("create", zone, accelerator_type):
+                _backend().create_node(
+                    name, zone, accelerator_type, pool["software_version"], capture=True
+                )
+        except subprocess.CalledProcessError as exc:
+            reason = _error_reason(exc)
+            print(f"❌ TPU not available in [bold]{zone}[/bold]: {reason}")
+            if _is_not_offered(reason):
+                evict_zone_type(zone, accelerator_type)
+            continue
+        finally:
+            invalidate_zone(zone)
+        _set_pool_state(name, "installing", zone, accelerator_type, pool["software_version"])
+        try:
+            install_tpu_script(name, zone, project, config)
+            _backend().stop_node(name, zone)
+        except BaseException as exc:
+            # Whatever stopped the install (an auth error, Ctrl-C, SIGTERM),
+            # a node left behind would bill and count toward the pool forever.
+            print(f"❌ Pool node {name} did not install, deleting it: {exc!r}")
+            with contextlib.suppress(Exception):
+                _backend().delete_node(name, zone)
+            _set_pool_state(name, None)
+            if isinstance(exc, (subprocess.CalledProcessError, RuntimeError)):
+                return False
+            raise
+        finally:
+            invalidate_zone(zone)
+        _set_pool_state(name, "ready")
+        print(f"♨️  Pool node [bold green]{name}[/bold green] is installed and stopped.")
+        return True
+    print("❌ No zone could create a pool node.")
+    return False
+
+
+def _reap_installing(refill_running: bool) -> int:
+    """Delete pool nodes a refill left "installing" and never finished; return how many.
+
+    Only a refill creates "installing" nodes, so with none running every one
+    is an orphan (its refill was killed outright, or the machine slept
+    through it). While one runs, only those installing for longer than
+    POOL_INSTALL_STALE are. Each is checked live: one that still exists is
+    deleted, one already gone just leaves the cache.
+    """
+    cache = get_cache()
+    now = time.time()
+    orphans = [
+        name
+        for name in _pool_nodes(cache)
+        if cache[name]["pool"] == "installing"
+        and (not refill_running or now - cache[name].get("installing_since", 0) > POOL_INSTALL_STALE)
+    ]
+
+    def _reap(name: str) -> bool:
+        zone = cache[name]["zone"]
+        try:
+            state = get_state(name, zone, fresh=True)
+            if state != "NOT FOUND":
+                _backend().delete_node(name, zone, capture=True)
+        except subprocess.CalledProcessError as exc:
+            print(f"❌ Stale pool node {name} could not be deleted: {_error_reason(exc)}")
+            return False
+        finally:
+            invalidate_zone(zone)
+        _set_pool_state(name, None)
+        print(f"✅ Removed pool node [bold blue]{name}[/bold blue], left {state} by an unfinished refill")
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, len(orphans))) as executor:
+        return sum(executor.map(_reap, orphans))
+
+
+def fill_pool() -> int:
+    """Top the pool up to its size; return how many nodes were added.
+
+    Returns at once if another refill is running. Stops at the first node that
+    cannot be created or installed, rather than burning through every zone
+    again for the next one.
+    """
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    with open(POOL_FILL_LOCK, "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            print("Another pool refill is already running.")
+            return 0
+        _reap_installing(refill_running=False)
+        config = get_config()
+        project = get_project()
+        added = 0
+        while True:
+            # Re-read both every round: `pool-set` and `create --from-pool`
+            # may run while a refill is in progress.
+            pool = _load_pool()
+            held = _pool_nodes(get_cache(), pool["accelerator_type"])
+            if len(held) >= pool["size"] or not _fill_one(pool, config, project):
+                return added
+            added += 1
+
+
+def _refill_in_background():
+    """Start a detached `pool-fill`, which outlives this command; output goes to POOL_LOG.
+
+    Deliberately not spawned through _spawn: Ctrl-C or a deadline here must
+    not kill a refill that is halfway through an install.
+    """
+    if _load_pool()["size"] <= 0:
+        return
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    with open(POOL_LOG, "a") as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "pool-fill"],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    print(f"♨️  Refilling the pool in the background, see {POOL_LOG}")
+
+
+def claim_pool_node(
+    accelerator_type: str, software_version: str, zone: str | None = None
+) -> tuple[str, str] | None:
+    """Take a matching ready pool node out of the pool; return (name, zone).
+
+    A node matches on accelerator type and software version, and on zone
+    when one is given. Entries from before the version was recorded are
+    taken to run the pool's current version.
+    """
+    pool_version = _load_pool()["software_version"]
+
+    def _matches(instance: dict) -> bool:
+        return (
+            instance.get("pool") == "ready"
+            and instance["type"] == accelerator_type
+            and instance.get("software_version", pool_version) == software_version
+            and zone in (None, instance["zone"])
+        )
+
+    def _claim(cache: dict) -> tuple[str, str] | None:
+        for name, instance in cache.items():
+            if _matches(instance):
+                cache[name] = {k: v for k, v in instance.items() if k != "pool"}
+                return name, instance["zone"]
+        return None
+
+    return update_cache(_claim)
+
+
+def take_from_pool(
+    accelerator_type: str,
+    software_version: str,
+    zone: str | None = None,
+    reinstall: bool = False,
+) -> str | None:
+    """Start a ready pool node and return its name, or None if the pool has none.
+
+    A node that will not start (deleted or broken behind our back) is dropped
+    and the next one tried. Whatever happens, a background refill replaces
+    what was taken.
+    """
+    try:
+        while (claimed := claim_pool_node(accelerator_type, software_version, zone)) is not None:
+            name, zone = claimed
+            print(f"♨️  Taking [bold blue]{name}[/bold blue] from the warm pool")
+            try:
+                restart_tpu(name, zone)
+            except subprocess.CalledProcessError:
+                print(f"❌ Pool node {name} could not be started, dropping it.")
+                with contextlib.suppress(subprocess.CalledProcessError):
+                    _backend().delete_node(name, zone)
+                invalidate_zone(zone)
+                _set_pool_state(name, None)
+                continue
+            if reinstall:
+                # Only what changed since the pool install is sent and re-run.
+                _reinstall_one(name, delta=True)
+            return name
+        return None
+    finally:
+        _refill_in_background()
+
+
+@app.command("pool-set")
+def pool_set(
+    size: int = typer.Option(..., help="How many installed, stopped nodes to keep"),
+    accelerator_type: str | None = typer.Option(None, help="Accelerator type of pool nodes"),
+    software_version: str | None = typer.Option(None, help="Software version of pool nodes"),
+    fill: bool = typer.Option(True, help="Start a background refill right away"),
+):
+    """Set the warm pool's size and node type."""
+    pool = _load_pool()
+    pool["size"] = size
+    if accelerator_type:
+        pool["accelerator_type"] = accelerator_type
+    if software_version:
+        pool["software_version"] = software_version
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    with open(POOL_FILE, "w") as f:
+        json.dump(pool, f, indent=2)
+    print(
+        f"♨️  Warm pool: {size} x [bold]{pool['accelerator_type']}[/bold] ({pool['software_version']})"
+    )
+    if fill:
+        _refill_in_background()
+
+
+@app.command("pool-status")
+def pool_status():
+    """Show the warm pool's target and the nodes in it."""
+    pool = _load_pool()
+    cache = get_cache()
+    names = _pool_nodes(cache)
+    ready = sum(1 for name in names if cache[name]["pool"] == "ready")
+    table = Table(
+        "Name",
+        "Zone",
+        "Type",
+        "Version",
+        "Pool",
+        title=f"size {pool['size']} x {pool['accelerator_type']} | ready {ready} | installing {len(names) - ready}",
+        title_justify="left",
+    )
+    for name in names:
+        instance = cache[name]
+        state = instance["pool"]
+        color = "bold green" if state == "ready" else "yellow"
+        version = instance.get("software_version", pool["software_version"])
+        table.add_row(name, instance["zone"], instance["type"], version, f"[{color}]{state}[/{color}]")
+    Console().print(table)
+
+
+@app.command("pool-fill")
+def pool_fill(
+    background: bool = typer.Option(False, help=f"Run detached, logging to {POOL_LOG}"),
+):
+    """Create and install pool nodes until the pool is at its size."""
+    if background:
+        _refill_in_background()
+        return
+    # A detached refill is stopped with SIGTERM or SIGHUP; turn both into the
+    # same interrupt as Ctrl-C, so the node being installed is cleaned up.
+    signal.signal(signal.SIGTERM, _interrupt)
+    signal.signal(signal.SIGHUP, _interrupt)
+    added = fill_pool()
+    print(f"✅ Added {added} node(s) to the warm pool.")
+
+
+@app.command("pool-drain")
+def pool_drain():
+    """Set the pool size to 0 and delete its ready nodes."""
+    pool = _load_pool()
+    pool["size"] = 0
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    with open(POOL_FILE, "w") as f:
+        json.dump(pool, f, indent=2)
+    with open(POOL_FILL_LOCK, "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            refill_running = False
+        except BlockingIOError:
+            refill_running = True
+        _reap_installing(refill_running)
+    cache = get_cache()
+    ready = [name for name in _pool_nodes(cache) if cache[name]["pool"] == "ready"]
+    installing = len(_pool_nodes(cache)) - len(ready)
+
+    def _delete(name: str) -> bool:
+        zone = cache[name]["zone"]
+        try:
+            _backend().delete_node(name, zone, capture=True)
+        except subprocess.CalledProcessError as exc:
+            print(f"❌ Pool node {name} could not be deleted: {_error_reason(exc)}")
+            return False
+        finally:
+            invalidate_zone(zone)
+        _set_pool_state(name, None)
+        print(f"✅ Pool node [bold blue]{name}[/bold blue] deleted")
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, len(ready))) as executor:
+        deleted = sum(executor.map(_delete, ready))
+    print(f"Deleted {deleted} of {len(ready)} ready pool node(s).")
+    if installing:
+        print(
+            f"⚠️  {installing} node(s) still installing; they join the pool when done, run pool-drain again then."
+        )
+
+
 # ---------------------------------------------------------------------------
 # hermes-setup / hermes-remove
 # ---------------------------------------------------------------------------
@@ -1807,19 +5416,118 @@ def print_config():
         print(f"Zones cache file found at {ZONES_CACHE_FILE}")
     else:
         print(f"❌ Zones cache file not found at {ZONES_CACHE_FILE}")
+    if os.path.exists(LATENCY_FILE):
+        print(f"Call latencies recorded at {LATENCY_FILE} (see `latency`)")
+    context = _load_context()
+    if context:
+        print(
+            f"gcloud context cached at {CONTEXT_FILE}:"
+            f" account {context.get('account', '-')}, project {context.get('project', '-')}"
+        )
+    else:
+        print("No valid gcloud context cached, the next command checks gcloud live.")
+
+
+# Bucket upper bounds, in seconds, for the `latency` histogram column.
+_LATENCY_BUCKETS = (0.5, 1, 2, 4, 8, 16, 32, float("inf"))
+_SPARK = "▁▂▃▄▅▆▇█"
+
+
+@app.command()
+def latency():
+    """Show the recorded gcloud call latencies, for tuning timeouts and hedging."""
+    labels = sorted(set(_load_latency()) | set(_latency_new))
+    if not labels:
+        print(f"No latencies recorded yet at {LATENCY_FILE}.")
+        return
+    table = Table(
+        "Call", "Samples", "p50", "p95", "p99", "Max", "≤0.5s … >32s",
+        title=f"gcloud call latency (last {LATENCY_SAMPLES} per call)",
+        title_justify="left",
+    )
+    for label in labels:
+        samples = _latency_samples(label)
+        counts = [0] * len(_LATENCY_BUCKETS)
+        for sample in samples:
+            counts[next(i for i, bound in enumerate(_LATENCY_BUCKETS) if sample <= bound)] += 1
+        top = max(counts)
+        spark = "".join(
+            " " if n == 0 else _SPARK[min(len(_SPARK) - 1, n * len(_SPARK) // (top + 1))]
+            for n in counts
+        )
+        table.add_row(
+            label,
+            str(len(samples)),
+            *(f"{_quantile(samples, q):.2f}s" for q in (0.5, 0.95, 0.99)),
+            f"{max(samples):.2f}s",
+            spark,
+        )
+    Console().print(table)
+    print(
+        f"Reads still running past their p95 are hedged once a call has"
+        f" {HEDGE_MIN_SAMPLES}+ samples."
+    )
+
+
+def _stats_row(samples: list[dict]) -> list[str]:
+    """n, ok share, p50/p90/p99 of the successful samples' seconds, mean attempts."""
+    ok = [m["secs"] for m in samples if m["outcome"] == "ok"]
+    quantiles = [f"{_quantile(ok, q):.0f}s" if ok else "-" for q in (0.5, 0.9, 0.99)]
+    attempts = sum(m.get("attempts", 1) for m in samples) / len(samples)
+    return [str(len(samples)), f"{100 * len(ok) // len(samples)}%", *quantiles, f"{attempts:.1f}"]
+
+
+@app.command()
+def stats(
+    since: str = typer.Option("7d", help="Only phases recorded in this window, e.g. 24h"),
+    phase: str | None = typer.Option(None, help="Only this phase"),
+    zone: str | None = typer.Option(None, help="Only zones matching this glob"),
+    by_zone: bool = typer.Option(True, help="Also break each phase down per zone"),
+):
+    """Show how long each phase of getting a TPU ready takes, overall and per zone.
+
+    Percentiles are over the successful runs; failures and timeouts count
+    towards the ok share only.
+    """
+    samples = [
+        m
+        for m in load_metrics(phase, since=time.time() - _parse_duration(since))
+        if zone is None or fnmatch.fnmatch(m["zone"], zone)
+    ]
+    if not samples:
+        print(f"No phases recorded in the last {since} at {METRICS_FILE}.")
+        return
+    by_phase: dict[str, list[dict]] = {}
+    for sample in samples:
+        by_phase.setdefault(sample["phase"], []).append(sample)
+    columns = ("Runs", "OK", "p50", "p90", "p99", "Attempts")
+    table = Table("Phase", *columns, title=f"Phase timings, last {since}", title_justify="left")
+    for name, runs in sorted(by_phase.items()):
+        table.add_row(name, *_stats_row(runs))
+    Console().print(table)
+    if not by_zone:
+        return
+    table = Table("Phase", "Zone", *columns, title="Per zone", title_justify="left")
+    for name, runs in sorted(by_phase.items()):
+        per_zone: dict[str, list[dict]] = {}
+        for run in runs:
+            per_zone.setdefault(run["zone"], []).append(run)
+        for zone_name, zone_runs in sorted(per_zone.items()):
+            table.add_row(name, zone_name, *_stats_row(zone_runs))
+    Console().print(table)
 
 
 @app.command()
 def cleanup_ssh_hosts(name: str | None = None):
     """Remove stale known_hosts entries for a TPU. If no name, cleans all cached."""
     cache = get_cache()
-    if name is not None:
-        cleanup_known_hosts(name)
-    else:
-        for element in cache:
-            cleanup_known_hosts(element)
+    for element in [name] if name is not None else cache:
+        # Every worker of a slice has its own alias and host key.
+        for alias in _ssh_aliases(element) or [element]:
+            cleanup_known_hosts(alias)
     print("✅ Done! Known_hosts cleaned up")
 
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGINT, _interrupt)
     app()
@@ -5,17 +5,59 @@
 # script detached. Everything the install does happens inside this one process,
 # so the install no longer depends on a series of separate ssh sessions staying
 # up, and there is exactly one log to read when something goes wrong.
+#
+# The install is a list of named steps, steps/NAME.sh in the order steps/ORDER
+# lists them, plus the extra startup script. A step that succeeds leaves a
+# stamp in $STATE holding the hash of its script and inputs; on the next run a
+# step whose stamp still matches is skipped, so a reinstall only re-runs what
+# changed. `--force NAME` (or `--force all`) re-runs a step regardless.
 set -eu
 
 cd ~
 
-echo "=== setup.sh ==="
-bash setup.sh
+STATE=~/.get-tpu-state
+FORCE=" "
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --force) FORCE="$FORCE$2 "; shift 2 ;;
+        *) echo "run-all.sh: unknown argument $1" >&2; exit 2 ;;
+    esac
+done
+mkdir -p "$STATE"
+
+# run_step NAME SCRIPT [INPUT...]: run SCRIPT unless its stamp matches the hash
+# of SCRIPT and the INPUT files and directories.
+run_step() {
+    name=$1
+    script=$2
+    shift 2
+    hash=$(find "$script" "$@" -type f -print | LC_ALL=C sort \
+        | xargs -d '\n' sha256sum | sha256sum | cut -d' ' -f1)
+    stamp="$STATE/$name.sha256"
+    case "$FORCE" in
+        *" $name "* | *" all "*) rm -f "$stamp" ;;
+    esac
+    if [ -f "$stamp" ] && [ "$(cat "$stamp")" = "$hash" ]; then
+        echo "=== $name: unchanged, skipped ==="
+        return
+    fi
+    echo "=== $name ==="
+    rm -f "$stamp"
+    started=$(date +%s)
+    bash "$script"
+    echo "$hash" > "$stamp"
+    echo "=== $name: done in $(($(date +%s) - started))s ==="
+}
+
+# steps/ORDER is the one list of steps, which get-tpu also reads. It is read
+# up front so a step reading stdin cannot swallow the rest of it.
+for step in $(grep -v '^#' steps/ORDER); do
+    run_step "$step" "steps/$step.sh"
+done
 
 if [ -f extra/run.sh ]; then
     echo
-    echo "=== extra startup ==="
-    bash extra/run.sh
+    run_step extra extra/run.sh extra
 fi
 
 echo
@@ -0,0 +1,15 @@
+#!/bin/sh
+set -eu
+
+# Stopping the apt timers (apt-timers) does not kill a run already in flight,
+# so still wait for the lock instead of failing on it. NEEDRESTART_MODE=a keeps
+# needrestart from prompting for which services to restart when there is no
+# TTY to answer on.
+APT="sudo DEBIAN_FRONTEND=noninteractive NEEDRESTART_MODE=a apt-get -o DPkg::Lock::Timeout=900"
+
+if dpkg -s python3-virtualenv python-is-python3 >/dev/null 2>&1; then
+    echo "python3-virtualenv and python-is-python3 already present, skipping apt"
+else
+    $APT update
+    $APT install -y python3-virtualenv python-is-python3
+fi
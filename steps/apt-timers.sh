@@ -0,0 +1,10 @@
+#!/bin/sh
+set -eu
+
+# unattended-upgrades on a freshly booted TPU resolves ~230 packages and holds
+# the dpkg lock for ~15 minutes, restarting sshd on its way through
+# openssh-server. These are short-lived dev VMs, so take the auto-upgrade
+# machinery out of the way rather than racing it.
+sudo systemctl disable --now apt-daily.timer apt-daily-upgrade.timer \
+    unattended-upgrades.service 2>/dev/null || true
+sudo systemctl stop apt-daily.service apt-daily-upgrade.service 2>/dev/null || true
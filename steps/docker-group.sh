@@ -0,0 +1,5 @@
+#!/bin/sh
+set -eu
+
+# Add user to docker group
+sudo usermod -aG docker "$USER"